@@ -16,7 +16,7 @@
 # START python -m flask --debug run
 # ===
 
-from h2o_nitro import View, box
+from h2o_nitro import View, SessionExecutor, box
 
 
 def main(view: View):
@@ -27,6 +27,9 @@ def main(view: View):
 
 nitro = View(main, title='Hello Nitro!', caption='v1.0')
 
+# Run at most 100 sessions at once; hold up to 20 more connections, then turn the rest away until sessions end.
+sessions = SessionExecutor(nitro, max_sessions=100, max_queued=20)
+
 # ┌─────────────── Flask Boilerplate ───────────────┐
 
 import simple_websocket
@@ -45,7 +48,7 @@ def home_page():
 def socket():
     ws = simple_websocket.Server(request.environ)
     try:
-        nitro.serve(ws.send, ws.receive)
+        sessions.serve(ws.send, ws.receive, close=ws.close)
     except simple_websocket.ConnectionClosed:
         pass
     return ''
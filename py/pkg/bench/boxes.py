@@ -0,0 +1,85 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# This script measures the memory used by, and the time taken to construct,
+# boxes, options and headers, as defined (with __slots__), and in the baseline
+# layout: plain classes with the same fields and constructors, whose instances
+# keep their fields in a __dict__.
+#
+# Usage: python bench/boxes.py [count]
+#
+import sys
+import timeit
+import tracemalloc
+
+from h2o_nitro.core import Box, Option, Header
+
+
+def _dict_backed(cls: type) -> type:
+    # Same constructor, no __slots__.
+    return type(f'Dict{cls.__name__}', (), dict(__init__=cls.__init__))
+
+
+def _makers(box, option, header):
+    def make_box():
+        return box('Hello', value=42)
+
+    def make_option():
+        return option('cinnamon', text='Cinnamon Sugar')
+
+    def make_header():
+        return header('Flavor')
+
+    def make_row():
+        return option('cinnamon', options=[option('a'), option('b'), option('c')])
+
+    return [
+        ('box', make_box),
+        ('option', make_option),
+        ('header', make_header),
+        ('table row (4 opts)', make_row),
+    ]
+
+
+layouts = [
+    ('slots', _makers(Box, Option, Header)),
+    ('dict', _makers(_dict_backed(Box), _dict_backed(Option), _dict_backed(Header))),
+]
+
+
+def measure_bytes(make, n: int) -> float:
+    tracemalloc.start()
+    xs = [make() for _ in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del xs
+    return size / n
+
+
+def measure_time(make, n: int) -> float:
+    return min(timeit.repeat(make, number=n, repeat=5)) / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'{"Object":<20} {"Layout":<8} {"Bytes/instance":>16} {"Construct (ns)":>16}')
+    for i, (name, _) in enumerate(layouts[0][1]):
+        for layout, makers in layouts:
+            make = makers[i][1]
+            print(f'{name:<20} {layout:<8} {measure_bytes(make, n):>16.1f} {measure_time(make, n) * 1e9:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
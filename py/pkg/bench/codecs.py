@@ -0,0 +1,58 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# This script measures the throughput, in MB of encoded output per second, of each available codec
+# on realistic box trees, for both full outputs and small messages.
+#
+# Usage: python bench/codecs.py
+#
+import json
+import timeit
+
+from h2o_nitro import box
+from h2o_nitro.core import _MsgType, _codecs, _JSONCodec, _list_array, msgpack, orjson
+from serialize import make_table, make_form, make_graphics
+
+
+def encoders():
+    # (name, function(box) => encoded output message)
+    if msgpack:
+        codec = _codecs['msgpack']()
+        yield 'msgpack (packb)', lambda b: msgpack.packb(dict(t=_MsgType.Output, box=b.dump()))
+        yield 'msgpack (reused)', lambda b: codec.marshal(dict(t=_MsgType.Output, box=b.dump()))
+        yield 'msgpack (fast)', lambda b: codec.marshal_output(b, None)
+    if orjson:
+        codec = _JSONCodec()
+        yield 'json (orjson)', lambda b: codec.marshal(dict(t=_MsgType.Output, box=b.dump()))
+    yield 'json (stdlib)', lambda b: json.dumps(dict(t=_MsgType.Output, box=b.dump()), default=_list_array)
+
+
+def main():
+    trees = [
+        ('table', make_table(2000), 20),
+        ('form', make_form(300), 20),
+        ('graphics', make_graphics(5000), 20),
+        ('small', box('Hello', value=42), 10000),
+    ]
+    print(f'{"Tree":<10} {"Codec":<18} {"Bytes":>10} {"ms":>10} {"MB/s":>10}')
+    for name, b, n in trees:
+        for codec, encode in encoders():
+            size = len(encode(b))
+            t = min(timeit.repeat(lambda: encode(b), number=n, repeat=5)) / n
+            print(f'{name:<10} {codec:<18} {size:>10} {t * 1e3:>10.3f} {size / t / 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
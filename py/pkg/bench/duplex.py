@@ -0,0 +1,112 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# This script measures the latency of in-process transports: the time from the host writing an input to the view's
+# next output reaching the host, for an event-driven Duplex, a SyncDuplex, and a Duplex polling every 100ms (the
+# previous implementation).
+#
+# Usage: python bench/duplex.py
+#
+import asyncio
+import collections
+import statistics
+import threading
+import time
+
+from h2o_nitro import View, AsyncView, Duplex, SyncDuplex
+from h2o_nitro.core import _MsgType, _marshal
+
+join_message = _marshal(dict(t=_MsgType.Join, client=dict()))
+input_message = _marshal(dict(t=_MsgType.Input, inputs=[]))
+
+
+class PollingDuplex:  # As Duplex used to be.
+    def __init__(self):
+        self._input = collections.deque()
+        self._output = collections.deque()
+
+    async def send(self, x):
+        self._output.append(x)
+
+    async def recv(self):
+        while True:
+            if len(self._input):
+                return self._input.popleft()
+            await asyncio.sleep(0.1)
+
+    def write(self, x):
+        self._input.append(x)
+
+    def read(self):
+        return self._output.popleft() if len(self._output) else None
+
+
+async def echo_async(view: AsyncView):
+    while True:
+        await view('Hello')
+
+
+def echo(view: View):
+    while True:
+        view('Hello')
+
+
+def report(name: str, ts):
+    ts = sorted(t * 1e3 for t in ts)
+    print(f'{name:<16} {statistics.median(ts):>10.3f} {ts[int(len(ts) * .99)]:>10.3f} {ts[-1]:>10.3f}')
+
+
+async def bench_async(name: str, io, n: int):
+    task = asyncio.ensure_future(AsyncView(echo_async).serve(io.send, io.recv))
+
+    async def roundtrip(m) -> float:
+        t = time.perf_counter()
+        io.write(m)
+        while io.read() is None:  # Poll as fast as possible, to measure only the transport's latency.
+            await asyncio.sleep(0)
+        return time.perf_counter() - t
+
+    await roundtrip(join_message)
+    io.read()  # Output
+    report(name, [await roundtrip(input_message) for _ in range(n)])
+    task.cancel()
+
+
+def bench_sync(n: int):
+    ready = threading.Semaphore(0)
+    io = SyncDuplex(lambda m: ready.release())
+    threading.Thread(target=View(echo).serve, args=(io.send, io.recv), daemon=True).start()
+
+    def roundtrip(m) -> float:
+        t = time.perf_counter()
+        io.write(m)
+        ready.acquire()
+        return time.perf_counter() - t
+
+    roundtrip(join_message)
+    ready.acquire()  # Output
+    report('SyncDuplex', [roundtrip(input_message) for _ in range(n)])
+    io.close()
+
+
+def main():
+    print(f'{"Transport":<16} {"p50 ms":>10} {"p99 ms":>10} {"max ms":>10}')
+    asyncio.run(bench_async('Duplex', Duplex(), 1000))
+    bench_sync(1000)
+    asyncio.run(bench_async('Duplex (polling)', PollingDuplex(), 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# This script times the serializer fast path against Box.dump().
+# tests/test_serialize.py checks that their outputs are identical.
+#
+# Usage: python bench/serialize.py
+#
+import timeit
+from collections import OrderedDict
+
+from h2o_nitro import box, row, col, option, header
+from h2o_nitro.core import _MsgType, _marshal, _marshal_output
+
+
+def make_table(n: int):
+    return box(
+        mode='table',
+        headers=[header('Flavor', mode='link'), header('Price'), header('Extras', mode='md')],
+        options=[option(f'r{i}', options=[f'Flavor {i}', f'${i * 1.5:.2f}', '*Extras*']) for i in range(n)],
+    )
+
+
+def make_form(n: int):
+    return col(*[
+        row(
+            box(f'Amount {i}', value=i, range=(0, 100)),
+            box('Name', value='Boaty', placeholder='Name', style='w-32'),
+            box('Choose', mode='menu', options=[option('a', 'A'), option('b', 'B', selected=True)]),
+            box(mode='check', options=OrderedDict(a='A', b='B')),
+            box(mode='tag', value=['a'], options={'a', 'b'}),
+        )
+        for i in range(n)
+    ])
+
+
+def make_graphics(n: int):
+    return box(
+        box(mode='g-line-y', data=[i % 7 / 7 for i in range(n)], style='stroke-sky-500'),
+        box(mode='g-rect', data=dict(x=0, y=0, w=1, h=1), style='fill-sky-100'),
+        mode='svg',
+        style='w-64 h-32',
+    )
+
+
+def expected(b, edit):
+    d = dict(t=_MsgType.Output, box=b.dump())
+    if edit:
+        d['edit'] = edit.dump()
+    return _marshal(d)  # what _marshal_output(b, edit) must match
+
+
+def main():
+    print(f'{"Tree":<12} {"Bytes":>10} {"dump (ms)":>10} {"fast (ms)":>10}')
+    for name, b in [
+        ('table', make_table(2000)),
+        ('form', make_form(300)),
+        ('graphics', make_graphics(5000)),
+    ]:
+        size = len(_marshal_output(b, None))
+        n = 20
+        t0 = min(timeit.repeat(lambda: expected(b, None), number=n, repeat=5)) / n
+        t1 = min(timeit.repeat(lambda: _marshal_output(b, None), number=n, repeat=5)) / n
+        print(f'{name:<12} {size:>10} {t0 * 1e3:>10.2f} {t1 * 1e3:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
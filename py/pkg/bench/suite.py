@@ -0,0 +1,146 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# This script times the hot paths of core.py on synthetic trees modeled on the docs examples (tables, forms, graphics),
+# and optionally compares the results against a baseline, failing if any benchmark got slower by more than a threshold.
+#
+# Usage: python bench/suite.py [--filter text] [--out results.json] [--compare baseline.json] [--threshold 0.25]
+#
+# Results are printed, and saved with --out, as JSON: {"meta": {...}, "results": {name: nanoseconds per op}}.
+# To refresh the baseline: python bench/suite.py --out bench/baseline.json
+#
+import argparse
+import json
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, Iterator, Tuple
+
+from h2o_nitro import box, option, __version__
+from h2o_nitro.core import Delegator, _MsgType, _Sources, _marshal, _unmarshal, _interpret, _dump, _clean
+from serialize import make_table, make_form, make_graphics
+
+
+def on_click(view):
+    pass
+
+
+def make_links(n: int):
+    return box(*[box(f'Item {i}', link=on_click) for i in range(n)], mode='col')
+
+
+def benchmarks() -> Iterator[Tuple[str, Callable]]:
+    # (name, function to time)
+    yield 'box', lambda: box('Hello', value=42)
+    yield 'box.options', lambda: box('Flavor', mode='menu', options=[option('a', 'A'), option('b', 'B')])
+    yield 'tree.table', lambda: make_table(100)
+    yield 'tree.form', lambda: make_form(20)
+    yield 'tree.graphics', lambda: make_graphics(100)
+
+    b = box('Hello', value=42, style='p-2')
+    yield 'box.call', lambda: b('World', value=43)
+    yield 'box.clone', b.clone
+    yield 'box.truediv', lambda: b / 'text-sky-500'
+
+    trees = [('table', make_table(500)), ('form', make_form(100)), ('graphics', make_graphics(2000))]
+    for name, t in trees:
+        yield f'dump.{name}', t.dump
+
+    d = dict(a=1, b=None, c='x', d=None, e=[1, 2, 3], f=None)
+    yield 'clean', lambda: _clean(d)
+    xs = [(i, f'{i}', [i, i + 1]) for i in range(100)]
+    yield '_dump.list', lambda: _dump(xs)
+
+    for name, t in trees:
+        msg = dict(t=_MsgType.Output, box=t.dump())
+        m = _marshal(msg)
+        yield f'marshal.{name}', lambda msg=msg: _marshal(msg)
+        yield f'unmarshal.{name}', lambda m=m: _unmarshal(m)
+
+    # Trees built afresh for every output: construction plus scanning. (Scanning a tree already scanned is a no-op,
+    # unless it holds sources or lists, so there's no point timing that alone.)
+    delegator = Delegator()
+    for name, make in [('table', lambda: make_table(100)), ('form', lambda: make_form(20)),
+                       ('links', lambda: make_links(200))]:
+        yield f'render.{name}', lambda make=make: delegator.scan(make(), _Sources())
+
+    msg = dict(t=_MsgType.Input, inputs=[['a', 'Boaty'], ['b', 42], ['c', ['x', 'y']]])
+    yield 'interpret.input', lambda: _interpret(msg, _MsgType.Input)
+    msg = dict(t=_MsgType.Join, client=dict(locale='en-US', patch=True), method='foo', params=dict(mode='dark'))
+    yield 'interpret.join', lambda: _interpret(msg, _MsgType.Join)
+
+
+def measure(f: Callable) -> float:
+    # Nanoseconds per call: the best of 5 runs of at least 0.2s each.
+    t = timeit.Timer(f)
+    n, _ = t.autorange()
+    return min(t.repeat(repeat=5, number=n)) / n * 1e9
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> int:
+    regressions = 0
+    print(f'\n{"Benchmark":<22} {"Baseline (ns)":>14} {"Now (ns)":>14} {"Change":>8}')
+    for name, ns in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f'{name:<22} {"-":>14} {ns:>14.1f} {"new":>8}')
+            continue
+        change = ns / base - 1
+        flag = ''
+        if change > threshold:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f'{name:<22} {base:>14.1f} {ns:>14.1f} {change:>+8.1%}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of h2o_nitro.core')
+    parser.add_argument('--filter', default='', help='run only benchmarks whose names contain this text')
+    parser.add_argument('--out', help='save results to this JSON file')
+    parser.add_argument('--compare', help='compare results against this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown that counts as a regression')
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    print(f'{"Benchmark":<22} {"ns/op":>14}')
+    for name, f in benchmarks():
+        if args.filter in name:
+            ns = results[name] = round(measure(f), 1)
+            print(f'{name:<22} {ns:>14.1f}')
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(dict(
+                meta=dict(
+                    version=__version__,
+                    python=platform.python_version(),
+                    implementation=platform.python_implementation(),
+                    machine=platform.machine(),
+                ),
+                results=results,
+            ), f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{regressions} regression(s) over {args.threshold:.0%}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -355,3 +355,18 @@ def edit_add_before_nested(view: View):  # height 5
 
     # Clear 'amber'.
     view.clear(at='lime amber')
+
+
+# ## Append data
+# Use `view.append()` to add points to the `data` of an existing graphics box, without sending the points
+# already displayed. This is useful for live charts that are updated periodically, typically with `read=False`.
+#
+# Set `window=` to keep only that many of the most recent points.
+def edit_append(view: View):  # height 2
+    view(box(mode='g-line-y', style='w-64 h-16 fill-indigo-100 stroke-indigo-700', data=[.5, .3], name='chart'))
+
+    # Append 3 points to `chart`:
+    view.append([.6, .4, .7], at='chart')
+
+    # Append 2 points to `chart`, keeping the last 4 points:
+    view.append([.2, .8], at='chart', window=4)
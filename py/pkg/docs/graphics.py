@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import random
+from array import array
 
 from h2o_nitro import View, box, row, col, option, lorem
 import h2o_nitro.graphics
@@ -194,6 +195,33 @@ def graphics_line(view: View):  # height 3
     ))
 
 
+# ## Binary data
+# For long series, set `data=` to an `array.array`, a `memoryview` or a NumPy array instead of a list.
+#
+# Floating point arrays are sent to the browser as packed 32-bit floats, which take about half as many bytes as a
+# list of numbers, and need no decoding.
+def graphics_binary(view: View):  # height 2
+    data = array('f', h2o_nitro.graphics.random_walk(1000))
+    view(box(mode='g-line-y', style='w-64 h-16 fill-indigo-100 stroke-indigo-700', data=data))
+
+
+# ## Downsampling
+# A chart can only show as many points as it is wide, in pixels.
+# To send long series to the browser in a fraction of the bytes, wrap `data=` in `h2o_nitro.graphics.downsample()`,
+# which reduces the series to about as many points as requested, preserving its shape, right before it is sent.
+#
+# The default method, `lttb`, keeps the most prominent point in each bucket of points.
+# `minmax` keeps the lowest and highest points in each bucket, and never loses peaks.
+def graphics_downsample(view: View):  # height 2
+    data = h2o_nitro.graphics.random_walk(100_000)
+    view(col(
+        box(mode='g-line-y', style='w-64 h-16 fill-indigo-100 stroke-indigo-700',
+            data=h2o_nitro.graphics.downsample(data, 256)),
+        box(mode='g-line-y', style='w-64 h-16 fill-indigo-100 stroke-indigo-700',
+            data=h2o_nitro.graphics.downsample(data, 256, 'minmax')),
+    ))
+
+
 # ## Curve
 # Set `mode='g-curve-x'` or `mode='g-curve-y'` to draw line and area curves.
 #
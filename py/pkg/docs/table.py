@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from h2o_nitro import View, box, row, col, option, header, lorem
+import sqlite3
+from array import array
+from h2o_nitro import View, box, row, col, option, header, lorem, Query, Page, ListSource, SQLiteSource
 
 
 # # Table
@@ -335,3 +337,105 @@ def table_live(view: View):  # height 5
             ),
             f'You chose {choice}.'
         )
+
+
+# ## Use columns
+# Set `columns=` to supply cell values column by column instead of row by row.
+# `columns` can be a list of columns, or a dictionary of column names to columns, in which case
+# headers are created automatically.
+#
+# Each column can be a list, an `array.array`, a `memoryview` or a NumPy array.
+# Numeric columns are sent to the browser as packed binary arrays, which is much more compact than lists for large tables.
+def table_columns(view: View):  # height 4
+    view(box(
+        mode='table',
+        columns=dict(
+            Flavor=['Cinnamon Sugar', 'Powdered Sugar', 'Vanilla', 'Chocolate', 'Blueberry'],
+            Price=array('d', [1.99, 1.99, 2.99, 2.99, 2.99]),
+            Calories=array('i', [210, 190, 240, 260, 230]),
+        ),
+    ))
+
+
+# ## Fetch rows on demand
+# Set `source=` to a function to fetch rows from the server one page at a time, instead of sending all rows upfront.
+# This is useful for large tables: only the rows being displayed are ever sent to the browser.
+#
+# The function is called with a `Query`, which holds the `offset` and `limit` of the rows to fetch,
+# the index of the column to `sort` by (if any), and whether to sort in descending order (`desc`).
+# It must return a `Page` holding the `total` number of rows, and the rows themselves.
+#
+# Set `lines=` to change the number of rows per page (50 by default).
+def table_source(view: View):  # height 6
+    flavors = [(f'Flavor #{i}', i % 7 + 0.99, i * 10 % 600) for i in range(10000)]
+
+    def fetch(q: Query):
+        rows = flavors if q.sort is None else sorted(flavors, key=lambda r: r[q.sort], reverse=q.desc)
+        return Page(len(rows), rows[q.offset:q.offset + q.limit])
+
+    view(box(
+        headers=[header('Flavor'), header('Price'), header('Calories')],
+        source=fetch,
+        lines=5,
+    ))
+
+
+# ## Search rows on demand
+# Add `search` to `mode` to show a search box above a table that has a `source`.
+# The text entered is passed to the source in `Query.filter`.
+#
+# Rows can be returned as options to set their keys, which are returned as the table's value when selected.
+def table_source_search(view: View):  # height 7
+    flavors = [f'Flavor #{i}' for i in range(10000)]
+
+    def fetch(q: Query):
+        rows = [f for f in flavors if q.filter in f] if q.filter else flavors
+        return Page(len(rows), [option(f, options=[f]) for f in rows[q.offset:q.offset + q.limit]])
+
+    choice = view(box(
+        mode='search multi table',
+        headers=[header('Flavor')],
+        source=fetch,
+        lines=5,
+    ))
+    view(f'You chose {choice}.')
+
+
+# ## Use a built-in source
+# Instead of writing a source function, use one of the built-in sources, which sort, search and page rows for you:
+#
+# - `ListSource(rows)` for a list of rows.
+# - `ArraySource(columns)` for a list or dictionary of columns, using NumPy to sort and search them.
+# - `SQLiteSource(connection, table, columns)` for a table in a SQLite database.
+#
+# Each accepts optional row keys (for `SQLiteSource`, a `key` column, the `rowid` by default).
+def table_source_builtin(view: View):  # height 7
+    db = sqlite3.connect(':memory:')
+    db.execute('create table flavors (name text, price real, calories int)')
+    db.executemany('insert into flavors values (?, ?, ?)', [
+        (f'Flavor #{i}', i % 7 + 0.99, i * 10 % 600) for i in range(10000)
+    ])
+
+    view(box(
+        mode='search table',
+        headers=[header('Flavor'), header('Price'), header('Calories')],
+        source=SQLiteSource(db, 'flavors', ['name', 'price', 'calories']),
+        lines=5,
+    ))
+
+
+# ## Sort and search on the server
+# If a table has both rows and a `source`, its rows are sorted and searched by the source instead of the browser.
+# The source is only asked for the keys of the matching rows, in order.
+#
+# This is useful if rows are quick to send, but slow to sort or search in the browser,
+# or if they are sorted or searched differently on the server.
+def table_source_keys(view: View):  # height 5
+    flavors = [(f'Flavor #{i}', i % 7 + 0.99, i * 10 % 600) for i in range(1000)]
+
+    view(box(
+        mode='search table',
+        headers=[header('Flavor'), header('Price'), header('Calories')],
+        options=[option(i, options=[str(x) for x in f]) for i, f in enumerate(flavors)],
+        source=ListSource(flavors),
+    ))
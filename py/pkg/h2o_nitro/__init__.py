@@ -13,7 +13,18 @@
 # limitations under the License.
 
 from .core import View, AsyncView, Box, Option, Theme, box, option, header, row, col, link, ProtocolError, \
-    ContextSwitchError, RemoteError, Plugin, Script, Duplex
+    ContextSwitchError, RemoteError, Plugin, Script, Duplex, SyncDuplex, Query, Page, Metrics, Tracer, \
+    Profiler
+
+from .metrics import PrometheusMetrics
+
+from .tracing import TraceFile
+
+from .profiling import SessionProfiler
+
+from .executor import SessionExecutor
+
+from .sources import ListSource, ArraySource, SQLiteSource
 
 from .fake import lorem
 
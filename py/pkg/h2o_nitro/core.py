@@ -11,40 +11,41 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import array
 import asyncio
 import collections
+import inspect
+import itertools
+import queue
+import re
+import sys
+import threading
+import time
 import traceback
 import urllib.parse
+import weakref
+import zlib
 from collections import OrderedDict
-from enum import IntEnum
+from enum import Enum, IntEnum
+from operator import attrgetter
 from types import FunctionType
-from typing import Callable, Optional, Sequence, Set, Tuple, List, Dict, Union, Iterable
+from typing import Any, Callable, Optional, Sequence, Set, Tuple, List, Dict, Union, Iterable, get_type_hints
 
 from .version import __version__
 
 # noinspection PyBroadException
 try:
     import msgpack
+except:
+    msgpack = None
 
-
-    def _marshal(d: dict):
-        return msgpack.packb(d)
-
-
-    def _unmarshal(b) -> dict:
-        return msgpack.unpackb(b)
-
+# noinspection PyBroadException
+try:
+    import orjson
 except:
+    orjson = None
     import json
 
-
-    def _marshal(d: dict):
-        return json.dumps(d)
-
-
-    def _unmarshal(b) -> dict:
-        return json.loads(b)
-
 __xid = 0
 
 
@@ -65,6 +66,10 @@ class _MsgType(IntEnum):
     Input = 4
     Output = 5
     Set = 6
+    Patch = 7
+    Query = 8
+    Page = 9
+    Load = 10
 
 
 _primitive = (bool, int, float, str)
@@ -99,15 +104,136 @@ def _dump(x):  # recursive
         return _dump([(k, v) for k, v in x.items()])
     if isinstance(x, (tuple, list, set)):
         return [_dump(e) for e in x]
+    if _is_array(x):  # packed by _marshal()
+        return _as_array(x)
     if callable(getattr(x, 'dump', None)):
         return x.dump()
     return x
 
 
+def _is_array(x) -> bool:
+    return isinstance(x, (array.array, memoryview)) or hasattr(x, '__array_interface__')
+
+
+def _as_array(x):
+    # msgpack packs memoryviews as raw bytes; convert to array.array to preserve the element type.
+    return array.array(x.format.lstrip('@=<>!'), x.tobytes()) if isinstance(x, memoryview) else x
+
+
+def _as_series(x):
+    # Graphics data: send floating point arrays as float32, which is plenty to draw with, at half the size.
+    # Multi-dimensional NumPy arrays (e.g. pairs) are sent as nested lists, since packed arrays are flat.
+    if isinstance(x, memoryview):
+        x = _as_array(x)
+    if isinstance(x, array.array):
+        return array.array('f', x) if x.typecode == 'd' else x
+    dt = getattr(x, 'dtype', None)
+    if dt is not None and hasattr(x, '__array_interface__'):  # NumPy
+        if x.ndim > 1:
+            return x.tolist()
+        if dt.kind == 'f' and dt.itemsize > 4:
+            return x.astype('<f4')
+    return x
+
+
+def _source_key(source: Optional['Source']) -> Optional[str]:
+    # The key of a source, in the view marshaling the box on this thread; see _View._marshal_output().
+    if source is None or isinstance(source, str):
+        return source
+    sources = getattr(_local, 'sources', None)
+    return sources.key_of(source) if sources else None
+
+
 def _clean(d: dict) -> dict:
     return {k: v for k, v in d.items() if v is not None}
 
 
+class _PatchType(IntEnum):
+    Insert = 1
+    Replace = 2
+    Remove = 3
+    Set = 4
+
+
+def _same(a, b) -> bool:  # recursive
+    if isinstance(a, dict):
+        if not isinstance(b, dict) or len(a) != len(b):
+            return False
+        for k, v in a.items():
+            if k not in b or not _same(v, b[k]):
+                return False
+        return True
+    if isinstance(a, (tuple, list)):
+        if not isinstance(b, (tuple, list)) or len(a) != len(b):
+            return False
+        for x, y in zip(a, b):
+            if not _same(x, y):
+                return False
+        return True
+    return type(a) is type(b) and a == b
+
+
+def _same_box(a, b) -> bool:  # recursive; ignores the xids of boxes, which change on every render
+    if not (isinstance(a, dict) and isinstance(b, dict)):
+        return _same(a, b)
+    if len(a) != len(b):
+        return False
+    for k, v in a.items():
+        if k not in b:
+            return False
+        if k == 'xid':
+            continue
+        w = b[k]
+        if k == 'items' and isinstance(v, list) and isinstance(w, list):
+            if len(v) != len(w):
+                return False
+            for x, y in zip(v, w):
+                if not _same_box(x, y):
+                    return False
+        elif not _same(v, w):
+            return False
+    return True
+
+
+def _diff(a: dict, b: dict, path: List[int], ops: list):  # recursive
+    attrs = {}
+    for k, v in b.items():
+        if k != 'xid' and k != 'items' and not _same(a.get(k), v):
+            attrs[k] = v
+    for k in a.keys():
+        if k not in b:
+            attrs[k] = None  # unset
+    xs, ys = a.get('items'), b.get('items')
+    if xs is None or ys is None:
+        if xs is not ys:
+            attrs['items'] = ys
+    if attrs:
+        ops.append([_PatchType.Set, path, attrs])
+    if xs is not None and ys is not None:
+        _diff_items(xs, ys, path, ops)
+
+
+def _diff_items(xs: list, ys: list, path: List[int], ops: list):
+    m, n = len(xs), len(ys)
+    if m != n:  # skip common suffix, so that inserts and removes in the middle don't cascade.
+        k = min(m, n)
+        j = 0
+        while j < k and _same_box(xs[m - 1 - j], ys[n - 1 - j]):
+            j += 1
+        m, n = m - j, n - j
+    k = min(m, n)
+    for i in range(k):
+        x, y = xs[i], ys[i]
+        if isinstance(x, dict) and isinstance(y, dict):
+            _diff(x, y, path + [i], ops)
+        elif not _same_box(x, y):
+            ops.append([_PatchType.Replace, path + [i], y])
+    for i in range(m - 1, k - 1, -1):
+        ops.append([_PatchType.Remove, path + [i]])
+    for i in range(k, n):
+        ops.append([_PatchType.Insert, path + [i], ys[i]])
+
+
 N = Union[int, float]
 V = Union[N, str]
 P = Union[str, int, float, bool]
@@ -127,6 +253,8 @@ Sizing = Union[
 
 
 class Header:
+    __slots__ = ('text', 'mode', 'style', 'icon')
+
     def __init__(
             self,
             text: str,
@@ -156,11 +284,65 @@ Headers = Union[
     Set[Header],
 ]
 
+# A column is a sequence of values, or a typed array (array.array, memoryview, NumPy array) of numbers.
+Column = Union[Sequence[Primitive], Any]
+Columns = Union[Sequence[Column], Dict[str, Column]]
+
 Delegate = Union[V, Callable]
 
 
+_addresses: 'weakref.WeakKeyDictionary[FunctionType, str]' = weakref.WeakKeyDictionary()  # function => address
+
+
 def _address_of(delegate: Delegate) -> str:
-    return f'#!{urllib.parse.quote(_qual_name_of(delegate))}' if isinstance(delegate, FunctionType) else str(delegate)
+    if isinstance(delegate, FunctionType):
+        a = _addresses.get(delegate)
+        if a is None:
+            a = _addresses[delegate] = f'#!{urllib.parse.quote(_qual_name_of(delegate))}'
+        return a
+    return str(delegate)
+
+
+# Scanning.
+#
+# Delegator.scan() skips boxes and options stamped with the current scan generation: those found, when constructed or
+# last scanned, to have nothing below them to register. Assigning the link, source, items or options of a box, or the
+# value or options of an option, starts a new generation, which unstamps every box and option at once, since the
+# ancestors of the one changed are unknown. Lists, sets and dicts can also be changed in place, without assignment,
+# so boxes and options holding them are never stamped; only tuples, like the items of a box, are trusted.
+
+_generations = itertools.count(1)
+_generation = 0
+
+
+def _tracked(name: str) -> property:
+    # An attribute, stored in slot name, whose assignment starts a new scan generation.
+    def set_tracked(self, value):
+        global _generation
+        setattr(self, name, value)
+        _generation = next(_generations)
+
+    return property(attrgetter(name), set_tracked)
+
+
+def _unstamped_state(self):
+    # State to pickle or copy: slots, but not the stamp, which holds only for this process's generations.
+    slots = {k: getattr(self, k) for k in self.__slots__}
+    slots['_scanned'] = None
+    return None, slots
+
+
+def _settled(xs, g: int) -> bool:
+    # True if xs cannot change in place, and holds no box or option with anything to register as of generation g.
+    if xs is None or xs.__class__ is str:
+        return True
+    if xs.__class__ is not tuple:
+        return False
+    scanned = (Box, Option)
+    for x in xs:
+        if x.__class__ not in _scalars and isinstance(x, scanned) and x._scanned != g:
+            return False
+    return True
 
 
 def link(delegate: Delegate, **kwargs) -> str:
@@ -172,6 +354,14 @@ def link(delegate: Delegate, **kwargs) -> str:
 
 
 class Option:
+    __slots__ = (
+        '_value', 'text', 'name', 'icon', 'caption', 'hotkey', 'selected', 'disabled', '_options', 'route', '_scanned',
+    )
+
+    value = _tracked('_value')
+    options = _tracked('_options')
+    __getstate__ = _unstamped_state
+
     def __init__(
             self,
             value: Delegate,
@@ -183,8 +373,9 @@ class Option:
             selected: Optional[bool] = None,
             disabled: Optional[bool] = None,
             options: Optional['Options'] = None,
+            route: Optional[str] = None,
     ):
-        self.value = value
+        self._value = value
         self.text = text
         self.name = name
         self.icon = icon
@@ -192,11 +383,15 @@ class Option:
         self.hotkey = hotkey
         self.selected = selected
         self.disabled = disabled
-        self.options = options
+        self._options = options
+        self.route = route  # Path pattern also leading to the delegate, like "orders/{id:int}"; not sent.
+        # Scan generation as of which this option and its sub-options have no delegates to register, if any.
+        g = _generation
+        self._scanned = g if not isinstance(value, FunctionType) and _settled(options, g) else None
 
     def dump(self) -> dict:
         return _clean(dict(
-            value=self.value,
+            value=self._value,
             text=self.text,
             name=self.name,
             icon=self.icon,
@@ -204,7 +399,7 @@ class Option:
             hotkey=self.hotkey,
             selected=self.selected,
             disabled=self.disabled,
-            options=_dump(self.options),
+            options=_dump(self._options),
         ))
 
 
@@ -300,15 +495,17 @@ class Translation:
 
 
 class Resources:
-    def __init__(self, locale: str, translations: Sequence[Translation]):
+    def __init__(self, locale: str, translations: Sequence[Translation], locales: Optional[Sequence[str]] = None):
         self.locale = locale
         self.translations = translations
+        self.locales = locales  # All locales available, including those not sent.
 
     def dump(self) -> dict:
-        return dict(
+        return _clean(dict(
             locale=self.locale,
             translations=_dump(self.translations),
-        )
+            locales=_dump(self.locales),
+        ))
 
 
 class Plugin:
@@ -323,7 +520,81 @@ class Plugin:
         )
 
 
+class Query:  # A request for a page of rows from a table's data source.
+    __slots__ = ('offset', 'limit', 'sort', 'desc', 'filter', 'keys_only')
+
+    def __init__(
+            self,
+            offset: int = 0,
+            limit: int = 0,
+            sort: Optional[int] = None,
+            desc: bool = False,
+            filter: Optional[str] = None,
+            keys_only: bool = False,
+    ):
+        self.offset = offset  # Index of the first row.
+        self.limit = limit  # Maximum number of rows.
+        self.sort = sort  # Index of the column to sort by, if any.
+        self.desc = desc  # True if sorted in descending order.
+        self.filter = filter  # Search text entered by the user, if any.
+        self.keys_only = keys_only  # True if only the keys of the rows are needed; the client already has the rows.
+
+
+class Page:  # A page of rows returned by a table's data source.
+    __slots__ = ('total', 'rows', 'columns', 'keys')
+
+    def __init__(
+            self,
+            total: int,
+            rows: Optional[Sequence[Union[Option, Sequence[Primitive]]]] = None,
+            columns: Optional[Columns] = None,
+            keys: Optional[Sequence[V]] = None,
+    ):
+        self.total = total  # Total number of matching rows.
+        self.rows = rows  # Rows, each either an option(key, options=[cells]), or a sequence of cells.
+        self.columns = columns  # Alternatively, the rows' cells, column by column.
+        self.keys = keys  # Row keys, if not options; defaults to row indices.
+
+    def dump(self) -> dict:
+        keys, columns = self.keys, self.columns
+        if self.rows is not None:
+            keys, columns = _transpose(self.rows, keys)
+        elif isinstance(columns, dict):
+            columns = list(columns.values())
+        return _clean(dict(total=self.total, keys=_dump(keys), columns=_dump(columns)))
+
+
+def _transpose(rows: Sequence[Union[Option, Sequence[Primitive]]], keys: Optional[Sequence[V]]):
+    cells = []
+    if rows and isinstance(rows[0], Option):
+        keys = [r.value for r in rows]
+        for r in rows:
+            cells.append([c.text if isinstance(c, Option) else c for c in r.options] if r.options else [])
+    else:
+        cells = rows
+    n = max((len(c) for c in cells), default=0)
+    columns = [[c[j] if j < len(c) else None for c in cells] for j in range(n)]
+    return keys, columns
+
+
+# A table's data source returns a page of rows for a query, either as a Page, or as a (total, rows) pair.
+Source = Callable[[Query], Union[Page, Tuple[int, Sequence]]]
+
+
 class Box:
+    __slots__ = (
+        'xid', 'name', 'mode', 'value', '_options', 'headers', 'columns', '_source', '_items', 'data', 'halt', 'title',
+        'caption', 'hint', 'help', 'locale', 'hotkey', 'popup', 'style', 'disabled', 'image', 'icon', 'min', 'max',
+        'step', 'precision', 'range', 'mask', 'prefix', 'suffix', 'placeholder', '_link', 'error', 'lines', 'ignore',
+        '_scanned',
+    )
+
+    options = _tracked('_options')
+    source = _tracked('_source')
+    items = _tracked('_items')
+    link = _tracked('_link')
+    __getstate__ = _unstamped_state
+
     # noinspection PyShadowingBuiltins
     def __init__(
             self,
@@ -333,6 +604,8 @@ class Box:
             value: Optional[Value] = None,
             options: Optional[Options] = None,
             headers: Optional[Headers] = None,
+            columns: Optional[Columns] = None,
+            source: Optional[Source] = None,
             data: Optional[Data] = None,
             halt: Optional[bool] = None,
             title: Optional[str] = None,
@@ -360,13 +633,19 @@ class Box:
             lines: Optional[int] = None,
             ignore: Optional[bool] = None,
     ):
+        if isinstance(columns, dict):
+            if headers is None:
+                headers = [Header(str(k)) for k in columns.keys()]
+            columns = list(columns.values())
         self.xid = _xid()
         self.name = name
         self.mode = mode
         self.value = value
-        self.options = options
+        self._options = options
         self.headers = headers
-        self.items = items
+        self.columns = columns
+        self._source = source
+        self._items = items
         self.data = data
         self.halt = halt
         self.title = title
@@ -389,10 +668,14 @@ class Box:
         self.prefix = prefix
         self.suffix = suffix
         self.placeholder = placeholder
-        self.link = link
+        self._link = link
         self.error = error
         self.lines = lines
         self.ignore = ignore
+        # Scan generation as of which this box and its descendants have no delegates or sources to register, if any.
+        g = _generation
+        self._scanned = g if source is None and not isinstance(link, FunctionType) and _settled(items, g) and \
+            _settled(options, g) else None
 
     def __call__(
             self,
@@ -402,6 +685,8 @@ class Box:
             value: Optional[Value] = None,
             options: Optional[Options] = None,
             headers: Optional[Headers] = None,
+            columns: Optional[Columns] = None,
+            source: Optional[Source] = None,
             data: Optional[Data] = None,
             halt: Optional[bool] = None,
             title: Optional[str] = None,
@@ -436,6 +721,8 @@ class Box:
             value=self.value if value is None else value,
             options=self.options if options is None else options,
             headers=self.headers if headers is None else headers,
+            columns=self.columns if columns is None else columns,
+            source=self.source if source is None else source,
             data=self.data if data is None else data,
             halt=self.halt if halt is None else halt,
             title=self.title if title is None else title,
@@ -472,6 +759,8 @@ class Box:
             value=self.value,
             options=self.options,
             headers=self.headers,
+            columns=self.columns,
+            source=self.source,
             data=self.data,
             halt=self.halt,
             title=self.title,
@@ -511,10 +800,12 @@ class Box:
             name=self.name,
             mode=self.mode,
             value=self.value,
-            options=_dump(self.options),
+            options=_dump(self._options),
             headers=_dump(self.headers),
-            items=_dump(self.items),
-            data=_dump(self.data),
+            columns=_dump(self.columns),
+            source=_source_key(self._source),
+            items=_dump(self._items),
+            data=_dump(_as_series(self.data)),
             halt=self.halt,
             title=self.title,
             caption=self.caption,
@@ -536,7 +827,7 @@ class Box:
             prefix=self.prefix,
             suffix=self.suffix,
             placeholder=self.placeholder,
-            link=self.link,
+            link=self._link,
             error=self.error,
             lines=self.lines,
             ignore=self.ignore,
@@ -582,6 +873,295 @@ def col(
     )
 
 
+# Serializer fast path.
+#
+# Writes boxes straight into a msgpack packer, without building intermediate dicts, and without recursion.
+# The output must be exactly the same as that of _marshal(b.dump()):
+#   - Box, Option: fields in dump() order, skipping None.
+#   - Fields passed through _dump() in dump(): tuple, list, set and OrderedDict are expanded, and nested
+#     objects are dumped; all other fields are packed as-is.
+
+_scalars = frozenset((str, int, float, bool))
+
+
+class _Raw:  # Value to be packed as-is, without _dump().
+    __slots__ = ('x',)
+
+    def __init__(self, x):
+        self.x = x
+
+
+def _compile_writer(
+        keys: Tuple[str, ...],
+        dumped: Set[str],
+        converters: Optional[Dict[str, Callable]] = None,  # field => function applied before _dump(); may return None
+        slots: Optional[Dict[str, str]] = None,  # field => attribute to read it from, if named differently
+) -> Callable:
+    # Generate an unrolled writer that pushes fields in reverse order, so that they are popped in dump() order.
+    converters = converters or {}
+    n = len(keys)
+    lines = [
+        'def write(p, x, push):',
+        f'    {", ".join(f"v{i}" for i in range(n))}, = values(x)',
+        '    n = 0',
+    ]
+    for i in range(n - 1, -1, -1):
+        k = keys[i]
+        v = f'v{i}'
+        if k in converters:
+            lines.append(f'    {v} = convert_{k}({v})')
+        lines += [
+            f'    if v{i} is not None:',
+            '        n += 1',
+            f'        push({v})' if k in dumped else f'        push({v} if type({v}) in scalars else Raw({v}))',
+            f'        push({k!r})',
+        ]
+    lines.append('    p.pack_map_header(n)')
+    slots = slots or {}
+    scope = dict(values=attrgetter(*(slots.get(k, k) for k in keys)), scalars=_scalars, Raw=_Raw)
+    scope.update({f'convert_{k}': f for k, f in converters.items()})
+    exec('\n'.join(lines), scope)
+    return scope['write']
+
+
+def _write_seq(p, x, push):
+    for e in x:
+        if type(e) not in _scalars:
+            break
+    else:  # Flat: pack in one go.
+        p.pack(x)
+        return
+    p.pack_array_header(len(x))
+    for i in range(len(x) - 1, -1, -1):
+        push(x[i])
+
+
+def _write_set(p, x, push):
+    _write_seq(p, list(x), push)
+
+
+def _write_ordered_dict(p, x, push):
+    _write_seq(p, [[k, v] for k, v in x.items()], push)
+
+
+def _write_raw(p, x, push):
+    p.pack(x.x)
+
+
+def _write_dumpable(p, x, push):
+    p.pack(x.dump())
+
+
+_writers = {
+    Box: _compile_writer(
+        ('xid', 'name', 'mode', 'value', 'options', 'headers', 'columns', 'source', 'items', 'data', 'halt', 'title',
+         'caption', 'hint', 'help', 'locale', 'hotkey', 'popup', 'style', 'disabled', 'image', 'icon', 'min', 'max',
+         'step', 'precision', 'range', 'mask', 'prefix', 'suffix', 'placeholder', 'link', 'error', 'lines', 'ignore'),
+        {'options', 'headers', 'columns', 'items', 'data'},
+        dict(data=_as_series, source=_source_key),
+        dict(options='_options', source='_source', items='_items', link='_link'),
+    ),
+    Option: _compile_writer(
+        ('value', 'text', 'name', 'icon', 'caption', 'hotkey', 'selected', 'disabled', 'options'),
+        {'options'},
+        slots=dict(value='_value', options='_options'),
+    ),
+    Header: _write_dumpable,
+    tuple: _write_seq,
+    list: _write_seq,
+    set: _write_set,
+    OrderedDict: _write_ordered_dict,
+    _Raw: _write_raw,
+}
+
+
+def _write(p, x):
+    stack = [x]
+    pop, push, pack, writer_of = stack.pop, stack.append, p.pack, _writers.get
+    while stack:
+        x = pop()
+        t = type(x)
+        if t in _scalars:
+            pack(x)
+            continue
+        write = writer_of(t)
+        if write:
+            write(p, x, push)
+        elif isinstance(x, OrderedDict):
+            _write_ordered_dict(p, x, push)
+        elif isinstance(x, (tuple, list, set)):
+            _write_set(p, x, push)
+        elif _is_array(x):
+            pack(_as_array(x))
+        elif callable(getattr(x, 'dump', None)):
+            _write_dumpable(p, x, push)
+        else:
+            pack(x)
+
+
+# Typed arrays.
+#
+# Numeric array.array and NumPy arrays (and memoryviews, via _as_array()) are packed as {dtype, buffer}, where
+# buffer holds the elements in little-endian order, and dtype is one of i8, u8, i16, u16, i32, u32, f32, f64.
+# The client decodes them into the corresponding JavaScript typed arrays. 64-bit integers are sent as f64.
+# With JSON, arrays are sent as lists.
+
+_array_dtypes = {
+    ('i', 1): 'i8', ('u', 1): 'u8', ('b', 1): 'u8',
+    ('i', 2): 'i16', ('u', 2): 'u16',
+    ('i', 4): 'i32', ('u', 4): 'u32',
+    ('f', 4): 'f32', ('f', 8): 'f64',
+}
+_array_typecodes = dict(b='i', B='u', h='i', H='u', i='i', I='u', l='i', L='u', q='i', Q='u', f='f', d='f')
+
+
+def _pack_array(x):
+    if isinstance(x, array.array):
+        kind = _array_typecodes.get(x.typecode)
+        if kind is None:
+            raise TypeError(f'cannot serialize array of type {x.typecode!r}')
+        dtype = _array_dtypes.get((kind, x.itemsize))
+        if dtype is None:  # 64-bit integers
+            x, dtype = array.array('d', x), 'f64'
+        if sys.byteorder == 'big':
+            x = array.array(x.typecode, x)
+            x.byteswap()
+        return dict(dtype=dtype, buffer=x.tobytes())
+    dt = getattr(x, 'dtype', None)
+    if dt is not None and callable(getattr(x, 'astype', None)):  # NumPy
+        if x.ndim == 0:
+            return x.item()
+        dtype = _array_dtypes.get((dt.kind, dt.itemsize))
+        if dtype is None:
+            if dt.kind not in 'iuf':
+                return x.tolist()
+            x, dtype = x.astype('<f8'), 'f64'
+        else:
+            x = x.astype(f'<{"u" if dt.kind == "b" else dt.kind}{dt.itemsize}', copy=False)
+        return dict(dtype=dtype, buffer=x.tobytes())
+    raise TypeError(f'cannot serialize object of type {type(x)}')
+
+
+def _list_array(x):
+    if callable(getattr(x, 'tolist', None)):
+        return x.tolist()
+    raise TypeError(f'Object of type {type(x).__name__} is not JSON serializable')
+
+
+# Codecs.
+#
+# A codec encodes messages in one wire format. The fastest available implementation of each format is picked at
+# import time: msgpack, if installed, and JSON, using orjson if installed, else the standard library.
+# Clients list the codecs they accept in Join (client.codecs), most preferred first; each view then gets its own
+# codec instance, so that codecs can keep per-session state, like a reusable packer. Without a match, the first
+# registered codec is used.
+#
+# Incoming messages are decoded in whatever format they arrive in: JSON messages are strings, or bytes starting with
+# '{'. A msgpack message always starts with a map header, never with 0x7b, which would be a positive integer.
+
+class _Codec:
+    name = ''
+
+    def marshal(self, d: dict):
+        raise NotImplementedError
+
+    def marshal_output(self, b: 'Box', edit: Optional['Edit']):
+        return self.marshal(_clean(dict(t=_MsgType.Output, box=b.dump(), edit=edit.dump() if edit else None)))
+
+
+class _MsgpackCodec(_Codec):
+    name = 'msgpack'
+
+    def __init__(self):
+        # Reset, instead of re-allocated, after every message: saves a packer per message and keeps its buffer.
+        # Start small (the default is 256KB per session); the buffer grows as needed.
+        self._packer = msgpack.Packer(autoreset=False, default=_pack_array, buf_size=4096)
+
+    def marshal(self, d: dict):
+        p = self._packer
+        try:
+            p.pack(d)
+            return p.bytes()
+        finally:
+            p.reset()
+
+    def marshal_output(self, b: 'Box', edit: Optional['Edit']):
+        p = self._packer
+        try:
+            p.pack_map_header(2 if edit is None else 3)
+            p.pack('t')
+            p.pack(_MsgType.Output)
+            p.pack('box')
+            _write(p, b)
+            if edit is not None:
+                p.pack('edit')
+                p.pack(edit.dump())
+            return p.bytes()
+        finally:
+            p.reset()
+
+
+class _JSONCodec(_Codec):
+    name = 'json'
+
+    def marshal(self, d: dict):
+        # Strings, not bytes: Duplex hands messages to the browser as-is.
+        if orjson:
+            return orjson.dumps(
+                d,
+                default=_list_array,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            ).decode()
+        return json.dumps(d, default=_list_array)
+
+
+_codecs: Dict[str, Callable[[], _Codec]] = OrderedDict()  # name => factory, most preferred first
+if msgpack:
+    _codecs[_MsgpackCodec.name] = _MsgpackCodec
+_codecs[_JSONCodec.name] = _JSONCodec
+
+
+def _codec_of(names: Optional[Sequence[str]]) -> _Codec:
+    if names:
+        for name in names:
+            f = _codecs.get(name)
+            if f:
+                return f()
+    return next(iter(_codecs.values()))()
+
+
+def _is_json(b) -> bool:
+    return isinstance(b, str) or b[:1] == b'{'
+
+
+_local = threading.local()
+
+
+def _default_codec() -> _Codec:  # Codecs are stateful; keep one per thread.
+    c = getattr(_local, 'codec', None)
+    if c is None:
+        c = _local.codec = _codec_of(None)
+    return c
+
+
+def _marshal(d: dict, codec: Optional[_Codec] = None):
+    return (codec or _default_codec()).marshal(d)
+
+
+def _marshal_output(b: 'Box', edit: Optional['Edit'], codec: Optional[_Codec] = None):
+    return (codec or _default_codec()).marshal_output(b, edit)
+
+
+def _unmarshal(b, strict: bool = True) -> dict:
+    # Messages from clients are decoded strictly: map keys must be strings. Messages from views are not, since boxes
+    # may have options keyed by numbers, like {1: 'One', 2: 'Two'}.
+    if _is_json(b):
+        return orjson.loads(b) if orjson else json.loads(b)
+    if msgpack is None:
+        raise ProtocolError(400, 'cannot decode message: msgpack is not installed')
+    return msgpack.unpackb(b, strict_map_key=strict)
+
+
 def _interpret(msg, expected_type: int):
     if isinstance(msg, dict):
         t = msg.get('t')
@@ -612,12 +1192,11 @@ def _interpret(msg, expected_type: int):
                 return tuple([_unwrap_input(e) for e in inputs])
 
         if t == _MsgType.Join:
-            client = msg.get('client')
-            locale = client.get('locale') if client else None
+            client = msg.get('client') or {}
             method = msg.get('method')
             params = msg.get('params')
             mode = params.get('mode') if params else None
-            return method, mode, locale
+            return method, mode, client
 
         raise ProtocolError(400, f'unknown message type {t}')
     raise ProtocolError(400, f'unknown message format: want dict, got {type(msg)}')
@@ -627,11 +1206,12 @@ def _unwrap_input(x):
     return None if x is None else x[1]
 
 
-def _marshal_error(code: int, text: str, trace: Optional[str] = None):
-    return _marshal(_clean(dict(t=_MsgType.Error, code=code, text=text, trace=trace)))
+def _marshal_error(codec: _Codec, code: int, text: str, trace: Optional[str] = None):
+    return codec.marshal(_clean(dict(t=_MsgType.Error, code=code, text=text, trace=trace)))
 
 
 def _marshal_set(
+        codec: _Codec,
         title: str = None,
         caption: str = None,
         menu: Optional[Sequence[Option]] = None,
@@ -643,7 +1223,7 @@ def _marshal_set(
         resources: Optional[Resources] = None,
         mode: Optional[str] = None,
 ):
-    return _marshal(dict(
+    return codec.marshal(dict(
         t=_MsgType.Set,
         settings=_clean(dict(
             title=title,
@@ -659,8 +1239,8 @@ def _marshal_set(
         ))))
 
 
-def _marshal_switch(method: str, params: Optional[dict]):
-    return _marshal(_clean(dict(
+def _marshal_switch(codec: _Codec, method: str, params: Optional[dict]):
+    return codec.marshal(_clean(dict(
         t=_MsgType.Switch,
         method=method,
         params=_clean(params),
@@ -679,9 +1259,23 @@ def _lookup_resources(
     return None
 
 
+def _fallbacks_of(locale: str) -> List[str]:  # 'zh-Hant-TW' => ['zh-Hant-TW', 'zh-Hant', 'zh']
+    locales = []
+    while locale:
+        locales.append(locale)
+        locale = locale[:max(0, locale.rfind('-'))]
+    return locales
+
+
+def _translations_of(locale: str, lookup: Optional[Dict[str, Dict[str, str]]]) -> List[Translation]:
+    # Only the locale and its fallbacks; clients load other locales on demand.
+    return [Translation(l, lookup[l]) for l in _fallbacks_of(locale) if l in lookup] if lookup else []
+
+
 def _to_resources(locale: str, lookup: Optional[Dict[str, Dict[str, str]]]):
-    translations = [Translation(l, r) for l, r in lookup.items()] if lookup else None
-    return Resources(locale, translations)
+    if not lookup:
+        return Resources(locale, None)
+    return Resources(locale, _translations_of(locale, lookup), list(lookup.keys()))
 
 
 TranslateLocale = Callable[[str], str]
@@ -696,31 +1290,219 @@ def _translate_locale(translate: LocaleOrTranslate, locale: str) -> str:
     return locale or 'en-US'
 
 
+# Routing.
+#
+# A method (the part of a #! link before "?") names a delegate by its address, or matches the path pattern of a
+# route, declared with option(delegate, route='...') in a view's routes, menu or nav. Patterns are compiled when the
+# view is created, and indexed by their first segment. Segments in braces capture parameters, like
+# "orders/{id:int}/{status}"; a parameter's type is int, float or str, as given, else that of the delegate's
+# annotation for it.
+#
+# The delegate's parameters (from the path and the query string) are then converted to the types of its annotations:
+# int, float, str, or an Enum, matched by value or name. Unknown routes, and unknown, missing or malformed
+# parameters, are rejected before the delegate is invoked.
+
+_route_types: Dict[str, type] = dict(int=int, float=float, str=str)
+
+
+def _converter_of(t) -> Optional[Callable[[str], Any]]:
+    if getattr(t, '__origin__', None) is Union:  # Optional[T]
+        args = [a for a in t.__args__ if a is not type(None)]
+        if len(args) == 1:
+            t = args[0]
+    if t is int or t is float:
+        return t
+    if isinstance(t, type) and issubclass(t, Enum):
+        members = {str(m.value): m for m in t}
+        members.update(t.__members__)
+
+        def convert(v: str):
+            m = members.get(v)
+            if m is None:
+                raise ValueError(f'want one of {", ".join(str(m.value) for m in t)}')
+            return m
+
+        return convert
+    return None
+
+
+class _Params:  # The parameters of a delegate, and how to convert them.
+    __slots__ = ('converters', 'required', 'open')
+
+    def __init__(self, f: FunctionType):
+        try:
+            hints = get_type_hints(f)
+        except Exception:
+            hints = {}
+        self.converters: Dict[str, Optional[Callable]] = {}
+        self.required: Set[str] = set()
+        self.open = False  # True if f accepts **kwargs
+        for i, p in enumerate(inspect.signature(f).parameters.values()):
+            if i == 0:
+                continue  # view
+            if p.kind == p.VAR_KEYWORD:
+                self.open = True
+            elif p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY):
+                self.converters[p.name] = _converter_of(hints.get(p.name, p.annotation))
+                if p.default is p.empty:
+                    self.required.add(p.name)
+
+    def convert(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        converters = self.converters
+        args = {}
+        for k, v in params.items():
+            if k in converters:
+                convert = converters[k]
+                if convert is not None and isinstance(v, str):
+                    try:
+                        v = convert(v)
+                    except ValueError as e:
+                        raise ProtocolError(400, f'Bad parameter "{k}" for "{method}": {e}')
+            elif not self.open:
+                raise ProtocolError(400, f'Unknown parameter "{k}" for "{method}"')
+            args[k] = v
+        for k in self.required:
+            if k not in args:
+                raise ProtocolError(400, f'Missing parameter "{k}" for "{method}"')
+        return args
+
+
+class _Route:
+    __slots__ = ('pattern', 'address', 'segments', 'delegate')
+
+    def __init__(self, pattern: str, delegate: FunctionType):
+        self.pattern = pattern
+        self.address = f'#!{pattern}'  # Labels measurements, so that one series covers every path matched.
+        self.delegate = delegate
+        hints = _Params(delegate).converters
+        # Each segment is a literal string, or a (name, converter) tuple.
+        self.segments: List[Union[str, Tuple[str, Optional[Callable]]]] = []
+        for seg in pattern.strip('/').split('/'):
+            m = re.fullmatch(r'{(\w+)(?::(\w+))?}', seg)
+            if m is None:
+                self.segments.append(seg)
+                continue
+            name, kind = m.groups()
+            if kind is None:
+                self.segments.append((name, hints.get(name)))
+            elif kind in _route_types:
+                self.segments.append((name, _converter_of(_route_types[kind])))
+            else:
+                raise ValueError(f'unknown parameter type {kind!r} in route {pattern!r}: want int, float or str')
+
+    def match(self, parts: List[str]) -> Optional[Dict[str, Any]]:
+        if len(parts) != len(self.segments):
+            return None
+        params = {}
+        for seg, part in zip(self.segments, parts):
+            if isinstance(seg, str):
+                if seg != part:
+                    return None
+                continue
+            name, convert = seg
+            v = urllib.parse.unquote(part)
+            if convert is not None:
+                try:
+                    v = convert(v)
+                except ValueError:
+                    return None  # Try other routes, like "orders/new" after "orders/{id:int}".
+            params[name] = v
+        return params
+
+
 class Delegator:
     def __init__(self):
         self._delegates: Dict[str, FunctionType] = dict()
+        self._params: Dict[FunctionType, _Params] = dict()  # delegate => parameters, compiled on first dispatch
+        self._routes: Dict[str, List[_Route]] = dict()  # first segment ('' if a parameter) => routes, in order
+        self._patterns: Set[str] = set()
 
     def _add(self, f: FunctionType) -> str:
         a = _address_of(f)
         self._delegates[a[2:]] = f
         return a
 
-    def scan(self, b: Box):
-        if isinstance(b, Box):
-            if isinstance(b.link, FunctionType):
-                b.link = self._add(b.link)
-            if b.items:
-                for c in b.items:
-                    self.scan(c)
-            self.scan_opts(b.options)
+    def _add_route(self, pattern: str, f: FunctionType):
+        if pattern in self._patterns:
+            return
+        self._patterns.add(pattern)
+        r = _Route(pattern, f)
+        first = r.segments[0] if isinstance(r.segments[0], str) else ''
+        self._routes.setdefault(first, []).append(r)
+
+    def route(
+            self,
+            method: str,
+            params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Callable, Dict[str, Any], str]:
+        # The delegate for method, its converted parameters, and its address, or the pattern of the route matched, e.g.
+        # "#!orders/{id:int}"; raises ProtocolError if there is no such route.
+        d = self._delegates.get(method)
+        path_params = None
+        if d is not None:
+            address = _address_of(d)
+        elif self._routes:
+            parts = method.strip('/').split('/')
+            routes = self._routes
+            for r in itertools.chain(routes.get(parts[0], ()), routes.get('', ())):
+                path_params = r.match(parts)
+                if path_params is not None:
+                    d, address = r.delegate, r.address
+                    break
+        if d is None:
+            raise ProtocolError(404, f'Delegate not found: "{method}"')
+        if path_params:
+            params = {**params, **path_params} if params else path_params
+        p = self._params.get(d)
+        if p is None:
+            p = self._params[d] = _Params(d)
+        return d, p.convert(method, params or {}) if params or p.required else {}, address
+
+    # Delegates are replaced by their addresses as they are registered (in slots, so as not to start a new scan
+    # generation), and boxes and options with nothing left to register are stamped so, so that rescanning a tree costs
+    # in proportion to its delegates, sources and lists, not its boxes. Boxes with sources are scanned every time:
+    # sources are registered per output.
+
+    def scan(self, b: Box, sources: Optional['_Sources'] = None):
+        g = _generation
+        if isinstance(b, Box) and b._scanned != g:
+            self._scan(b, sources, g)
+
+    def _scan(self, b: Box, sources: Optional['_Sources'], g: int):
+        link = b._link
+        if isinstance(link, FunctionType):
+            b._link = self._add(link)
+        source = b._source
+        if source is not None and sources is not None:
+            sources.add(source)
+        items = b._items
+        if items:
+            for c in items:
+                if isinstance(c, Box) and c._scanned != g:
+                    self._scan(c, sources, g)
+        options = b._options
+        if options:
+            self._scan_opts(options, g)
+        if source is None and _settled(items, g) and _settled(options, g):
+            b._scanned = g
 
     def scan_opts(self, options: Optional[Sequence[Option]] = None):
         if options:
-            for o in options:
-                if isinstance(o, Option):
-                    if isinstance(o.value, FunctionType):
-                        o.value = self._add(o.value)
-                    self.scan_opts(o.options)
+            self._scan_opts(options, _generation)
+
+    def _scan_opts(self, options: Sequence[Option], g: int):
+        for o in options:
+            if isinstance(o, Option) and o._scanned != g:
+                value = o._value
+                if isinstance(value, FunctionType):
+                    if o.route:
+                        self._add_route(o.route, value)
+                    o._value = self._add(value)
+                sub = o._options
+                if sub:
+                    self._scan_opts(sub, g)
+                if _settled(sub, g):
+                    o._scanned = g
 
     def lookup(self, key: str):
         d = self._delegates.get(key)
@@ -729,6 +1511,320 @@ class Delegator:
         return d
 
 
+# Compression.
+#
+# Clients that can inflate messages list the encodings they support in Join (client.compress), most preferred
+# first. Binary messages at least compress_threshold bytes long are then compressed with the first encoding the
+# server supports. Compressed messages are told apart by their first bytes: zlib (0x78) and zstd (0x28 0xb5 0x2f 0xfd)
+# headers are never valid starts of messages, which are always maps.
+
+_compressors: Dict[str, Callable[[bytes], bytes]] = dict(deflate=lambda b: zlib.compress(b, 1))
+
+# noinspection PyBroadException
+try:
+    from compression import zstd  # Python 3.14+
+
+    _compressors['zstd'] = zstd.compress
+except Exception:
+    try:
+        import zstandard
+
+        _compressors['zstd'] = lambda b: zstandard.ZstdCompressor(level=3).compress(b)  # Not thread-safe; don't share.
+    except Exception:
+        pass
+
+
+def _compressor_of(encodings: Optional[Sequence[str]]) -> Optional[Callable[[bytes], bytes]]:
+    if encodings:
+        for e in encodings:
+            c = _compressors.get(e)
+            if c:
+                return c
+    return None
+
+
+def _compressed(send: Callable, compress: Callable[[bytes], bytes], threshold: int) -> Callable:
+    def send_compressed(m):
+        if isinstance(m, bytes) and len(m) >= threshold:
+            z = compress(m)
+            if len(z) < len(m):
+                return send(z)
+        return send(m)
+
+    return send_compressed
+
+
+# Metrics.
+#
+# A view's metrics receive measurements from each of its sessions, on the session's thread or event loop, so they
+# must be quick and must not block. Methods are labeled with the address of the delegate running, like "#!app.main",
+# "" during the handshake, or "unknown" for a method not (yet) routed.
+# The base class discards everything; subclasses record or export measurements, like metrics.PrometheusMetrics.
+# A view without metrics measures nothing.
+
+class Metrics:
+    def session_started(self, view):
+        pass
+
+    def session_ended(self, view):
+        pass
+
+    def message_sent(self, view, method: str, size: int):
+        pass
+
+    def message_received(self, view, method: str, size: int):
+        pass
+
+    def delegate_ran(self, view, method: str, wall: float, cpu: float):
+        # Time spent running a delegate between inputs, in seconds.
+        pass
+
+    def user_waited(self, view, method: str, seconds: float):
+        # Time from a delegate's read to the user's input (or switch).
+        pass
+
+
+def _metered(view: '_View', send: Callable) -> Callable:
+    # Installed under compression, so sizes are as sent.
+    def send_metered(m):
+        view._metrics.message_sent(view, view._method, len(m))
+        return send(m)
+
+    return send_metered
+
+
+# Label for measurements made before a method is routed, or if it cannot be: labels must not come from clients, else
+# any client could create unbounded series.
+_unrouted = 'unknown'
+
+
+def _method_of(delegate: Callable) -> str:
+    if isinstance(delegate, FunctionType):
+        return _address_of(delegate)
+    return f'#!{urllib.parse.quote(_qual_name_of(type(delegate)))}'
+
+
+# Tracing.
+#
+# A view's tracer receives a span for each phase of each interaction, from every session, on the session's thread or
+# event loop. Spans are identified by session (a number unique to the process) and labeled with the address of the
+# delegate running, as with metrics. Times are time.perf_counter() readings, in seconds. The base class discards
+# spans; subclasses export them, like tracing.TraceFile. A view without a tracer traces nothing.
+
+class Tracer:
+    def record(self, session: int, method: str, name: str, start: float, end: float):
+        pass
+
+
+# Profiling.
+#
+# A view's profiler is told when each session's delegate starts or resumes running, and when it pauses to wait for
+# input or returns, on the session's thread or event loop. It decides which sessions to profile, if any, like
+# profiling.SessionProfiler. A view without a profiler profiles nothing.
+
+class Profiler:
+    def started(self, view, method: str):
+        pass
+
+    def paused(self, view, method: str):
+        pass
+
+
+_session_ids = itertools.count(1)
+
+
+def _traced(view: '_View', send: Callable) -> Callable:
+    def send_traced(m):
+        start = time.perf_counter()
+        send(m)
+        view._trace('send', start)
+
+    return send_traced
+
+
+def _traced_async(view: '_View', send: Callable) -> Callable:
+    async def send_traced(m):
+        start = time.perf_counter()
+        await send(m)
+        view._trace('send', start)
+
+    return send_traced
+
+
+# Send queues.
+#
+# An AsyncView session can queue its outbound messages, to be sent in order by a separate task, so that a slow client
+# doesn't stall the session's coroutine on every write. When the queue holds send_queue messages (the high
+# watermark), writers wait until it is down to send_queue_low messages (the low watermark).
+#
+# A full view written with read=False replaces the one at the tail of the queue, if any: the client would overwrite it
+# right away. Under pressure, a push-heavy session thus holds at most one pending view, however fast it writes.
+
+class _SendQueue:
+    def __init__(self, send: Callable, high: int, low: int, hook: Optional[Callable[[int], None]]):
+        self._send = send
+        self._high = high
+        self._low = min(low, high - 1)
+        self._hook = hook  # Called with the number of messages queued, whenever it changes.
+        self._items = collections.deque()  # (message, is_frame, patch base before the frame)
+        self._ready = asyncio.Event()  # Set if there are messages to send
+        self._drained = asyncio.Event()  # Set if writers may queue more messages
+        self._drained.set()
+        self._sent = asyncio.Event()  # Set if all messages are sent
+        self._sending = False
+        self._failed = False
+        self._task = asyncio.ensure_future(self._drain())
+
+    def _changed(self):
+        if self._hook:
+            self._hook(len(self._items))
+
+    async def _wait(self):
+        while len(self._items) >= self._high and not self._failed:
+            self._drained.clear()
+            await self._drained.wait()
+        if self._failed:
+            raise InterruptError()
+
+    async def put(self, m):
+        await self._wait()
+        self._items.append((m, False, None))
+        self._ready.set()
+        self._changed()
+
+    async def put_frame(self, m, last: Optional[dict]):
+        await self._wait()
+        self._items.append((m, True, last))
+        self._ready.set()
+        self._changed()
+
+    def take_frame(self) -> Tuple[bool, Optional[dict]]:
+        # Take back the frame at the tail of the queue, if any; returns its patch base.
+        items = self._items
+        if items:
+            _, is_frame, last = items[-1]
+            if is_frame:
+                items.pop()
+                return True, last
+        return False, None
+
+    async def _drain(self):
+        items = self._items
+        try:
+            while True:
+                if not items:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                m = items.popleft()[0]
+                self._changed()
+                self._sending = True
+                await self._send(m)
+                self._sending = False
+                if len(items) <= self._low:
+                    self._drained.set()
+                if not items:
+                    self._sent.set()
+        except Exception:
+            self._failed = True  # The connection is gone; fail writers.
+            self._drained.set()
+            self._sent.set()
+
+    async def join(self):
+        # Wait until all messages are sent, or the connection is gone.
+        while (self._items or self._sending) and not self._failed:
+            self._sent.clear()
+            await self._sent.wait()
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class _Sources:  # Table data sources, local to a view.
+    # Boxes keep their sources; a view assigns each source a key, by identity, and sends keys in their place. Boxes can
+    # thus be reused across outputs, and shared by views, each of which sends and serves its own keys.
+    def __init__(self):
+        self._sources: Dict[str, Callable] = dict()
+        self._previous: Dict[str, Callable] = dict()
+        self._keys: Dict[int, Tuple[str, Callable]] = dict()  # id(source) => key, source (held, so the id stays valid)
+        self._count = 0
+
+    def reset(self):
+        # Sources are released one full output after they were last sent, so that queries in flight still succeed.
+        self._previous, self._sources = self._sources, dict()
+        self._prune()
+
+    def discard(self):
+        # Release the sources of the last output, which was replaced before being sent.
+        self._sources = dict()
+        self._prune()
+
+    def _prune(self):
+        previous = self._previous
+        self._keys = {k: e for k, e in self._keys.items() if e[0] in previous}
+
+    def add(self, source: Source) -> str:
+        e = self._keys.get(id(source))
+        if e is None or e[1] is not source:
+            self._count += 1
+            e = self._keys[id(source)] = (str(self._count), source)
+        key = e[0]
+        self._sources[key] = source
+        return key
+
+    def key_of(self, source: Source) -> Optional[str]:
+        e = self._keys.get(id(source))
+        return e[0] if e is not None and e[1] is source else None
+
+    def lookup(self, key: str) -> Source:
+        s = self._sources.get(key)
+        if s is None:
+            s = self._previous.get(key)  # A query sent before the last output arrived.
+        if s is None:
+            raise ProtocolError(404, f'Source not found: "{key}"')
+        return s
+
+
+def _is_query(msg) -> bool:
+    return isinstance(msg, dict) and msg.get('t') == _MsgType.Query
+
+
+def _is_load(msg) -> bool:
+    return isinstance(msg, dict) and msg.get('t') == _MsgType.Load
+
+
+def _to_query(msg: dict) -> Query:
+    return Query(
+        offset=msg.get('offset') or 0,
+        limit=msg.get('limit') or 0,
+        sort=msg.get('sort'),
+        desc=bool(msg.get('desc')),
+        filter=msg.get('filter'),
+        keys_only=bool(msg.get('keys')),
+    )
+
+
+def _marshal_page(codec: _Codec, qid: int, page: Union[Page, Tuple[int, Sequence]]):
+    if not isinstance(page, Page):
+        page = Page(*page)
+    return codec.marshal(dict(t=_MsgType.Page, id=qid, **page.dump()))
+
+
+def _marshal_page_error(codec: _Codec, qid: int, text: str):
+    return codec.marshal(dict(t=_MsgType.Page, id=qid, error=text))
+
+
+# Settings sent in the handshake (Set); reassigning any of them invalidates the cached handshakes. Changes made to them
+# in place (e.g. appending to the menu) are not seen until invalidate() is called.
+_settings_attrs = frozenset((
+    '_title', '_caption', '_menu', '_nav', '_theme', '_layout', '_plugins', '_help', '_resources', '_locale',
+))
+
+# Handshakes are cached per (codec, mode, locale), and translations per (codec, locale); the locale is picked by the
+# client, so bound the cache.
+_max_acks = 256
+
+
 class _View:
     def __init__(
             self,
@@ -748,6 +1844,10 @@ class _View:
             resources: Optional[Dict[str, Dict[str, str]]] = None,
             locale: Optional[LocaleOrTranslate] = None,
             delegator: Optional[Delegator] = None,
+            compress_threshold: int = 1024,
+            metrics: Optional['Metrics'] = None,
+            tracer: Optional['Tracer'] = None,
+            profiler: Optional['Profiler'] = None,
     ):
         self._delegate = delegate
         self.context = context or {}
@@ -764,15 +1864,179 @@ class _View:
         self._help = help
         self._resources = resources
         self._locale = locale
+        self._acks: Dict[tuple, Any] = {}  # Marshaled Set and Load replies, shared by all sessions.
+        self._compress_threshold = compress_threshold  # Compress messages at least this long; 0 to disable.
+        self._metrics = metrics  # Receives measurements, if set.
+        self._tracer = tracer  # Receives spans, if set.
+        self._profiler = profiler  # Profiles delegates while they run, if set.
+        self._sid = next(_session_ids)  # Identifies this session in traces.
+        self._method = ''  # Address of the delegate running, to label measurements.
+        self._mark: Optional[Tuple[float, float]] = None  # Wall and CPU time when the delegate started or resumed.
+        self._waited = 0.0  # When the delegate started waiting for input.
+        self._patch = False  # True if the client can apply patches.
+        self._last: Optional[dict] = None  # Last full body sent to the client, as decoded by the client.
+        self._sources = _Sources()
+        self._codec = _codec_of(None)
         # TODO clone instead? (to account for view-local closures)
         self._delegator = delegator or Delegator()
 
         for options in [self._menu, self._nav, self._routes]:
             self._delegator.scan_opts(options)
 
+    def _join(self, mode: Optional[str], client: dict):
+        self._codec = _codec_of(client.get('codecs'))
+        self._patch = bool(client.get('patch'))
+        compress = _compressor_of(client.get('compress')) if self._compress_threshold > 0 else None
+        if compress:
+            self._send = _compressed(self._send, compress, self._compress_threshold)
+        return self._ack(mode, _translate_locale(self._locale, client.get('locale')))
+
+    # Measurements.
+    #
+    # If metrics are set, each session reports the messages and bytes it sends and receives, how long its delegates
+    # run between inputs, in wall and CPU time, and how long they wait for the user, labeled with the address of the
+    # delegate running. CPU time is the thread's: for an AsyncView, it includes other sessions' coroutines run while
+    # the delegate awaits something other than input.
+
+    def _started(self, method: str):
+        self._method = method
+        self._mark = (time.perf_counter(), time.thread_time())
+        if self._profiler:
+            self._profiler.started(self, self._method)
+
+    def _paused(self):
+        if self._mark:
+            if self._profiler:
+                self._profiler.paused(self, self._method)
+            wall, cpu = self._mark
+            self._mark = None
+            now = time.perf_counter()
+            if self._metrics:
+                self._metrics.delegate_ran(self, self._method, now - wall, time.thread_time() - cpu)
+            if self._tracer:
+                self._tracer.record(self._sid, self._method, 'delegate', wall, now)
+
+    def _waiting(self, expected: int):
+        if expected != _MsgType.Join:
+            self._paused()
+            self._waited = time.perf_counter()
+
+    def _resumed(self, expected: int):
+        if expected != _MsgType.Join:
+            now = time.perf_counter()
+            if self._metrics:
+                self._metrics.user_waited(self, self._method, now - self._waited)
+            if self._tracer:
+                self._tracer.record(self._sid, self._method, 'wait', self._waited, now)
+            self._mark = (now, time.thread_time())
+            if self._profiler:
+                self._profiler.started(self, self._method)
+
+    # Tracing.
+    #
+    # If a tracer is set, each session reports spans for the phases of every interaction: the delegate running
+    # ("delegate"), scanning its output for delegates and sources ("scan"), dumping it to a dict ("dump"), encoding it
+    # ("marshal"), diffing it against the last output ("diff"), writing to the socket ("send"), and waiting for the
+    # user ("wait"). With a tracer, outputs are dumped and encoded in two steps, so that each can be timed; without,
+    # msgpack does both in one pass, so the two spans together slightly overstate it.
+
+    def _trace(self, name: str, start: float):
+        self._tracer.record(self._sid, self._method, name, start, time.perf_counter())
+
+    def _traced_output(self, b: Box, edit: Optional['Edit']):
+        start = time.perf_counter()
+        d = _clean(dict(t=_MsgType.Output, box=b.dump(), edit=edit.dump() if edit else None))
+        self._trace('dump', start)
+        start = time.perf_counter()
+        m = self._codec.marshal(d)
+        self._trace('marshal', start)
+        return m
+
+    def _marshal_output(self, b: Box, edit: Optional['Edit']):
+        # Boxes are marshaled without awaiting anything, so a thread-local holds this view's sources meanwhile.
+        _local.sources = self._sources
+        try:
+            return self._traced_output(b, edit) if self._tracer else self._codec.marshal_output(b, edit)
+        finally:
+            _local.sources = None
+
+    def _scan(self, b: Box):
+        if self._tracer:
+            start = time.perf_counter()
+            self._delegator.scan(b, self._sources)
+            self._trace('scan', start)
+        else:
+            self._delegator.scan(b, self._sources)
+
+    def _output(self, b: Box, edit: Optional['Edit']):
+        tracer = self._tracer
+        m = self._marshal_output(b, edit)
+        if not self._patch:
+            return m
+        if edit:
+            # The client's body no longer matches the last output; start over.
+            self._last = None
+            return m
+        if b.popup:
+            # Popups don't modify the body.
+            return m
+        # Keep the body decoded, so that each output is decoded once, not again as the base of the next diff. Decoding
+        # the message, rather than keeping the dump, costs less than dumping instead of writing directly (msgpack), and
+        # shares nothing with the boxes, which may be changed in place before the next output.
+        if tracer:
+            start = time.perf_counter()
+        body = _unmarshal(m, strict=False)['box']
+        last, self._last = self._last, body
+        if last is None:
+            if tracer:
+                self._trace('diff', start)
+            return m
+        ops = []
+        _diff(last, body, [], ops)
+        p = self._codec.marshal(dict(t=_MsgType.Patch, ops=ops))
+        if tracer:
+            self._trace('diff', start)
+        return p if len(p) < len(m) else m
+
+    def __setattr__(self, key, value):
+        if key in _settings_attrs:
+            # Replace, not clear: sessions started with the old settings may still be filling in the old cache.
+            super().__setattr__('_acks', {})
+        super().__setattr__(key, value)
+
+    def invalidate(self):
+        # Call after changing settings passed to this view in place, e.g. adding options to its menu, so that sessions
+        # started afterwards see the change.
+        for options in [self._menu, self._nav, self._routes]:
+            self._delegator.scan_opts(options)
+        self._acks = {}
+
+    def _cached(self, key: tuple, marshal: Callable):
+        acks = self._acks
+        m = acks.get(key)
+        if m is None:
+            if len(acks) >= _max_acks:
+                acks.clear()
+            m = acks[key] = marshal()
+        return m
+
     def _ack(self, mode: Optional[str] = None, locale: Optional[str] = None):
+        return self._cached((self._codec.name, mode, locale), lambda: self._marshal_ack(mode, locale))
+
+    def _load(self, msg: dict):
+        locale = msg.get('locale')
+        if not isinstance(locale, str):
+            locale = ''
+        return self._cached((self._codec.name, locale), lambda: self._codec.marshal(dict(
+            t=_MsgType.Load,
+            locale=locale,
+            translations=_dump(_translations_of(locale, self._resources)),
+        )))
+
+    def _marshal_ack(self, mode: Optional[str], locale: Optional[str]):
         resources = _to_resources(locale, self._resources)
         return _marshal_set(
+            self._codec,
             title=self._title,
             caption=self._caption,
             menu=self._menu,
@@ -796,16 +2060,18 @@ class EditType(IntEnum):
     Insert = 1
     Update = 2
     Remove = 3
+    Append = 4
 
 
 class Edit:
     # noinspection PyShadowingBuiltins
-    def __init__(self, type: EditType, selector: Optional[str] = None):
+    def __init__(self, type: EditType, selector: Optional[str] = None, window: Optional[int] = None):
         self.t = type
         self.s = selector
+        self.w = window  # Append: number of points to keep
 
     def dump(self) -> dict:
-        return _clean(dict(t=self.t, s=self.s))
+        return _clean(dict(t=self.t, s=self.s, w=self.w))
 
 
 class View(_View):
@@ -827,12 +2093,16 @@ class View(_View):
             resources: Optional[Dict[str, Dict[str, str]]] = None,
             locale: Optional[LocaleOrTranslate] = None,
             delegator: Optional[Delegator] = None,
+            compress_threshold: int = 1024,
+            metrics: Optional['Metrics'] = None,
+            tracer: Optional['Tracer'] = None,
+            profiler: Optional['Profiler'] = None,
     ):
         super().__init__(delegate, context, send, recv, title, caption, menu, nav, routes, theme, layout, plugins,
-                         help, resources, locale, delegator)
+                         help, resources, locale, delegator, compress_threshold, metrics, tracer, profiler)
 
     def serve(self, send: Callable, recv: Callable, context: any = None):
-        View(
+        view = View(
             delegate=self._delegate,
             context=context,
             send=send,
@@ -849,44 +2119,101 @@ class View(_View):
             resources=self._resources,
             locale=self._locale,
             delegator=self._delegator,
-        )._run()
+            compress_threshold=self._compress_threshold,
+            metrics=self._metrics,
+            tracer=self._tracer,
+            profiler=self._profiler,
+        )
+        view._acks = self._acks
+        view._run()
 
     def _run(self):
+        metrics = self._metrics
+        if self._tracer:
+            self._send = _traced(self, self._send)
+        if not metrics:
+            self._loop()
+            return
+        self._send = _metered(self, self._send)
+        metrics.session_started(self)
+        try:
+            self._loop()
+        finally:
+            metrics.session_ended(self)
+
+    def _loop(self):
         # Handshake
-        method, mode, locale = self._read(_MsgType.Join)
-        self._send(self._ack(mode, _translate_locale(self._locale, locale)))
+        method, mode, client = self._read(_MsgType.Join)
+        self._send(self._join(mode, client))
 
         # Event loop
+        measured = self._metrics or self._tracer or self._profiler
         params = None
         while True:
             try:
                 if method:
-                    delegate = self._delegator.lookup(method)
-                    if params:
-                        delegate(self, **params)
-                    else:
-                        delegate(self)
+                    if measured:
+                        self._method = _unrouted
+                    delegate, args, address = self._delegator.route(method, params)
+                else:
+                    delegate, args, address = self._delegate, None, None
+                if measured:
+                    self._started(address or _method_of(delegate))
+                if args:
+                    delegate(self, **args)
                 else:
-                    self._delegate(self)
+                    delegate(self)
+                if measured:
+                    self._paused()
             except ContextSwitchError as cse:
                 method, params = cse.method, cse.params
             except InterruptError:
+                if measured:
+                    self._paused()
                 return
             except Exception as e:
-                self._send(_marshal_error(0, str(e), traceback.format_exc()))
+                if measured:
+                    self._paused()
+                self._send(_marshal_error(self._codec, 0, str(e), traceback.format_exc()))
                 return
 
     def _write(self, read: bool, b: Box, edit: Edit):
-        self._delegator.scan(b)
-        self._send(_marshal(_clean(dict(t=_MsgType.Output, box=b.dump(), edit=edit.dump() if edit else None))))
+        if not (edit or b.popup):
+            self._sources.reset()
+        self._scan(b)
+        self._send(self._output(b, edit))
         if read:
             return self._read(_MsgType.Input)
 
     def _read(self, expected: int):
-        m = self._recv()
-        if m:
-            return _interpret(_unmarshal(m), expected)
-        raise InterruptError()
+        metrics = self._metrics
+        measured = metrics or self._tracer or self._profiler
+        if measured:
+            self._waiting(expected)
+        while True:
+            m = self._recv()
+            if not m:
+                raise InterruptError()
+            if metrics:
+                metrics.message_received(self, self._method, len(m))
+            msg = _unmarshal(m)
+            # Answer queries from tables, and requests for translations, while waiting.
+            if _is_query(msg):
+                self._send(self._fetch(msg))
+            elif _is_load(msg):
+                self._send(self._load(msg))
+            else:
+                if measured:
+                    self._resumed(expected)
+                return _interpret(msg, expected)
+
+    def _fetch(self, msg: dict):
+        qid = msg.get('id')
+        try:
+            source = self._sources.lookup(msg.get('source'))
+            return _marshal_page(self._codec, qid, source(_to_query(msg)))
+        except Exception as e:
+            return _marshal_page_error(self._codec, qid, str(e))
 
     def set(
             self,
@@ -900,6 +2227,7 @@ class View(_View):
             self._delegator.scan_opts(options)
 
         self._send(_marshal_set(
+            self._codec,
             title=title,
             caption=caption,
             menu=menu,
@@ -918,7 +2246,7 @@ class View(_View):
             top: Optional[int] = None,
     ):
         method = _address_of(method)
-        self._send(_marshal_switch(method, dict(
+        self._send(_marshal_switch(self._codec, method, dict(
             target=target,
             popup=popup,
             width=width,
@@ -949,6 +2277,10 @@ class View(_View):
     def clear(self, read=True, at: Optional[str] = None):
         return self._write(read, Box(mode='col'), Edit(EditType.Remove, at))
 
+    def append(self, data: Data, at: str, window: Optional[int] = None, read=True):
+        # Send just the new points; the client appends them to the named box's data, keeping the last window points.
+        return self._write(read, Box(data=data), Edit(EditType.Append, at, window))
+
 
 class AsyncView(_View):
     def __init__(
@@ -969,12 +2301,31 @@ class AsyncView(_View):
             resources: Optional[Dict[str, Dict[str, str]]] = None,
             locale: Optional[LocaleOrTranslate] = None,
             delegator: Optional[Delegator] = None,
+            compress_threshold: int = 1024,
+            metrics: Optional['Metrics'] = None,
+            tracer: Optional['Tracer'] = None,
+            profiler: Optional['Profiler'] = None,
+            frame_interval: float = 0,
+            send_queue: int = 0,
+            send_queue_low: Optional[int] = None,
+            on_send_queue: Optional[Callable[['AsyncView', int], None]] = None,
     ):
         super().__init__(delegate, context, send, recv, title, caption, menu, nav, routes, theme, layout, plugins,
-                         help, resources, locale, delegator)
+                         help, resources, locale, delegator, compress_threshold, metrics, tracer, profiler)
+        # Queue up to send_queue outbound messages per session; 0 to send directly.
+        self._send_queue = send_queue
+        self._send_queue_low = send_queue // 2 if send_queue_low is None else send_queue_low
+        self._on_send_queue = on_send_queue  # Called with the session's view and queue length, when it changes.
+        self._queue: Optional[_SendQueue] = None
+        # Send at most one full view written with read=False per interval, in seconds; 0 to disable.
+        self._frame_interval = frame_interval
+        self._frame: Optional[Box] = None  # latest view not sent yet
+        self._frame_sent = 0.0  # when the last frame was sent, in event loop time
+        self._frame_task: Optional[asyncio.Task] = None  # sends the latest view when the interval elapses
+        self._frame_lock: Optional[asyncio.Lock] = None  # held while a frame is being sent; None if disabled
 
     async def serve(self, send: Callable, recv: Callable, context: any = None):
-        await AsyncView(
+        view = AsyncView(
             delegate=self._delegate,
             context=context,
             send=send,
@@ -991,45 +2342,195 @@ class AsyncView(_View):
             resources=self._resources,
             locale=self._locale,
             delegator=self._delegator,
-        )._run()
+            compress_threshold=self._compress_threshold,
+            metrics=self._metrics,
+            tracer=self._tracer,
+            profiler=self._profiler,
+            frame_interval=self._frame_interval,
+            send_queue=self._send_queue,
+            send_queue_low=self._send_queue_low,
+            on_send_queue=self._on_send_queue,
+        )
+        view._acks = self._acks
+        await view._run()
 
     async def _run(self):
+        if self._frame_interval > 0:
+            self._frame_lock = asyncio.Lock()
+        metrics = self._metrics
+        if self._tracer:
+            self._send = _traced_async(self, self._send)
+        if metrics:
+            self._send = _metered(self, self._send)
+            metrics.session_started(self)
+        try:
+            await self._loop()
+            if self._queue:
+                await self._queue.join()
+        finally:
+            if self._frame_task:
+                self._frame_task.cancel()
+            if self._queue:
+                self._queue.cancel()
+            if metrics:
+                metrics.session_ended(self)
+
+    async def _loop(self):
         # Handshake
-        method, mode, locale = await self._read(_MsgType.Join)
-        await self._send(self._ack(mode, _translate_locale(self._locale, locale)))
+        method, mode, client = await self._read(_MsgType.Join)
+        await self._send(self._join(mode, client))
+
+        if self._send_queue > 0:
+            hook = self._on_send_queue
+            self._queue = _SendQueue(
+                self._send,
+                self._send_queue,
+                self._send_queue_low,
+                (lambda n: hook(self, n)) if hook else None,
+            )
+            self._send = self._queue.put
 
         # Event loop
+        measured = self._metrics or self._tracer or self._profiler
         params = None
         while True:
             try:
                 if method:
-                    delegate = self._delegator.lookup(method)
-                    if params:
-                        await delegate(self, **params)
-                    else:
-                        await delegate(self)
+                    if measured:
+                        self._method = _unrouted
+                    delegate, args, address = self._delegator.route(method, params)
+                else:
+                    delegate, args, address = self._delegate, None, None
+                if measured:
+                    self._started(address or _method_of(delegate))
+                if args:
+                    await delegate(self, **args)
                 else:
-                    await self._delegate(self)
+                    await delegate(self)
+                await self._flush()
+                if measured:
+                    self._paused()
             except ContextSwitchError as cse:
                 method, params = cse.method, cse.params
             except InterruptError:
+                if measured:
+                    self._paused()
                 return
             except Exception as e:
-                await self._send(_marshal_error(0, str(e), traceback.format_exc()))
+                if measured:
+                    self._paused()
+                await self._flush()
+                await self._send(_marshal_error(self._codec, 0, str(e), traceback.format_exc()))
                 return
 
     async def _read(self, expected: int):
-        m = await self._recv()
-        if m:
-            return _interpret(_unmarshal(m), expected)
-        raise InterruptError()
+        await self._flush()
+        metrics = self._metrics
+        measured = metrics or self._tracer or self._profiler
+        if measured:
+            self._waiting(expected)
+        while True:
+            m = await self._recv()
+            if not m:
+                raise InterruptError()
+            if metrics:
+                metrics.message_received(self, self._method, len(m))
+            msg = _unmarshal(m)
+            # Answer queries from tables, and requests for translations, while waiting.
+            if _is_query(msg):
+                await self._send(await self._fetch(msg))
+            elif _is_load(msg):
+                await self._send(self._load(msg))
+            else:
+                if measured:
+                    self._resumed(expected)
+                return _interpret(msg, expected)
+
+    async def _fetch(self, msg: dict):
+        qid = msg.get('id')
+        try:
+            source = self._sources.lookup(msg.get('source'))
+            page = source(_to_query(msg))
+            if inspect.isawaitable(page):
+                page = await page
+            return _marshal_page(self._codec, qid, page)
+        except Exception as e:
+            return _marshal_page_error(self._codec, qid, str(e))
 
     async def _write(self, read: bool, b: Box, edit: Edit):
-        self._delegator.scan(b)
-        await self._send(_marshal(_clean(dict(t=_MsgType.Output, box=b.dump(), edit=edit.dump() if edit else None))))
+        if not (read or edit or b.popup):
+            if self._frame_lock:
+                await self._coalesce(b)
+            else:
+                await self._send_frame(b)
+            return
+        await self._flush()
+        if not (edit or b.popup):
+            self._sources.reset()
+        self._scan(b)
+        await self._send(self._output(b, edit))
         if read:
             return await self._read(_MsgType.Input)
 
+    # Frame coalescing.
+    #
+    # Apps pushing updates with read=False can write views much faster than they can be marshaled, sent or painted.
+    # If frame_interval is set, a full view written with read=False is sent right away only if the previous one was
+    # sent at least frame_interval seconds ago. Otherwise it is held back, replacing any view already held back, and
+    # the latest one is sent when the interval elapses. Views replaced this way are never scanned or marshaled.
+    #
+    # Anything else sent (edits, popups, settings, switches, errors), and reading, first sends the view held back, if
+    # any, so that the client always sees messages in the order they were written.
+
+    async def _coalesce(self, b: Box):
+        self._frame = b
+        if self._frame_task:
+            return
+        delay = self._frame_sent + self._frame_interval - asyncio.get_running_loop().time()
+        if delay > 0:
+            self._frame_task = asyncio.ensure_future(self._flush_later(delay))
+        else:
+            await self._flush()
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        self._frame_task = None  # Sending; no longer cancellable.
+        try:
+            await self._flush()
+        except Exception:
+            pass  # The connection is gone; the next read will fail.
+
+    async def _flush(self):
+        lock = self._frame_lock
+        if lock is None or (self._frame is None and not lock.locked()):
+            return
+        task, self._frame_task = self._frame_task, None
+        if task:
+            task.cancel()
+        async with lock:  # Wait for a frame being sent by _flush_later()
+            b, self._frame = self._frame, None
+            if b is not None:
+                self._frame_sent = asyncio.get_running_loop().time()
+                await self._send_frame(b)
+
+    async def _send_frame(self, b: Box):
+        # Send a full view written with read=False, replacing any such view still queued. Frames are scanned, and
+        # their sources registered, only when sent: the client shows the last frame sent until the next one arrives,
+        # so its sources must outlive frames held back and replaced.
+        q = self._queue
+        taken, last = q.take_frame() if q else (False, None)
+        if taken:
+            self._last = last  # Patch against what the client will actually have.
+            self._sources.discard()
+        else:
+            self._sources.reset()
+        self._scan(b)
+        if q is None:
+            await self._send(self._output(b, None))
+            return
+        last = self._last
+        await q.put_frame(self._output(b, None), last)
+
     async def set(
             self,
             title: str = None,
@@ -1041,7 +2542,9 @@ class AsyncView(_View):
         for options in [menu, nav]:
             self._delegator.scan_opts(options)
 
+        await self._flush()
         await self._send(_marshal_set(
+            self._codec,
             title=title,
             caption=caption,
             menu=menu,
@@ -1060,7 +2563,8 @@ class AsyncView(_View):
             top: Optional[int] = None,
     ):
         method = _address_of(method)
-        await self._send(_marshal_switch(method, dict(
+        await self._flush()
+        await self._send(_marshal_switch(self._codec, method, dict(
             target=target,
             popup=popup,
             width=width,
@@ -1091,23 +2595,80 @@ class AsyncView(_View):
     async def clear(self, read=True, at: Optional[str] = None):
         return await self._write(read, Box(mode='col'), Edit(EditType.Remove, at))
 
+    async def append(self, data: Data, at: str, window: Optional[int] = None, read=True):
+        return await self._write(read, Box(data=data), Edit(EditType.Append, at, window))
+
+
+# In-process transports.
+#
+# A Duplex connects a view to a host in the same process, like a browser worker running Pyodide: the host write()s
+# messages from the client, and gets the view's messages by listen()ing, or by polling read(). Waiting for input is
+# event-driven, so input is handled as soon as it is written, and idle sessions cost nothing.
+#
+# Duplex is for AsyncView.serve(); SyncDuplex is its counterpart for View.serve(), waiting on a separate thread.
 
 class Duplex:
-    def __init__(self):
-        self._input = collections.deque()
+    def __init__(self, listener: Optional[Callable] = None):
+        self._input: Optional[asyncio.Queue] = None  # Created on first use, in the event loop's context.
         self._output = collections.deque()
+        self._listener = listener  # If set, called with each message sent, instead of queueing it for read().
+
+    def _queue(self) -> asyncio.Queue:
+        if self._input is None:
+            self._input = asyncio.Queue()
+        return self._input
 
     async def send(self, x):
-        self._output.append(x)
+        if self._listener:
+            self._listener(x)
+        else:
+            self._output.append(x)
 
     async def recv(self):
-        while True:
-            if len(self._input):
-                return self._input.popleft()
-            await asyncio.sleep(0.1)
+        return await self._queue().get()
 
     def write(self, x):
-        self._input.append(x)
+        self._queue().put_nowait(x)
 
     def read(self):
         return self._output.popleft() if len(self._output) else None
+
+    def listen(self, listener: Optional[Callable]):
+        self._listener = listener
+        if listener:
+            while len(self._output):
+                listener(self._output.popleft())
+
+    def close(self):
+        self.write(None)  # Ends the session.
+
+
+class SyncDuplex:
+    def __init__(self, listener: Optional[Callable] = None):
+        self._input = queue.SimpleQueue()
+        self._output = collections.deque()
+        self._listener = listener
+
+    def send(self, x):
+        if self._listener:
+            self._listener(x)
+        else:
+            self._output.append(x)
+
+    def recv(self):
+        return self._input.get()
+
+    def write(self, x):
+        self._input.put(x)
+
+    def read(self):
+        return self._output.popleft() if len(self._output) else None
+
+    def listen(self, listener: Optional[Callable]):
+        self._listener = listener
+        if listener:
+            while len(self._output):
+                listener(self._output.popleft())
+
+    def close(self):
+        self.write(None)
@@ -0,0 +1,124 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Session executor.
+#
+# Under a threaded server (Flask, Django, gunicorn's gthread workers), each View session occupies a server thread for
+# as long as the user keeps the page open, mostly blocked waiting for input. Past a point, a spike in connections
+# exhausts the server's threads, and every page hangs.
+#
+# SessionExecutor caps the number of sessions running at once. Connections over the cap wait, in order, for up to
+# timeout seconds for a session to end, if fewer than max_queued are already waiting; else they are closed with code
+# 1013 (try again later), and the browser reconnects after backing off.
+#
+#   nitro = View(main, ...)
+#   sessions = SessionExecutor(nitro, max_sessions=100, max_queued=20)
+#
+#   @app.route('/nitro', websocket=True)
+#   def socket():
+#       ws = simple_websocket.Server(request.environ)
+#       try:
+#           sessions.serve(ws.send, ws.receive, close=ws.close)
+#       except simple_websocket.ConnectionClosed:
+#           pass
+#       return ''
+#
+# Waiting connections still occupy their server threads, so keep max_sessions + max_queued below the server's thread
+# count, leaving threads for regular requests.
+
+import threading
+from typing import Callable, Dict, Optional
+
+from .core import View
+
+TRY_AGAIN_LATER = 1013  # WebSocket close code
+
+
+class SessionExecutor:
+    def __init__(
+            self,
+            view: View,
+            max_sessions: int = 64,
+            max_queued: int = 0,
+            timeout: float = 30.0,
+    ):
+        self._view = view
+        self.max_sessions = max_sessions  # Sessions to run at once.
+        self.max_queued = max_queued  # Connections to hold while max_sessions are running; 0 to reject right away.
+        self.timeout = timeout  # Seconds a connection may wait for a session to end.
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self._served = 0
+        self._rejected = 0
+
+    @property
+    def active(self) -> int:  # Sessions running.
+        return self._active
+
+    @property
+    def queued(self) -> int:  # Connections waiting for a session to end.
+        return self._queued
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(active=self._active, queued=self._queued, served=self._served, rejected=self._rejected)
+
+    def _acquire(self) -> bool:
+        with self._cond:
+            # Wait behind connections already waiting, even if a session just ended.
+            if self._active < self.max_sessions and not self._queued:
+                self._active += 1
+                return True
+            if self._queued >= self.max_queued:
+                self._rejected += 1
+                return False
+            self._queued += 1
+            try:
+                ok = self._cond.wait_for(lambda: self._active < self.max_sessions, self.timeout)
+            finally:
+                self._queued -= 1
+            if not ok:
+                self._rejected += 1
+                return False
+            self._active += 1
+            return True
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._served += 1
+            self._cond.notify()
+
+    def serve(
+            self,
+            send: Callable,
+            recv: Callable,
+            context: any = None,
+            close: Optional[Callable[[int, str], None]] = None,
+    ) -> bool:
+        # Serve a session, once there is room for it; returns False if the connection was turned away instead, after
+        # closing it with close(1013, reason), if given.
+        if not self._acquire():
+            if close:
+                try:
+                    close(TRY_AGAIN_LATER, 'Try again later')
+                except Exception:
+                    pass  # Already gone.
+            return False
+        try:
+            self._view.serve(send, recv, context)
+        finally:
+            self._release()
+        return True
@@ -1,3 +1,5 @@
+import array
+import math
 import random
 
 
@@ -11,3 +13,144 @@ def random_walk(n, rmin=.05, rmax=.95):
         data.append(data[i - 1] + random.uniform(-1, 1))
     dmin, dmax = min(data), max(data)
     return [remap(d, dmin, dmax, rmin, rmax) for d in data]  # normalize
+
+
+# Downsampling.
+#
+# A chart can only show as many points as it is wide, in pixels. Downsampling reduces a long series to about that
+# many points on the server, preserving its shape, so that the browser receives a few KB instead of every point:
+#   - lttb: Largest-Triangle-Three-Buckets; picks the most prominent point in each bucket. Good for lines and curves.
+#   - minmax: keeps the lowest and highest point in each bucket, in order. Never loses peaks; good for noisy signals.
+# Sequences of [low, high] intervals are reduced to the envelope of each bucket, whatever the method.
+#
+# Values are taken to be evenly spaced, as in g-line-y or g-curve-y. NumPy is used if installed.
+
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _is_pairs(data) -> bool:
+    ndim = getattr(data, 'ndim', None)
+    if ndim is not None:
+        return ndim > 1
+    return len(data) > 0 and isinstance(data[0], (tuple, list))
+
+
+def _lttb_edges(m: int, n: int):
+    # Bucket i of n - 2 spans [edges[i], edges[i + 1]); the first and last points are kept as-is.
+    every = (m - 2) / (n - 2)
+    return [int(i * every) + 1 for i in range(n - 2)] + [m - 1]
+
+
+def lttb(data, n: int):
+    m = len(data)
+    if n >= m or n < 3:
+        return data
+    edges = _lttb_edges(m, n)
+    np = _numpy()
+    if np:
+        ys = np.asarray(data, dtype=np.float64)
+        sums = np.concatenate(([0.0], np.cumsum(ys)))
+        picked = np.empty(n, dtype=np.intp)
+        picked[0], picked[-1] = 0, m - 1
+        a = 0
+        for i in range(n - 2):
+            lo, hi = edges[i], edges[i + 1]
+            if i < n - 3:  # Triangle's third vertex: the next bucket's average; else, the last point.
+                nlo, nhi = hi, edges[i + 2]
+                cx, cy = (nlo + nhi - 1) / 2, (sums[nhi] - sums[nlo]) / (nhi - nlo)
+            else:
+                cx, cy = m - 1, ys[-1]
+            ax, ay = a, ys[a]
+            areas = np.abs((ax - cx) * (ys[lo:hi] - ay) - (ax - np.arange(lo, hi)) * (cy - ay))
+            a = picked[i + 1] = lo + int(areas.argmax())
+        return ys[picked].astype(np.float32)
+
+    ys = data
+    picked = [0]
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i < n - 3:
+            nlo, nhi = hi, edges[i + 2]
+            cx, cy = (nlo + nhi - 1) / 2, sum(ys[nlo:nhi]) / (nhi - nlo)
+        else:
+            cx, cy = m - 1, ys[-1]
+        ax, ay = a, ys[a]
+        best, largest = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((ax - cx) * (ys[j] - ay) - (ax - j) * (cy - ay))
+            if area > largest:
+                best, largest = j, area
+        picked.append(best)
+        a = best
+    picked.append(m - 1)
+    return array.array('f', [ys[j] for j in picked])
+
+
+def min_max(data, n: int):
+    m = len(data)
+    if n >= m or n < 2:
+        return data
+    size = math.ceil(m / (n // 2))  # bucket size
+    np = _numpy()
+    if np:
+        ys = np.asarray(data, dtype=np.float64)
+        b = np.pad(ys, (0, -m % size), mode='edge').reshape(-1, size)
+        i, j = b.argmin(axis=1), b.argmax(axis=1)
+        rows = np.arange(len(b))
+        return np.stack((b[rows, np.minimum(i, j)], b[rows, np.maximum(i, j)]), axis=1).ravel().astype(np.float32)
+
+    out = array.array('f')
+    for lo in range(0, m, size):
+        bucket = data[lo:lo + size]
+        i = min(range(len(bucket)), key=bucket.__getitem__)
+        j = max(range(len(bucket)), key=bucket.__getitem__)
+        out.append(bucket[min(i, j)])
+        out.append(bucket[max(i, j)])
+    return out
+
+
+def envelope(data, n: int):
+    m = len(data)
+    if n >= m or n < 1:
+        return data
+    size = math.ceil(m / n)
+    np = _numpy()
+    if np:
+        xs = np.asarray(data, dtype=np.float64)
+        pad = (0, -m % size)
+        lows = np.pad(xs[:, 0], pad, mode='edge').reshape(-1, size).min(axis=1)
+        highs = np.pad(xs[:, 1], pad, mode='edge').reshape(-1, size).max(axis=1)
+        return np.stack((lows, highs), axis=1).tolist()
+
+    return [
+        [min(x[0] for x in data[lo:lo + size]), max(x[1] for x in data[lo:lo + size])]
+        for lo in range(0, m, size)
+    ]
+
+
+_downsamplers = dict(lttb=lttb, minmax=min_max)
+
+
+class _Downsampled:  # Reduced lazily, each time its box is sent, so that changes to the data are shown.
+    __slots__ = ('data', 'n', 'method')
+
+    def __init__(self, data, n: int, method: str):
+        if method not in _downsamplers:
+            raise ValueError(f'unknown downsampling method {method!r}: want one of {", ".join(_downsamplers)}')
+        self.data = data
+        self.n = n
+        self.method = method
+
+    def dump(self):
+        data = self.data
+        return envelope(data, self.n) if _is_pairs(data) else _downsamplers[self.method](data, self.n)
+
+
+def downsample(data, n: int = 128, method: str = 'lttb'):
+    return _Downsampled(data, n, method)
@@ -0,0 +1,170 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Prometheus metrics.
+#
+# PrometheusMetrics accumulates the measurements of every session of a view, and renders them in the Prometheus text
+# exposition format, to be served from a /metrics endpoint:
+#
+#   metrics = PrometheusMetrics()
+#   nitro = View(main, metrics=metrics, ...)
+#
+#   @app.route('/metrics')
+#   def serve_metrics():
+#       return metrics.render(), 200, {'Content-Type': PrometheusMetrics.content_type}
+#
+# Counters and histograms are labeled with the method (delegate address) they were measured in.
+
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from .core import Metrics
+
+_default_buckets = (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+_wait_buckets = (.1, .25, .5, 1, 2.5, 5, 10, 30, 60, 300, 600, 1800)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, n: int):
+        self.counts = [0] * n  # not cumulative; summed when rendered
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, buckets: Sequence[float], x: float):
+        for i, b in enumerate(buckets):
+            if x <= b:
+                self.counts[i] += 1
+                break
+        self.sum += x
+        self.count += 1
+
+
+class _Method:
+    __slots__ = ('sent', 'sent_bytes', 'received', 'received_bytes', 'cpu', 'ran', 'waited')
+
+    def __init__(self, ran: int, waited: int):
+        self.sent = 0
+        self.sent_bytes = 0
+        self.received = 0
+        self.received_bytes = 0
+        self.cpu = 0.0
+        self.ran = _Histogram(ran)
+        self.waited = _Histogram(waited)
+
+
+def _escape(s: str) -> str:
+    return s.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(x) -> str:
+    return repr(float(x)) if isinstance(x, float) else str(x)
+
+
+class PrometheusMetrics(Metrics):
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(
+            self,
+            prefix: str = 'nitro',
+            buckets: Optional[Sequence[float]] = None,
+            wait_buckets: Optional[Sequence[float]] = None,
+    ):
+        self._prefix = prefix
+        self._buckets = tuple(buckets or _default_buckets)  # for delegate run times, in seconds
+        self._wait_buckets = tuple(wait_buckets or _wait_buckets)  # for user wait times, in seconds
+        self._lock = threading.Lock()
+        self._methods: Dict[str, _Method] = {}
+        self._active = 0
+        self._total = 0
+
+    def _method(self, method: str) -> _Method:
+        m = self._methods.get(method)
+        if m is None:
+            m = self._methods[method] = _Method(len(self._buckets), len(self._wait_buckets))
+        return m
+
+    def session_started(self, view):
+        with self._lock:
+            self._active += 1
+            self._total += 1
+
+    def session_ended(self, view):
+        with self._lock:
+            self._active -= 1
+
+    def message_sent(self, view, method: str, size: int):
+        with self._lock:
+            m = self._method(method)
+            m.sent += 1
+            m.sent_bytes += size
+
+    def message_received(self, view, method: str, size: int):
+        with self._lock:
+            m = self._method(method)
+            m.received += 1
+            m.received_bytes += size
+
+    def delegate_ran(self, view, method: str, wall: float, cpu: float):
+        with self._lock:
+            m = self._method(method)
+            m.ran.observe(self._buckets, wall)
+            m.cpu += cpu
+
+    def user_waited(self, view, method: str, seconds: float):
+        with self._lock:
+            self._method(method).waited.observe(self._wait_buckets, seconds)
+
+    def render(self) -> str:
+        p = self._prefix
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, text: str):
+            lines.append(f'# HELP {p}_{name} {text}')
+            lines.append(f'# TYPE {p}_{name} {kind}')
+
+        def counter(name: str, text: str, attr: str):
+            metric(name, 'counter', text)
+            for method, m in methods:
+                lines.append(f'{p}_{name}{{method="{_escape(method)}"}} {_number(getattr(m, attr))}')
+
+        def histogram(name: str, text: str, attr: str, buckets: Sequence[float]):
+            metric(name, 'histogram', text)
+            for method, m in methods:
+                h: _Histogram = getattr(m, attr)
+                label = f'method="{_escape(method)}"'
+                n = 0
+                for b, count in zip(buckets, h.counts):
+                    n += count
+                    lines.append(f'{p}_{name}_bucket{{{label},le="{_number(float(b))}"}} {n}')
+                lines.append(f'{p}_{name}_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f'{p}_{name}_sum{{{label}}} {_number(h.sum)}')
+                lines.append(f'{p}_{name}_count{{{label}}} {h.count}')
+
+        with self._lock:
+            methods = sorted(self._methods.items())
+            metric('sessions_active', 'gauge', 'Sessions in progress.')
+            lines.append(f'{p}_sessions_active {self._active}')
+            metric('sessions_total', 'counter', 'Sessions started.')
+            lines.append(f'{p}_sessions_total {self._total}')
+            counter('messages_sent_total', 'Messages sent to clients.', 'sent')
+            counter('bytes_sent_total', 'Bytes sent to clients, after compression.', 'sent_bytes')
+            counter('messages_received_total', 'Messages received from clients.', 'received')
+            counter('bytes_received_total', 'Bytes received from clients.', 'received_bytes')
+            histogram('delegate_seconds', 'Wall time spent running delegates between inputs.', 'ran', self._buckets)
+            counter('delegate_cpu_seconds_total', 'CPU time spent running delegates between inputs.', 'cpu')
+            histogram('user_wait_seconds', 'Time spent waiting for user input.', 'waited', self._wait_buckets)
+        lines.append('')
+        return '\n'.join(lines)
@@ -0,0 +1,191 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Session profiling.
+#
+# SessionProfiler profiles only the sessions it is told to watch, while their delegates run (not while they wait for
+# input). Sessions are picked, and the selection changed at runtime, by the address of the delegate running, or by a
+# context value, e.g. a tenant or user ID:
+#
+#   profiler = SessionProfiler()
+#   nitro = View(main, profiler=profiler, ...)
+#   ...
+#   profiler.watch(key='tenant', value='acme')  # or watch(method='#!app.reports')
+#   ...
+#   profiler.unwatch()
+#   profiler.save('acme.collapsed')
+#
+# Modes:
+#   - sample: a background thread samples the stacks of watched delegates every interval seconds, and save() writes
+#     them in collapsed-stack format ("method;outer;inner count" lines), for flamegraph.pl, speedscope or Perfetto.
+#     Only samples taken while a watched session is running are counted, so this works with AsyncView too.
+#   - cprofile: runs cProfile on the session's thread while watched delegates run, and save() writes pstats data,
+#     for snakeviz or python -m pstats. With AsyncView, this also profiles other sessions' coroutines run meanwhile.
+#
+# Sessions not watched cost one check each time a delegate starts or pauses; the sampler only runs while a watched
+# delegate is running.
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .core import Profiler, View, AsyncView
+
+_modes = ('sample', 'cprofile')
+
+# The frames the event loops of View and AsyncView run delegates from; samples are stacks above one of these.
+_loop_codes = (View._loop.__code__, AsyncView._loop.__code__)
+
+
+def _root_frame():
+    f = sys._getframe(2)
+    while f is not None and f.f_code not in _loop_codes:
+        f = f.f_back
+    return f
+
+
+def _label_of(f) -> str:
+    code = f.f_code
+    return f'{getattr(code, "co_qualname", code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SessionProfiler(Profiler):
+    def __init__(
+            self,
+            mode: str = 'sample',
+            interval: float = 0.005,
+            method: Optional[str] = None,
+            key: Optional[str] = None,
+            value: Any = None,
+    ):
+        if mode not in _modes:
+            raise ValueError(f'unknown profiling mode {mode!r}: want one of {", ".join(_modes)}')
+        self.mode = mode
+        self.interval = interval  # Seconds between samples.
+        self._method: Optional[str] = None
+        self._key: Optional[str] = None
+        self._value: Any = None
+        self._lock = threading.Lock()
+        self._active: Dict[int, Tuple[int, Any, str]] = {}  # session => thread ID, root frame, method
+        self._sampler: Optional[threading.Thread] = None
+        self._stacks: Dict[str, int] = {}  # collapsed stack => samples
+        self._profiles: Dict[int, List] = {}  # thread ID => [cProfile.Profile, sessions running]
+        self.watch(method, key, value)
+
+    def watch(self, method: Optional[str] = None, key: Optional[str] = None, value: Any = None):
+        # Profile sessions running the delegate at this address, or whose context has this value for key, from the
+        # next time their delegate starts or resumes.
+        self._method, self._key, self._value = method, key, value
+
+    def unwatch(self):
+        self.watch()
+
+    def _watched(self, view, method: str) -> bool:
+        if self._method is not None and method == self._method:
+            return True
+        if self._key is not None:
+            context = view.context
+            return isinstance(context, dict) and context.get(self._key) == self._value
+        return False
+
+    def started(self, view, method: str):
+        if (self._method is None and self._key is None) or not self._watched(view, method):
+            return
+        sid, tid = view._sid, threading.get_ident()
+        with self._lock:
+            if sid in self._active:
+                return
+            if self.mode == 'cprofile':
+                p = self._profiles.get(tid)
+                if p is None:
+                    p = self._profiles[tid] = [cProfile.Profile(), 0]
+                p[1] += 1
+                if p[1] == 1:
+                    p[0].enable()
+                self._active[sid] = (tid, None, method)
+                return
+            root = _root_frame()
+            if root is None:
+                return
+            self._active[sid] = (tid, root, method)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name='nitro-profiler', daemon=True)
+                self._sampler.start()
+
+    def paused(self, view, method: str):
+        if view._sid not in self._active:
+            return
+        with self._lock:
+            a = self._active.pop(view._sid, None)
+            if a is None or self.mode != 'cprofile':
+                return
+            p = self._profiles[a[0]]
+            p[1] -= 1
+            if p[1] == 0:
+                p[0].disable()
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._sampler = None
+                    return
+            frames = sys._current_frames()
+            samples = []
+            for tid, root, method in active:
+                f = frames.get(tid)
+                stack = []
+                while f is not None and f is not root:
+                    stack.append(_label_of(f))
+                    f = f.f_back
+                if f is None:  # The thread is running something else, e.g. another session.
+                    continue
+                stack.append(method)
+                samples.append(';'.join(reversed(stack)))
+            with self._lock:
+                stacks = self._stacks
+                for s in samples:
+                    stacks[s] = stacks.get(s, 0) + 1
+
+    def collapsed(self) -> str:
+        # Samples in collapsed-stack format, one stack per line.
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return ''.join(f'{s} {n}\n' for s, n in stacks)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        # cProfile results for all watched sessions, if any.
+        with self._lock:
+            profiles = [p for p, n in self._profiles.values() if n == 0]
+        return pstats.Stats(*profiles) if profiles else None
+
+    def save(self, path: str):
+        if self.mode == 'cprofile':
+            stats = self.stats()
+            if stats:
+                stats.dump_stats(path)
+            return
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+
+    def clear(self):
+        with self._lock:
+            self._stacks = {}
+            self._profiles = {tid: p for tid, p in self._profiles.items() if p[1] > 0}
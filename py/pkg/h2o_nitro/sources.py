@@ -0,0 +1,169 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Built-in table data sources.
+#
+# Each source answers a Query by sorting, searching and paging its rows on the server, so that only the rows
+# being displayed are sent to the browser. If the query asks for keys only, just the keys of the matching rows are
+# returned, in order; the browser already has the rows.
+#
+# Searching matches rows containing the search text in any cell, ignoring case.
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .core import Query, Page, Primitive, V
+
+
+def _sort_key(x):  # Sort None first, instead of failing.
+    return (0, 0) if x is None else (1, x)
+
+
+class ListSource:
+    def __init__(self, rows: Sequence[Sequence[Primitive]], keys: Optional[Sequence[V]] = None):
+        self._rows = rows
+        self._keys = keys
+        self._orders: Dict[int, List[int]] = {}  # column => row indices, sorted by column
+        self._texts: Optional[List[str]] = None  # row index => lowercase text, for searching
+
+    def _order(self, j: int) -> List[int]:
+        order = self._orders.get(j)
+        if order is None:
+            rows = self._rows
+            order = self._orders[j] = sorted(
+                range(len(rows)),
+                key=lambda i: _sort_key(rows[i][j] if j < len(rows[i]) else None),
+            )
+        return order
+
+    def _search(self, text: str) -> List[int]:
+        texts = self._texts
+        if texts is None:
+            texts = self._texts = ['\t'.join(str(x) for x in row if x is not None).lower() for row in self._rows]
+        text = text.lower()
+        return [i for i, t in enumerate(texts) if text in t]
+
+    def __call__(self, q: Query) -> Page:
+        rows = self._rows
+        if q.sort is None:
+            matches = self._search(q.filter) if q.filter else range(len(rows))
+        else:
+            order = self._order(q.sort)
+            if q.desc:
+                order = order[::-1]
+            if q.filter:
+                found = set(self._search(q.filter))
+                order = [i for i in order if i in found]
+            matches = order
+
+        total = len(matches)
+        if not q.keys_only:
+            matches = matches[q.offset:q.offset + q.limit]
+        keys = [self._keys[i] for i in matches] if self._keys is not None else list(matches)
+        if q.keys_only:
+            return Page(total, keys=keys)
+        return Page(total, [rows[i] for i in matches], keys=keys)
+
+
+class ArraySource:
+    def __init__(self, columns: Union[Sequence[Any], Dict[str, Any]], keys: Optional[Sequence[V]] = None):
+        import numpy as np
+        self._np = np
+        if isinstance(columns, dict):
+            columns = list(columns.values())
+        self._columns = [np.asarray(c) for c in columns]
+        self._keys = None if keys is None else np.asarray(keys)
+        lengths = {len(c) for c in self._columns}
+        if self._keys is not None:
+            lengths.add(len(self._keys))
+        if len(lengths) > 1:
+            raise ValueError(f'columns and keys must have the same length: got {", ".join(map(str, sorted(lengths)))}')
+        self._n = lengths.pop() if lengths else 0
+        self._orders: Dict[int, Any] = {}  # column => row indices, sorted by column
+        self._texts: List[Optional[Any]] = [None] * len(self._columns)  # column => lowercase strings, for searching
+        self._search_cache: Optional[Tuple[str, Any]] = None  # last (search text, mask)
+
+    def _order(self, j: int):
+        order = self._orders.get(j)
+        if order is None:
+            order = self._orders[j] = self._np.argsort(self._columns[j], kind='stable')
+        return order
+
+    def _search(self, text: str):
+        text = text.lower()
+        cached = self._search_cache
+        if cached and cached[0] == text:
+            return cached[1]
+        np = self._np
+        mask = np.zeros(self._n, dtype=bool)
+        for j, c in enumerate(self._columns):
+            t = self._texts[j]
+            if t is None:
+                t = self._texts[j] = np.char.lower(c.astype(str))
+            mask |= np.char.find(t, text) >= 0
+        self._search_cache = (text, mask)
+        return mask
+
+    def __call__(self, q: Query) -> Page:
+        np = self._np
+        if q.sort is None:
+            matches = np.flatnonzero(self._search(q.filter)) if q.filter else np.arange(self._n)
+        else:
+            order = self._order(q.sort)
+            if q.desc:
+                order = order[::-1]
+            matches = order[self._search(q.filter)[order]] if q.filter else order
+
+        total = len(matches)
+        if not q.keys_only:
+            matches = matches[q.offset:q.offset + q.limit]
+        if self._keys is not None:
+            keys = self._keys[matches]
+        else:
+            keys = matches.astype(np.int32 if self._n < 2 ** 31 else np.float64)
+        if q.keys_only:
+            return Page(total, keys=keys)
+        return Page(total, columns=[c[matches] for c in self._columns], keys=keys)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteSource:
+    def __init__(self, connection, table: str, columns: Sequence[str], key: str = 'rowid'):
+        self._connection = connection
+        self._table = _quote(table)
+        self._columns = [_quote(c) for c in columns]
+        self._key = _quote(key) if key != 'rowid' else key
+
+    def __call__(self, q: Query) -> Page:
+        where, params = '', []
+        if q.filter:
+            text = '%' + q.filter.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            where = ' WHERE ' + ' OR '.join(f"{c} LIKE ? ESCAPE '\\'" for c in self._columns)
+            params = [text] * len(self._columns)
+        order = f' ORDER BY {self._key}'  # Without an ORDER BY, SQLite may return rows in any order.
+        if q.sort is not None:
+            order = f' ORDER BY {self._columns[q.sort]}{" DESC" if q.desc else ""}, {self._key}'
+
+        db = self._connection
+        total = db.execute(f'SELECT COUNT(*) FROM {self._table}{where}', params).fetchone()[0]
+        if q.keys_only:
+            rows = db.execute(f'SELECT {self._key} FROM {self._table}{where}{order}', params).fetchall()
+            return Page(total, keys=[r[0] for r in rows])
+        rows = db.execute(
+            f'SELECT {self._key}, {", ".join(self._columns)} FROM {self._table}{where}{order} LIMIT ? OFFSET ?',
+            params + [q.limit, q.offset],
+        ).fetchall()
+        return Page(total, [r[1:] for r in rows], keys=[r[0] for r in rows])
@@ -0,0 +1,493 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Headless clients, for testing and benchmarking apps without a browser or a network.
+#
+# A Client joins a View or AsyncView in the same process, and speaks the same protocol as the browser: it sends Join,
+# Input, Switch and Query messages, and keeps track of what the browser would display by applying each Output (and
+# its edit) and Patch to its copy of the body. Boxes are kept as decoded dicts, with packed arrays unpacked to lists.
+#
+# An AsyncView is served as a task on the running event loop, so thousands of sessions can run concurrently in one
+# process; a View is served on a thread of its own.
+#
+# Example:
+#
+#     async def test_hello():
+#         client = Client(nitro)
+#         await client.join()
+#         assert 'What is your name?' in client.texts()
+#         await client.submit('Boaty')
+#         assert 'Hello, Boaty!' in client.texts()
+#         await client.close()
+#
+# simulate() runs a script against many concurrent sessions, and reports the latency of each interaction.
+
+import array
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from .core import View, AsyncView, Duplex, SyncDuplex, RemoteError, EditType, _MsgType, _PatchType, _Codec, \
+    _codec_of, _unmarshal
+
+_array_types = dict(i8='b', u8='B', i16='h', u16='H', i32='i', u32='I', f32='f', f64='d')
+
+
+def _unpack(x):
+    # Packed arrays ({dtype, buffer}) to lists, recursively.
+    if isinstance(x, dict):
+        buffer, dtype = x.get('buffer'), x.get('dtype')
+        if isinstance(buffer, bytes) and dtype in _array_types and len(x) == 2:
+            a = array.array(_array_types[dtype], buffer)
+            if sys.byteorder == 'big':
+                a.byteswap()
+            return a.tolist()
+        return {k: _unpack(v) for k, v in x.items()}
+    if isinstance(x, list):
+        return [_unpack(v) for v in x]
+    return x
+
+
+# Editing, as done by the browser: see client.ts.
+
+def _parse_selector(s: Optional[str]):
+    # Returns (position, names): position is one of '*' (inside), ':x' (before), 'x' (at) or 'x:' (after).
+    xs = (s or '*').replace(':', ' : ').split()
+    n = len(xs)
+    if xs[-1] == '*':
+        p = '*'
+    elif xs[-1] == ':':
+        p = 'x:'
+    elif n > 1 and xs[-2] == ':':
+        p = ':x'
+    else:
+        p = 'x'
+    return p, [x for x in xs if x not in ('*', ':')]
+
+
+def _query_container(boxes: list, s: List[str], i: int, imax: int) -> Optional[list]:
+    if not s:
+        return boxes
+    for b in boxes:
+        if not isinstance(b, dict):
+            continue
+        items = b.get('items')
+        if items is None:
+            continue
+        if b.get('name') == s[i]:
+            if i == imax:
+                return items
+            found = _query_container(items, s, i + 1, imax)
+            if found is not None:
+                return found
+        found = _query_container(items, s, i, imax)
+        if found is not None:
+            return found
+    return None
+
+
+def _query_box(boxes: list, name: str):
+    for i, b in enumerate(boxes):
+        if not isinstance(b, dict):
+            continue
+        if b.get('name') == name:
+            return boxes, i
+        items = b.get('items')
+        if items:
+            found = _query_box(items, name)
+            if found:
+                return found
+    return None
+
+
+def _edit(body: dict, b: dict, edit: dict) -> dict:
+    t = edit.get('t')
+    p, s = _parse_selector(edit.get('s'))
+    root = body.setdefault('items', [])
+    boxes = b.get('items') or []
+
+    if t == EditType.Append:
+        container = _query_container(root, s, 0, len(s) - 2) if len(s) > 1 else root
+        found = _query_box(container, s[-1]) if container is not None and s else None
+        if found:
+            parent, i = found
+            target = parent[i]
+            data = list(target.get('data') or []) + list(b.get('data') or [])
+            w = edit.get('w')
+            target['data'] = data[-w:] if w else data
+        return body
+
+    if p == '*':
+        parent = _query_container(root, s, 0, len(s) - 1)
+        if parent is None:
+            return body
+        if t == EditType.Update:
+            if parent is root:
+                return b
+            parent[:] = [b]
+        elif t == EditType.Insert:
+            parent.extend(boxes)
+        elif t == EditType.Remove:
+            parent.clear()
+        return body
+
+    container = _query_container(root, s, 0, len(s) - 2) if len(s) > 1 else root
+    found = _query_box(container, s[-1]) if container is not None else None
+    if not found:
+        return body
+    parent, i = found
+    n = len(boxes)
+    if t == EditType.Update:
+        if p == ':x':
+            if i - n < 0:
+                parent[0:i] = boxes
+            else:
+                parent[i - n:i] = boxes
+        elif p == 'x':
+            parent[i:i + n] = boxes
+        else:
+            parent[i + 1:i + 1 + n] = boxes
+    elif t == EditType.Insert:
+        if p == 'x:':
+            parent[i + 1:i + 1] = boxes
+        else:  # Before and at mean the same.
+            parent[i:i] = boxes
+    elif t == EditType.Remove:
+        if p == ':x':
+            del parent[0:i]
+        elif p == 'x':
+            del parent[i]
+        else:
+            del parent[i + 1:]
+    return body
+
+
+def _patch(body: dict, ops: list) -> dict:
+    for op in ops:
+        t, path = op[0], op[1]
+        parent = body
+        for i in path[:-1]:
+            parent = parent['items'][i]
+        if t == _PatchType.Set:
+            target = parent['items'][path[-1]] if path else parent
+            for k, v in op[2].items():
+                if v is None:
+                    target.pop(k, None)
+                else:
+                    target[k] = v
+        elif t == _PatchType.Insert:
+            parent.setdefault('items', []).insert(path[-1], op[2])
+        elif t == _PatchType.Replace:
+            if not path:
+                body = op[2]
+            else:
+                parent['items'][path[-1]] = op[2]
+        elif t == _PatchType.Remove:
+            del parent['items'][path[-1]]
+    return body
+
+
+def _clean_switch(method: str, params: Dict[str, str]) -> dict:
+    msg = dict(t=_MsgType.Switch, method=method)
+    if params:
+        msg['params'] = params
+    return msg
+
+
+def _walk(b, f: Callable):
+    if isinstance(b, dict):
+        f(b)
+        for x in b.get('items') or []:
+            _walk(x, f)
+
+
+class Client:
+    def __init__(
+            self,
+            view: Union[View, AsyncView],
+            context: Any = None,
+            locale: str = 'en-US',
+            codecs: Optional[Sequence[str]] = None,
+            patch: bool = True,
+            timeout: Optional[float] = 10,
+    ):
+        self._view = view
+        self._context = context
+        self._locale = locale
+        self._codecs = codecs
+        self._patch = patch
+        self._timeout = timeout  # Seconds to wait for the server to respond; None to wait forever.
+        self._codec: _Codec = _codec_of(codecs)
+        self._io: Optional[Union[Duplex, SyncDuplex]] = None
+        self._task: Optional[asyncio.Future] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._pages: Dict[int, asyncio.Future] = {}
+        self._query_id = 0
+        self.body: Optional[dict] = None  # The root box displayed
+        self.popup: Optional[dict] = None  # The popup displayed, if any
+        self.settings: dict = {}  # Settings received so far, merged
+        self.jumps: List[dict] = []  # Switch messages received: {method, params}
+        self.error: Optional[dict] = None  # Error received, if any: {code, text, trace}
+        self.outputs = 0  # Number of Output and Patch messages received
+        self.messages = 0  # Number of messages received
+        self.bytes = 0  # Bytes received
+        self.latencies: List[float] = []  # Seconds taken by each interaction to be answered
+
+    # Receiving.
+
+    def _receive(self, m):
+        self.messages += 1
+        self.bytes += len(m)
+        msg = _unmarshal(m, strict=False)  # Options may have non-string keys.
+        t = msg.get('t')
+        if t == _MsgType.Output:
+            b, edit = _unpack(msg.get('box')), msg.get('edit')
+            if b.get('popup'):
+                self.popup = b
+            else:
+                self.popup = None
+                self.body = _edit(self.body or dict(items=[]), b, edit) if edit else b
+            self.outputs += 1
+        elif t == _MsgType.Patch:
+            self.popup = None
+            self.body = _patch(self.body, _unpack(msg.get('ops')))
+            self.outputs += 1
+        elif t == _MsgType.Set:
+            self.settings.update(msg.get('settings') or {})
+        elif t == _MsgType.Page:
+            future = self._pages.pop(msg.get('id'), None)
+            if future and not future.done():
+                future.set_result(_unpack(msg))
+        elif t == _MsgType.Switch:
+            method, params = msg.get('method') or '', msg.get('params') or {}
+            self.jumps.append(dict(method=method, params=params))
+            # Like the browser, follow hashbang links (#!method?k=v) by switching.
+            if method.startswith('#!') and not params.get('target'):
+                method, _, q = method[2:].partition('?')
+                params = dict(kv.split('=', 1) for kv in q.split('&') if '=' in kv)
+                self._send(_clean_switch(method, params))
+        elif t == _MsgType.Error:
+            self.error = msg
+        self._changed.set()
+
+    def _receive_threadsafe(self, m):
+        self._loop.call_soon_threadsafe(self._receive, m)
+
+    async def _wait(self, outputs: int, timeout: Optional[float] = None):
+        # Wait until the number of outputs received reaches outputs.
+        timeout = self._timeout if timeout is None else timeout
+        deadline = None if timeout is None else self._loop.time() + timeout
+        while self.outputs < outputs:
+            if self.error:
+                raise RemoteError(f'{self.error.get("text")} (code {self.error.get("code")})')
+            self._changed.clear()
+            if deadline is None:
+                await self._changed.wait()
+            else:
+                await asyncio.wait_for(self._changed.wait(), max(deadline - self._loop.time(), 0))
+        if self.error:
+            raise RemoteError(f'{self.error.get("text")} (code {self.error.get("code")})')
+
+    # Sending.
+
+    def _send(self, msg: dict):
+        self._io.write(self._codec.marshal(msg))
+
+    async def _interact(self, msg: dict):
+        outputs = self.outputs + 1
+        start = time.perf_counter()
+        self._send(msg)
+        await self._wait(outputs)
+        self.latencies.append(time.perf_counter() - start)
+        return self.body
+
+    async def join(self, method: Optional[str] = None, params: Optional[Dict[str, str]] = None):
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        view = self._view
+        if isinstance(view, AsyncView):
+            self._io = Duplex(self._receive)
+            self._task = asyncio.ensure_future(view.serve(self._io.send, self._io.recv, self._context))
+        else:
+            self._io = SyncDuplex(self._receive_threadsafe)
+            self._thread = threading.Thread(
+                target=view.serve,
+                args=(self._io.send, self._io.recv, self._context),
+                daemon=True,
+            )
+            self._thread.start()
+        client = dict(locale=self._locale, patch=self._patch)
+        if self._codecs:
+            client['codecs'] = list(self._codecs)
+        msg = dict(t=_MsgType.Join, client=client)
+        if method:
+            msg['method'] = method
+        if params:
+            msg['params'] = params
+        return await self._interact(msg)
+
+    async def submit(self, *values):
+        # Send input values, in the order the browser would: the order of the input boxes displayed.
+        xid = (self.body or {}).get('xid')
+        return await self._interact(dict(t=_MsgType.Input, inputs=[[xid, v] for v in values]))
+
+    async def switch(self, method: str, params: Optional[Dict[str, str]] = None):
+        return await self._interact(_clean_switch(method, params))
+
+    async def wait(self, outputs: int = 1, timeout: Optional[float] = None):
+        # Wait for more outputs, like those written with read=False.
+        await self._wait(self.outputs + outputs, timeout)
+        return self.body
+
+    async def query(
+            self,
+            source: str,
+            offset: int = 0,
+            limit: int = 100,
+            sort: Optional[int] = None,
+            desc: bool = False,
+            filter: Optional[str] = None,
+            keys: bool = False,
+    ) -> dict:
+        self._query_id += 1
+        qid = self._query_id
+        future = self._pages[qid] = self._loop.create_future()
+        msg = dict(t=_MsgType.Query, id=qid, source=source, offset=offset, limit=limit)
+        if sort is not None:
+            msg['sort'] = sort
+        if desc:
+            msg['desc'] = True
+        if filter:
+            msg['filter'] = filter
+        if keys:
+            msg['keys'] = True
+        self._send(msg)
+        return await asyncio.wait_for(future, self._timeout)
+
+    async def close(self):
+        if self._io:
+            self._io.close()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, self._timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+        if self._thread:
+            await self._loop.run_in_executor(None, self._thread.join, self._timeout)
+
+    # Inspecting.
+
+    def find(self, name: Optional[str] = None, text: Optional[str] = None) -> Optional[dict]:
+        # The first box displayed with the given name, or containing the given text.
+        found = []
+
+        def match(b: dict):
+            if found:
+                return
+            if name is not None and b.get('name') != name:
+                return
+            if text is not None and not any(text in t for t in _texts_of(b)):
+                return
+            found.append(b)
+
+        _walk(self.popup or self.body, match)
+        return found[0] if found else None
+
+    def texts(self) -> List[str]:
+        # All text displayed, in order.
+        texts = []
+        _walk(self.popup or self.body, lambda b: texts.extend(_texts_of(b)))
+        return texts
+
+
+def _texts_of(b: dict) -> List[str]:
+    texts = [b[k] for k in ('text', 'title', 'caption') if isinstance(b.get(k), str)]
+    texts.extend(x for x in b.get('items') or [] if isinstance(x, str))
+    return texts
+
+
+class Report:  # Results of simulate()
+    def __init__(self, sessions: int, errors: List[BaseException], latencies: List[float], elapsed: float,
+                 messages: int, bytes: int, peak_memory: Optional[int]):
+        self.sessions = sessions  # Number of sessions run.
+        self.errors = errors  # Exceptions raised by failed sessions.
+        self.latencies = sorted(latencies)  # Seconds taken by each interaction, in ascending order.
+        self.elapsed = elapsed  # Seconds taken to run all sessions.
+        self.messages = messages  # Messages received by all clients.
+        self.bytes = bytes  # Bytes received by all clients.
+        self.peak_memory = peak_memory  # Peak memory allocated while running, in bytes, if traced.
+
+    def percentile(self, p: float) -> float:
+        xs = self.latencies
+        return xs[min(int(len(xs) * p / 100), len(xs) - 1)] if xs else 0.0
+
+    def __str__(self):
+        return (
+            f'{self.sessions} sessions, {len(self.errors)} failed, {len(self.latencies)} interactions'
+            f' in {self.elapsed:.2f}s; latency p50 {self.percentile(50) * 1e3:.2f}ms'
+            f', p95 {self.percentile(95) * 1e3:.2f}ms, p99 {self.percentile(99) * 1e3:.2f}ms'
+            f'; {self.bytes / max(self.messages, 1):.0f} bytes/message'
+            + (f'; peak memory {self.peak_memory / 2 ** 20:.1f}MB' if self.peak_memory is not None else '')
+        )
+
+
+async def simulate(
+        view: Union[View, AsyncView],
+        script: Callable[[Client], Awaitable],
+        sessions: int = 1,
+        concurrency: Optional[int] = None,
+        trace_memory: bool = False,
+        **kwargs,
+) -> Report:
+    # Run script(client) for each of the sessions, at most concurrency at a time (all at once if None). The script
+    # drives a client that has not joined yet; clients are closed once their script completes. Other keyword
+    # arguments are passed to each Client.
+    limit = asyncio.Semaphore(concurrency or sessions or 1)
+    clients = [Client(view, **kwargs) for _ in range(sessions)]
+    errors: List[BaseException] = []
+
+    async def run(client: Client):
+        async with limit:
+            try:
+                await script(client)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                await client.close()
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*[run(c) for c in clients])
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return Report(
+        sessions,
+        errors,
+        [t for c in clients for t in c.latencies],
+        elapsed,
+        sum(c.messages for c in clients),
+        sum(c.bytes for c in clients),
+        peak,
+    )
@@ -0,0 +1,120 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Trace files.
+#
+# TraceFile collects the spans of every session of a view, and writes them to a JSON file that can be opened without
+# a collector:
+#   - chrome: the Chrome trace event format, for chrome://tracing, https://ui.perfetto.dev or speedscope.
+#     Each session is a thread, so each interaction reads as a waterfall.
+#   - otlp: OpenTelemetry's OTLP/JSON encoding (an ExportTraceServiceRequest), for tools that import OTLP files.
+#     Each session is a trace.
+#
+#   tracer = TraceFile('nitro.trace.json')
+#   nitro = View(main, tracer=tracer, ...)
+#   ...
+#   tracer.save()  # e.g. at exit
+#
+# At most limit spans are kept; later spans are dropped, and counted.
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .core import Tracer
+from .version import __version__
+
+_formats = ('chrome', 'otlp')
+
+_Span = Tuple[int, str, str, float, float]  # session, method, name, start, end
+
+
+class TraceFile(Tracer):
+    def __init__(self, path: str, format: str = 'chrome', limit: int = 1_000_000):
+        if format not in _formats:
+            raise ValueError(f'unknown trace format {format!r}: want one of {", ".join(_formats)}')
+        self.path = path
+        self.format = format
+        self.limit = limit
+        self.dropped = 0
+        self._spans: List[_Span] = []
+        self._lock = threading.Lock()
+        # perf_counter() readings + offset = seconds since the epoch.
+        self._offset = time.time() - time.perf_counter()
+
+    def record(self, session: int, method: str, name: str, start: float, end: float):
+        with self._lock:
+            if len(self._spans) < self.limit:
+                self._spans.append((session, method, name, start, end))
+            else:
+                self.dropped += 1
+
+    def clear(self):
+        with self._lock:
+            self._spans = []
+            self.dropped = 0
+
+    def save(self, path: Optional[str] = None):
+        with self._lock:
+            spans = list(self._spans)
+        doc = self._chrome(spans) if self.format == 'chrome' else self._otlp(spans)
+        with open(path or self.path, 'w') as f:
+            json.dump(doc, f, separators=(',', ':'))
+
+    def _chrome(self, spans: List[_Span]) -> dict:
+        pid = os.getpid()
+        events = []
+        sessions = sorted({s[0] for s in spans})
+        for session in sessions:
+            events.append(dict(ph='M', name='thread_name', pid=pid, tid=session, args=dict(name=f'session {session}')))
+        offset = self._offset
+        for session, method, name, start, end in spans:
+            events.append(dict(
+                ph='X',
+                name=name,
+                cat='nitro',
+                pid=pid,
+                tid=session,
+                ts=round((start + offset) * 1e6, 1),
+                dur=round((end - start) * 1e6, 1),
+                args=dict(method=method),
+            ))
+        return dict(traceEvents=events, displayTimeUnit='ms')
+
+    def _otlp(self, spans: List[_Span]) -> dict:
+        offset = self._offset
+        traces: Dict[int, str] = {}
+        items = []
+        for session, method, name, start, end in spans:
+            trace_id = traces.get(session)
+            if trace_id is None:
+                trace_id = traces[session] = os.urandom(16).hex()
+            items.append(dict(
+                traceId=trace_id,
+                spanId=os.urandom(8).hex(),
+                name=name,
+                kind=1,  # internal
+                startTimeUnixNano=str(int((start + offset) * 1e9)),
+                endTimeUnixNano=str(int((end + offset) * 1e9)),
+                attributes=[
+                    dict(key='nitro.session', value=dict(intValue=str(session))),
+                    dict(key='nitro.method', value=dict(stringValue=method)),
+                ],
+            ))
+        return dict(resourceSpans=[dict(
+            resource=dict(attributes=[dict(key='service.name', value=dict(stringValue='nitro'))]),
+            scopeSpans=[dict(scope=dict(name='h2o_nitro', version=__version__), spans=items)],
+        )])
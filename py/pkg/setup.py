@@ -43,7 +43,10 @@ setup(
         web=[
             "msgpack>=1.0",
             f"h2o_nitro_web=={version}",
-        ]
+        ],
+        json=[
+            "orjson>=3.0",
+        ],
     ),
     license_files=('LICENSE',),
     classifiers=[
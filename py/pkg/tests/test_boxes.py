@@ -0,0 +1,101 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import pickle
+
+import pytest
+
+from h2o_nitro import box, row, col, option, header
+
+
+def _without_xids(d):
+    if isinstance(d, dict):
+        return {k: _without_xids(v) for k, v in d.items() if k != 'xid'}
+    if isinstance(d, list):
+        return [_without_xids(x) for x in d]
+    return d
+
+
+def test_box_dump():
+    b = row(box('Name', name='name', value='Boaty', placeholder='Your name'), 'Text', style='p-2')
+    d = b.dump()
+    assert isinstance(d['xid'], str) and isinstance(d['items'][0]['xid'], str)
+    assert list(d) == ['xid', 'mode', 'items', 'style']
+    assert _without_xids(d) == dict(
+        mode='row',
+        items=[dict(name='name', value='Boaty', items=['Name'], placeholder='Your name'), 'Text'],
+        style='p-2',
+    )
+
+
+def test_box_dump_options_and_columns():
+    assert _without_xids(box(mode='menu', value='a', options=[option('a', 'A', selected=True), 'b']).dump()) == dict(
+        mode='menu', value='a', options=[dict(value='a', text='A', selected=True), 'b'], items=[],
+    )
+    assert _without_xids(box(mode='table', columns=dict(x=[1, 2], y=['a', 'b'])).dump()) == dict(
+        mode='table', headers=[dict(text='x'), dict(text='y')], columns=[[1, 2], ['a', 'b']], items=[],
+    )
+
+
+def test_option_dump():
+    assert option('a').dump() == dict(value='a')
+    o = option('a', 'A', name='n', icon='Star', caption='C', hotkey='a', selected=True, disabled=False,
+               options=[option('b', 'B'), 'c'], route='orders/{id:int}')
+    assert o.dump() == dict(value='a', text='A', name='n', icon='Star', caption='C', hotkey='a', selected=True,
+                            disabled=False, options=[dict(value='b', text='B'), 'c'])
+
+
+def test_header_dump():
+    assert header('H').dump() == dict(text='H')
+    assert header('H', mode='md', style='s', icon='I').dump() == dict(text='H', mode='md', style='s', icon='I')
+
+
+def test_box_copies():
+    b = box('Hi', name='n', style='p-2')
+    c = b('Bye', title='T')
+    assert c.xid != b.xid
+    assert _without_xids(c.dump()) == dict(name='n', title='T', items=['Bye'], style='p-2')
+    c = b(style='p-4')
+    assert c.style == 'p-2 p-4'
+    c = b / 'p-4'
+    assert _without_xids(c.dump()) == dict(name='n', items=['Hi'], style='p-2 p-4')
+    assert b.style == 'p-2'
+
+
+@pytest.mark.parametrize('make', [
+    lambda: col(box('Hi', name='n'), box(mode='menu', options=(option('a', 'A', options=(option('b'),)),)),
+                box(mode='table', headers=[header('H', mode='md')], columns=[[1, 2]])),
+    lambda: option('a', 'A', options=[option('b', 'B')]),
+    lambda: header('H', mode='md', icon='I'),
+])
+@pytest.mark.parametrize('clone', [
+    lambda x: pickle.loads(pickle.dumps(x)),
+    copy.copy,
+    copy.deepcopy,
+], ids=['pickle', 'copy', 'deepcopy'])
+def test_pickle_and_copy(make, clone):
+    x = make()
+    y = clone(x)
+    assert y is not x and type(y) is type(x)
+    assert y.dump() == x.dump()
+
+
+@pytest.mark.parametrize('x', [box('Hi'), option('a'), header('H')], ids=['box', 'option', 'header'])
+def test_unknown_fields(x):
+    with pytest.raises(AttributeError):
+        x.colour = 'red'
+    with pytest.raises(AttributeError):
+        x.colour
+    assert not hasattr(x, '__dict__')
@@ -0,0 +1,143 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import queue
+import threading
+
+from h2o_nitro import View, AsyncView, Duplex, SyncDuplex, box
+from h2o_nitro.core import _MsgType, _codec_of, _unmarshal
+
+_codec = _codec_of(None)
+_join = _codec.marshal(dict(t=_MsgType.Join, client=dict(locale='en-US')))
+
+
+def _input(value):
+    return _codec.marshal(dict(t=_MsgType.Input, inputs=[[None, value]]))
+
+
+def _first_text(b):
+    x = b['items'][0]
+    return x if isinstance(x, str) else _first_text(x)
+
+
+def _texts(messages) -> list:  # The first text of each output.
+    return [_first_text(m['box']) for m in map(_unmarshal, messages) if m.get('t') == _MsgType.Output]
+
+
+async def _greet(view: AsyncView):
+    name = await view(box('Name?', value=''))
+    while True:
+        name = await view(f'Hello, {name}!', box('Name?', value=''))
+
+
+def _sync_greet(view: View):
+    name = view(box('Name?', value=''))
+    while True:
+        name = view(f'Hello, {name}!', box('Name?', value=''))
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_duplex_listener():
+    async def run():
+        received = []
+        io = Duplex(received.append)
+        task = asyncio.ensure_future(AsyncView(_greet).serve(io.send, io.recv))
+        io.write(_join)
+        await _settle()
+        assert _texts(received) == ['Name?']
+        for name in ('Boaty', 'Nemo'):
+            n = len(received)
+            io.write(_input(name))
+            await _settle()  # Handled as soon as written, without polling.
+            assert _texts(received[n:]) == [f'Hello, {name}!']
+        io.close()
+        await asyncio.wait_for(task, 1)
+        assert io.read() is None
+
+    asyncio.run(run())
+
+
+def test_duplex_read_and_listen():
+    async def run():
+        io = Duplex()
+        task = asyncio.ensure_future(AsyncView(_greet).serve(io.send, io.recv))
+        await _settle()
+        assert not task.done()  # Waiting for input.
+        io.write(_join)
+        io.write(_input('Boaty'))  # Queued until read.
+        await _settle()
+
+        first = io.read()
+        assert _unmarshal(first)['t'] == _MsgType.Set  # Join reply
+        received = []
+        io.listen(received.append)  # Flushes messages not read yet, in order.
+        assert _texts(received) == ['Name?', 'Hello, Boaty!']
+        io.write(_input('Nemo'))
+        await _settle()
+        assert _texts(received)[-1] == 'Hello, Nemo!'
+
+        io.listen(None)
+        io.write(_input('Sam'))
+        await _settle()
+        assert _texts([io.read()]) == ['Hello, Sam!']
+        assert io.read() is None
+        io.close()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(run())
+
+
+def test_sync_duplex():
+    received = queue.SimpleQueue()
+    io = SyncDuplex(received.put)
+    thread = threading.Thread(target=View(_sync_greet).serve, args=(io.send, io.recv), daemon=True)
+    thread.start()
+
+    def next_text():
+        while True:
+            texts = _texts([received.get(timeout=5)])
+            if texts:
+                return texts[0]
+
+    io.write(_join)
+    assert next_text() == 'Name?'
+    for name in ('Boaty', 'Nemo'):
+        io.write(_input(name))
+        assert next_text() == f'Hello, {name}!'
+    io.close()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_sync_duplex_read_and_listen():
+    io = SyncDuplex()
+    thread = threading.Thread(target=View(_sync_greet).serve, args=(io.send, io.recv), daemon=True)
+    thread.start()
+    io.write(_join)
+    io.write(_input('Boaty'))
+    io.close()
+    thread.join(5)
+    assert not thread.is_alive()
+
+    assert _unmarshal(io.read())['t'] == _MsgType.Set
+    assert _texts([io.read()]) == ['Name?']
+    received = []
+    io.listen(received.append)
+    assert _texts(received) == ['Hello, Boaty!']
+    assert io.read() is None
@@ -0,0 +1,133 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+import time
+
+from h2o_nitro import View, SyncDuplex, SessionExecutor
+from h2o_nitro.core import _MsgType, _codec_of, _unmarshal
+from h2o_nitro.executor import TRY_AGAIN_LATER
+
+_codec = _codec_of(None)
+
+
+def main(view: View):
+    if view.context == 'fails':
+        view('Failing', read=False)
+        raise ValueError('oops')
+    count = 0
+    while True:
+        count += 1
+        view(f'{view.context} {count}')
+
+
+def _wait_for(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+class _Connection:  # A browser connected to an executor, on a server thread of its own.
+    def __init__(self, executor: SessionExecutor, context: str):
+        self.received = queue.SimpleQueue()
+        self.closed = []
+        self.served = None
+        self._io = SyncDuplex(lambda m: self.received.put(_unmarshal(m)))
+        self._io.write(_codec.marshal(dict(t=_MsgType.Join, client=dict(locale='en-US'))))
+        self._thread = threading.Thread(target=self._serve, args=(executor, context), daemon=True)
+        self._thread.start()
+
+    def _serve(self, executor: SessionExecutor, context: str):
+        self.served = executor.serve(self._io.send, self._io.recv, context, close=self._close)
+
+    def _close(self, code: int, reason: str):
+        self.closed.append(code)
+
+    def text(self, timeout: float = 5) -> str:  # Text of the next output.
+        while True:
+            msg = self.received.get(timeout=timeout)
+            if msg.get('t') == _MsgType.Output:
+                return msg['box']['items'][0]
+
+    def submit(self) -> str:
+        self._io.write(_codec.marshal(dict(t=_MsgType.Input, inputs=[[None, None]])))
+        return self.text()
+
+    def close(self):
+        self._io.close()
+        self.join()
+
+    def join(self):
+        self._thread.join(5)
+        assert not self._thread.is_alive()
+
+
+def test_sessions_capped_and_queued():
+    sessions = SessionExecutor(View(main), max_sessions=2, max_queued=1, timeout=5)
+    a, b = _Connection(sessions, 'a'), _Connection(sessions, 'b')
+    assert a.text() == 'a 1' and b.text() == 'b 1'
+    assert sessions.active == 2
+
+    c = _Connection(sessions, 'c')
+    _wait_for(lambda: sessions.queued == 1)
+    d = _Connection(sessions, 'd')  # Turned away: the queue is full.
+    d.join()
+    assert d.served is False and d.closed == [TRY_AGAIN_LATER]
+    assert c.received.empty()
+
+    a.close()  # Makes room for c.
+    assert a.served is True
+    assert c.text() == 'c 1'
+    assert b.submit() == 'b 2' and c.submit() == 'c 2'
+    assert sessions.stats() == dict(active=2, queued=0, served=1, rejected=1)
+
+    b.close()
+    c.close()
+    assert sessions.stats() == dict(active=0, queued=0, served=3, rejected=1)
+
+
+def test_queued_connection_times_out():
+    sessions = SessionExecutor(View(main), max_sessions=1, max_queued=1, timeout=0.05)
+    a = _Connection(sessions, 'a')
+    assert a.text() == 'a 1'
+    b = _Connection(sessions, 'b')
+    b.join()
+    assert b.served is False and b.closed == [TRY_AGAIN_LATER]
+    assert a.submit() == 'a 2'  # Unaffected.
+    a.close()
+    assert sessions.stats() == dict(active=0, queued=0, served=1, rejected=1)
+
+
+def test_failing_session_isolated():
+    sessions = SessionExecutor(View(main), max_sessions=1, max_queued=1, timeout=5)
+    failing = _Connection(sessions, 'fails')
+    assert failing.text() == 'Failing'
+    a = _Connection(sessions, 'a')  # Queued behind the failing session,
+    failing.join()  # which ends, releasing its place.
+    assert failing.served is True and not failing.closed
+    assert a.text() == 'a 1'
+    assert a.submit() == 'a 2'
+    a.close()
+    assert sessions.stats() == dict(active=0, queued=0, served=2, rejected=0)
+
+
+def test_close_failure_ignored():
+    def close(code: int, reason: str):
+        raise ConnectionError()
+
+    sessions = SessionExecutor(View(main), max_sessions=0)
+    assert sessions.serve(lambda m: None, lambda: None, close=close) is False
+    assert sessions.stats()['rejected'] == 1
@@ -0,0 +1,89 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Frames: full views written with read=False by an AsyncView, which may be held back (frame_interval) or taken back
+# from the send queue (send_queue), and replaced, before they are sent.
+
+import asyncio
+
+from h2o_nitro import AsyncView, box, header
+from h2o_nitro.core import _MsgType, _SendQueue, _unmarshal
+
+
+def _table(label: str):
+    return box(mode='table', headers=[header('Name')], source=lambda q: (1, [[label]]))
+
+
+async def _query(view: AsyncView, source: str):
+    page = _unmarshal(await view._fetch(dict(t=_MsgType.Query, id=1, source=source, offset=0, limit=10)))
+    return page.get('error') or page['columns'][0][0]
+
+
+def _source_of(msg: dict) -> str:
+    return msg['box']['items'][0]['source']
+
+
+def test_coalesced_frames_keep_displayed_sources():
+    async def run():
+        sent = []
+
+        async def send(m):
+            sent.append(_unmarshal(m, strict=False))
+
+        view = AsyncView(lambda v: None, send=send, frame_interval=60)
+        view._frame_lock = asyncio.Lock()
+        await view._write(False, box(_table('A')), None)  # Sent right away,
+        await view._write(False, box(_table('B')), None)  # held back,
+        await view._write(False, box(_table('C')), None)  # and replaced.
+        assert len(sent) == 1
+        a = _source_of(sent[0])
+        assert await _query(view, a) == 'A'
+
+        await view._flush()
+        assert len(sent) == 2
+        c = _source_of(sent[1])
+        assert await _query(view, c) == 'C'
+        assert await _query(view, a) == 'A'  # Still served, until the next output.
+
+    asyncio.run(run())
+
+
+def test_queued_frames_keep_displayed_sources():
+    async def run():
+        sent = []
+        unblocked = asyncio.Event()
+
+        async def send(m):
+            sent.append(_unmarshal(m, strict=False))
+            if len(sent) > 1:
+                await unblocked.wait()
+
+        view = AsyncView(lambda v: None, send=send, send_queue=8)
+        await view._write(False, box(_table('A')), None)
+        view._queue = _SendQueue(view._send, 8, 4, None)
+        await view._write(False, box(_table('B')), None)
+        await asyncio.sleep(0)  # B is sent, and the connection stalls.
+        await view._write(False, box(_table('C')), None)  # Queued,
+        await view._write(False, box(_table('D')), None)  # and taken back.
+        assert len(sent) == 2
+        assert await _query(view, _source_of(sent[1])) == 'B'
+
+        unblocked.set()
+        await view._queue.join()
+        view._queue.cancel()
+        assert len(sent) == 3
+        assert await _query(view, _source_of(sent[1])) == 'B'
+        assert await _query(view, _source_of(sent[2])) == 'D'
+
+    asyncio.run(run())
@@ -0,0 +1,127 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from h2o_nitro import graphics
+from h2o_nitro.graphics import lttb, min_max, envelope, downsample
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_paths = [
+    pytest.param(True, id='numpy', marks=pytest.mark.skipif(np is None, reason='numpy is not installed')),
+    pytest.param(False, id='python'),
+]
+
+
+@pytest.fixture(params=_paths)
+def use_numpy(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(graphics, '_numpy', lambda: None)
+    return request.param
+
+
+def _series(m: int, seed: int = 42):
+    r = random.Random(seed)
+    ys = [0.0]
+    for _ in range(m - 1):
+        ys.append(ys[-1] + r.uniform(-1, 1))
+    return ys
+
+
+def _intervals(m: int):
+    return [[y - 0.5, y + 0.5] for y in _series(m)]
+
+
+def _values(xs):
+    return [float(x) for x in xs]
+
+
+def _without_numpy(monkeypatch, f, *args):
+    with monkeypatch.context() as m:
+        m.setattr(graphics, '_numpy', lambda: None)
+        return f(*args)
+
+
+@pytest.mark.parametrize('m, n', [(1000, 100), (1001, 37), (10, 3), (5, 4)])
+def test_lttb(use_numpy, m, n):
+    ys = _series(m)
+    out = _values(lttb(ys, n))
+    assert len(out) == n
+    assert out[0] == pytest.approx(ys[0]) and out[-1] == pytest.approx(ys[-1])
+    assert all(any(y == pytest.approx(x, rel=1e-6) for x in ys) for y in out)  # Points are picked, not averaged.
+
+
+@pytest.mark.parametrize('m, n', [(1000, 100), (1001, 37), (10, 4), (5, 4)])
+def test_min_max(use_numpy, m, n):
+    ys = _series(m)
+    out = _values(min_max(ys, n))
+    assert 0 < len(out) <= n
+    assert min(out) == pytest.approx(min(ys)) and max(out) == pytest.approx(max(ys))
+
+
+@pytest.mark.parametrize('m, n', [(1000, 100), (1001, 37), (10, 3)])
+def test_envelope(use_numpy, m, n):
+    xs = _intervals(m)
+    out = envelope(xs, n)
+    assert 0 < len(out) <= n
+    assert all(len(x) == 2 and x[0] <= x[1] for x in out)
+    assert out[0][0] == min(x[0] for x in xs[:-(-m // n)])  # The first bucket
+    assert min(x[0] for x in out) == min(x[0] for x in xs)
+    assert max(x[1] for x in out) == max(x[1] for x in xs)
+
+
+def test_short_series_unchanged(use_numpy):
+    ys = _series(10)
+    assert lttb(ys, 10) is ys
+    assert lttb(ys, 2) is ys
+    assert min_max(ys, 20) is ys
+    assert envelope(_intervals(3), 3) == _intervals(3)
+
+
+@pytest.mark.skipif(np is None, reason='numpy is not installed')
+@pytest.mark.parametrize('m, n', [(1000, 100), (1001, 37), (10, 4)])
+def test_numpy_and_python_agree(monkeypatch, m, n):
+    ys = _series(m)
+    assert _values(lttb(ys, n)) == _values(_without_numpy(monkeypatch, lttb, ys, n))
+    assert _values(min_max(ys, n)) == _values(_without_numpy(monkeypatch, min_max, ys, n))
+    xs = _intervals(m)
+    assert envelope(xs, n) == _without_numpy(monkeypatch, envelope, xs, n)
+
+
+def test_downsampled_follows_data(use_numpy):
+    ys = _series(1000)
+    d = downsample(ys, 100)
+    assert _values(d.dump())[-1] == pytest.approx(ys[-1])
+    ys.append(1000.0)
+    assert _values(d.dump())[-1] == 1000.0
+    ys[0] = -1000.0
+    assert _values(d.dump())[0] == -1000.0
+    d.method = 'minmax'
+    assert min(_values(d.dump())) == -1000.0
+
+
+def test_downsampled_intervals(use_numpy):
+    xs = _intervals(1000)
+    assert downsample(xs, 10, 'minmax').dump() == envelope(xs, 10)
+
+
+def test_downsample_unknown_method():
+    with pytest.raises(ValueError):
+        downsample([1, 2, 3], 2, 'average')
@@ -0,0 +1,97 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+from h2o_nitro import View, AsyncView, PrometheusMetrics, RemoteError, option
+from h2o_nitro.core import Tracer, _address_of
+from h2o_nitro.testing import Client
+
+
+def reports(view: View):
+    view('Reports')
+
+
+def order(view: View, id: int):
+    view(f'Order {id}')
+
+
+def main(view: View):
+    view('Home')
+
+
+async def async_order(view: AsyncView, id: int):
+    await view(f'Order {id}')
+
+
+async def async_main(view: AsyncView):
+    await view('Home')
+
+
+class _Methods(Tracer):  # Records the methods spans are labeled with.
+    def __init__(self):
+        self.methods = set()
+
+    def record(self, session: int, method: str, name: str, start: float, end: float):
+        self.methods.add(method)
+
+
+def test_methods_labeled_after_routing():
+    metrics = PrometheusMetrics()
+    nitro = View(main, routes=[option(reports), option(order, route='orders/{id:int}')], metrics=metrics)
+
+    async def run():
+        for method in (None, _address_of(reports)[2:], 'orders/42', 'orders/43'):
+            c = Client(nitro)
+            await c.join(method)
+            await c.submit(None)
+            await c.close()
+        for method in ('no/such/method', 'another/bogus/method'):
+            c = Client(nitro)
+            with pytest.raises(RemoteError):
+                await c.join(method)
+            await c.close()
+
+    asyncio.run(run())
+    assert sorted(metrics._methods) == sorted([
+        '',
+        _address_of(main),
+        _address_of(reports),
+        '#!orders/{id:int}',
+        'unknown',
+    ])
+    assert 'method="#!orders/{id:int}"' in metrics.render()
+
+
+@pytest.mark.parametrize('make', [
+    lambda **kwargs: View(main, routes=[option(order, route='orders/{id:int}')], **kwargs),
+    lambda **kwargs: AsyncView(async_main, routes=[option(async_order, route='orders/{id:int}')], **kwargs),
+], ids=['sync', 'async'])
+def test_routes_labeled_with_pattern(make):
+    metrics, tracer = PrometheusMetrics(), _Methods()
+    nitro = make(metrics=metrics, tracer=tracer)
+
+    async def run():
+        c = Client(nitro)
+        await c.join('orders/42')
+        assert c.texts() == ['Order 42']
+        await c.switch('orders/43')  # Switching mid-session, as when following a link.
+        assert c.texts() == ['Order 43']
+        await c.close()
+
+    asyncio.run(run())
+    assert set(metrics._methods) == {'', '#!orders/{id:int}'}
+    assert tracer.methods - {''} == {'#!orders/{id:int}'}
@@ -0,0 +1,86 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+from h2o_nitro import View, box, row
+from h2o_nitro.core import _MsgType, _PatchType, _codec_of, _unmarshal
+from h2o_nitro.testing import Client
+
+
+class _PatchCounter(Client):
+    patches = 0
+
+    def _receive(self, m):
+        if _unmarshal(m, strict=False).get('t') == _MsgType.Patch:
+            self.patches += 1
+        super()._receive(m)
+
+
+def test_patches_follow_changes_made_in_place():
+    todo = ['Milk']
+
+    def main(view: View):
+        while True:
+            view(row(*todo), box(options=todo))
+            todo.append(f'Item {len(todo)}')
+
+    async def run():
+        c = _PatchCounter(View(main))
+        await c.join()
+        for n in range(1, 5):
+            assert c.texts()[:n] == todo[:n]
+            assert c.body['items'][1]['options'] == todo
+            await c.submit(None)
+        await c.close()
+        return c
+
+    c = asyncio.run(run())
+    assert c.patches == 4
+
+
+def _outputs(*boxes, codec='msgpack'):
+    # Messages a patch-capable client would receive for boxes written one after the other.
+    view = View(lambda v: None)
+    view._patch = True
+    view._codec = _codec_of([codec])
+    return [_unmarshal(view._output(b, None), strict=False) for b in boxes]
+
+
+def test_patch_options_keyed_by_numbers():
+    for codec in ('msgpack', 'json'):
+        _, m = _outputs(
+            box(mode='menu', options={1: 'One', 2: 'Two'}),
+            box(mode='menu', options={1: 'One', 2: 'Two', 3: 'Three'}),
+            codec=codec,
+        )
+        assert m['t'] in (_MsgType.Output, _MsgType.Patch)
+
+
+def test_patch_user_data_keyed_xid():
+    # Only the xids of boxes are ignored; an "xid" in user data is compared like any other key.
+    _, m = _outputs(
+        box(mode='table', data=dict(xid=1, y=[1, 2, 3])),
+        box(mode='table', data=dict(xid=2, y=[1, 2, 3])),
+    )
+    assert m['t'] == _MsgType.Patch
+    assert m['ops'] == [[_PatchType.Set, [], dict(data=dict(xid=2, y=[1, 2, 3]))]]
+
+
+def test_patch_unchanged_boxes():
+    _, m = _outputs(
+        row(box('a'), box('b'), box(mode='table', data=dict(xid=1))),
+        row(box('a'), box('b'), box(mode='table', data=dict(xid=1))),
+    )
+    assert m == dict(t=_MsgType.Patch, ops=[])
@@ -0,0 +1,116 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+from h2o_nitro import box, row, col, option
+from h2o_nitro import core
+from h2o_nitro.core import Delegator, _address_of, _Sources
+
+
+def handler(view):
+    pass
+
+
+def _registered(d: Delegator) -> bool:
+    return _address_of(handler)[2:] in d._delegates
+
+
+def test_link_assigned_after_construction():
+    d = Delegator()
+    b = box('Go')
+    b.link = handler
+    d.scan(col(b))
+    assert _registered(d)
+    assert b.link == _address_of(handler)
+
+
+def test_link_assigned_after_scan():
+    d = Delegator()
+    b = box('Go')
+    tree = col(row(b), box('Other'))
+    d.scan(tree)
+    assert not _registered(d)
+    b.link = handler  # The ancestors of b were found to have nothing to register.
+    d.scan(tree)
+    assert _registered(d)
+
+
+def test_items_assigned_after_scan():
+    d = Delegator()
+    b = row(box('A'))
+    tree = col(b)
+    d.scan(tree)
+    b.items = (box('B', link=handler),)
+    d.scan(tree)
+    assert _registered(d)
+
+
+def test_options_changed_in_place_after_scan():
+    d = Delegator()
+    options = [option('a', 'A')]
+    tree = col(box(mode='menu', options=options))
+    d.scan(tree)
+    options.append(option(handler, 'Handler'))
+    d.scan(tree)
+    assert _registered(d)
+    assert options[1].value == _address_of(handler)
+
+
+def test_option_value_assigned_after_scan():
+    d = Delegator()
+    o = option('a', 'A')
+    tree = col(box(mode='menu', options=(o,)))
+    d.scan(tree)
+    o.value = handler
+    d.scan(tree)
+    assert _registered(d)
+
+
+def test_sources_registered_every_scan():
+    d = Delegator()
+    source = lambda q: (0, [])
+    tree = col(row(box(mode='table', source=source)), box('Other'))
+    for _ in range(3):
+        sources = _Sources()
+        d.scan(tree, sources)
+        assert sources.key_of(source) is not None
+
+
+def test_settled_subtrees_skipped():
+    d = Delegator()
+    b = box('Go', link=handler)
+    tree = col(row(b), box('Other'))
+    d.scan(tree)
+    assert _registered(d)
+    d._delegates.clear()
+    b._link = handler  # Bypasses tracking, so the settled tree is not rescanned.
+    d.scan(tree)
+    assert not _registered(d)
+
+
+def test_unpickled_scanned():
+    # A stamp could match a generation of another process: unpickled boxes and options are scanned afresh.
+    o = option('a')
+    tree = col(box(mode='menu', options=(o,)))
+    o.value = handler
+    data = pickle.dumps(tree)
+    g = core._generation
+    try:
+        core._generation = tree._scanned
+        d = Delegator()
+        d.scan(pickle.loads(data))
+        assert _address_of(handler)[2:] in d._delegates
+    finally:
+        core._generation = g
@@ -0,0 +1,119 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+from h2o_nitro import AsyncView
+from h2o_nitro.core import InterruptError, _MsgType, _SendQueue, _codec_of, _unmarshal
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+class _Gate:  # A send() that waits for each message to be let through.
+    def __init__(self):
+        self.sent = []
+        self._permits = asyncio.Semaphore(0)
+
+    async def send(self, m):
+        await self._permits.acquire()
+        self.sent.append(m)
+
+    async def allow(self, n: int = 1):
+        for _ in range(n):
+            self._permits.release()
+        await _settle()
+
+
+def test_watermarks():
+    async def run():
+        gate, lengths = _Gate(), []
+        q = _SendQueue(gate.send, 4, 1, lengths.append)
+        for i in range(4):
+            await q.put(i)
+        await _settle()  # 0 is being sent.
+        await q.put(4)
+        writer = asyncio.ensure_future(q.put(5))
+        await _settle()
+        assert not writer.done()  # Waiting for the high watermark.
+
+        await gate.allow(2)  # 3 and 4 queued, after sending 1: still above the low watermark.
+        assert gate.sent == [0, 1] and not writer.done()
+        await gate.allow(1)
+        assert not writer.done()
+        await gate.allow(1)  # 4 queued, after sending 3: down to the low watermark.
+        assert gate.sent == [0, 1, 2, 3] and writer.done()
+
+        await gate.allow(2)
+        await asyncio.wait_for(q.join(), 1)
+        assert gate.sent == [0, 1, 2, 3, 4, 5]
+        assert max(lengths) == 4 and lengths[-1] == 0
+        q.cancel()
+
+    asyncio.run(run())
+
+
+def test_failed_send_interrupts_writers():
+    async def run():
+        async def send(m):
+            raise ConnectionError()
+
+        q = _SendQueue(send, 2, 0, None)
+        await q.put(0)
+        await _settle()
+        with pytest.raises(InterruptError):
+            await q.put(1)
+        await asyncio.wait_for(q.join(), 1)  # Doesn't wait for messages that can't be sent.
+        q.cancel()
+
+    asyncio.run(run())
+
+
+def test_session_queue():
+    # A session writing faster than its client reads waits at the high watermark, and everything arrives in order.
+    async def main(view: AsyncView):
+        for i in range(20):
+            await view.add(f'Line {i}', read=False)
+        await view.add('Done')
+
+    async def run():
+        codec = _codec_of(None)
+        lengths, received = [], []
+        inputs = asyncio.Queue()
+
+        async def send(m):
+            await asyncio.sleep(0.001)
+            received.append(_unmarshal(m, strict=False))
+
+        async def recv():
+            return await inputs.get()
+
+        nitro = AsyncView(main, send_queue=4, on_send_queue=lambda v, n: lengths.append(n))
+        await inputs.put(codec.marshal(dict(t=_MsgType.Join, client=dict(locale='en-US'))))
+        task = asyncio.ensure_future(nitro.serve(send, recv))
+        while not (received and received[-1].get('box', {}).get('items') == ['Done']):
+            await asyncio.sleep(0.005)
+        await inputs.put(None)  # Ends the session.
+        await asyncio.wait_for(task, 5)
+        return lengths, received
+
+    lengths, received = asyncio.run(run())
+    outputs = [m['box']['items'][0] for m in received if m.get('t') == _MsgType.Output]
+    assert outputs == [f'Line {i}' for i in range(20)] + ['Done']
+    assert max(lengths) == 4
+    assert lengths[-1] == 0
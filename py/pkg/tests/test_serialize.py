@@ -0,0 +1,125 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# The msgpack writer (_marshal_output) must produce exactly the bytes of marshaling Box.dump().
+
+import array
+from collections import OrderedDict
+
+import pytest
+
+from h2o_nitro import box, row, col, option, header
+from h2o_nitro.core import _MsgType, _marshal, _marshal_output, Edit, EditType
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _expected(b, edit):
+    d = dict(t=_MsgType.Output, box=b.dump())
+    if edit:
+        d['edit'] = edit.dump()
+    return _marshal(d)
+
+
+def _table():
+    return box(
+        mode='table',
+        headers=[header('Flavor', mode='link'), header('Price'), header('Extras', mode='md')],
+        options=[option(f'r{i}', options=[f'Flavor {i}', f'${i * 1.5:.2f}', '*Extras*']) for i in range(20)],
+    )
+
+
+def _options():
+    return col(
+        box('List', mode='menu', options=['a', 'b', 'c']),
+        box('Tuple', mode='menu', options=('a', 'b')),
+        box('Dict', mode='menu', options=dict(a='A', b='B')),
+        box('Int keys', mode='menu', options={1: 'One', 2: 'Two'}),
+        box('Ordered', mode='check', options=OrderedDict(a='A', b='B')),
+        box('Set', mode='tag', value=['a'], options={'a', 'b'}),
+        box('Options', mode='menu', options=[option('a', 'A'), option('b', 'B', selected=True, icon='Star')]),
+        box('Nested', mode='menu', options=[option('a', 'A', options=[option('x', 'X'), 'y'])]),
+        box('Headers', mode='table', headers={header('Flavor')}),
+    )
+
+
+def _columns():
+    return col(
+        box(mode='table', headers=[header('x'), header('y')], columns=[[1, 2, 3], ['a', 'b', 'c']]),
+        box(mode='table', headers=[header('x')], columns=[array.array('d', [1.5, 2.5])]),
+        box(mode='table', headers=[header('x')], columns=[memoryview(array.array('i', [1, 2, 3]))]),
+        *([
+            box(mode='table', headers=[header('x')], columns=[np.arange(5, dtype=np.int32)]),
+            box(mode='table', headers=[header('x')], columns=dict(x=np.linspace(0, 1, 5), y=['a'] * 5)),
+        ] if np else []),
+    )
+
+
+def _graphics():
+    return box(
+        box(mode='g-line-y', data=[i % 7 / 7 for i in range(50)], style='stroke-sky-500'),
+        box(mode='g-line-y', data=array.array('d', [0.5, 1.5])),
+        box(mode='g-line-y', data=array.array('f', [0.5, 1.5])),
+        box(mode='g-line-y', data=memoryview(array.array('d', [0.5, 1.5]))),
+        *([
+            box(mode='g-line-y', data=np.linspace(0, 1, 10)),
+            box(mode='g-line-y', data=np.arange(10, dtype=np.int16)),
+            box(mode='g-line', data=np.arange(10.0).reshape(5, 2)),
+            box(mode='g-line', data=dict(x=np.arange(3), y=[1, 2, 3])),
+        ] if np else []),
+        box(mode='g-rect', data=dict(x=0, y=0, w=1, h=1), style='fill-sky-100'),
+        mode='svg',
+        style='w-64 h-32',
+    )
+
+
+def _nested():
+    return col(
+        row(
+            box('Amount', value=42, range=(0, 100), min=0, max=100, step=5),
+            box('Name', value='Boaty', placeholder='Name', style='w-32', error='Required'),
+            box('Range', value=(10, 20), range=(0, 100)),
+            box('Enabled', mode='toggle', value=True),
+        ),
+        row(col(row(box('Deep', link='#!deep'), 'text', 42))),
+        box('Titled', title='Title', caption='Caption', hint='Hint', help='Help', locale='fr-FR'),
+        box(['Yes', 'No']),
+        box(),
+    )
+
+
+_trees = dict(table=_table, options=_options, columns=_columns, graphics=_graphics, nested=_nested)
+
+_edits = [
+    None,
+    Edit(EditType.Insert, 'foo'),
+    Edit(EditType.Update),
+    Edit(EditType.Remove, 'foo'),
+    Edit(EditType.Append, 'foo', 100),
+]
+
+
+@pytest.mark.parametrize('tree', sorted(_trees))
+@pytest.mark.parametrize('edit', range(len(_edits)))
+def test_writer_matches_dump(tree: str, edit: int):
+    b, e = _trees[tree](), _edits[edit]
+    assert _marshal_output(b, e) == _expected(b, e)
+
+
+def test_writer_matches_dump_popup():
+    b = box(box('Are you sure?'), box(['Yes', 'No']), popup=True, title='Confirm')
+    assert _marshal_output(b, None) == _expected(b, None)
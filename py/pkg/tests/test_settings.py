@@ -0,0 +1,74 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+from h2o_nitro import View, option
+from h2o_nitro.core import _address_of
+from h2o_nitro.testing import Client
+
+
+def main(view: View):
+    view('Home')
+
+
+def reports(view: View):
+    view('Reports')
+
+
+def _menu_of(nitro: View) -> list:
+    async def run():
+        c = Client(nitro)
+        await c.join()
+        await c.close()
+        return [o.get('text') for o in c.settings.get('menu') or []]
+
+    return asyncio.run(run())
+
+
+def test_menu_changed_in_place():
+    menu = [option(main, text='Home')]
+    nitro = View(main, title='Hello', menu=menu)
+    assert _menu_of(nitro) == ['Home']
+
+    menu.append(option(reports, text='Reports'))
+    assert _menu_of(nitro) == ['Home']  # Cached.
+    nitro.invalidate()
+    assert _menu_of(nitro) == ['Home', 'Reports']
+
+    async def run():
+        c = Client(nitro)
+        await c.join(_address_of(reports)[2:])
+        assert c.texts() == ['Reports']
+        await c.close()
+
+    asyncio.run(run())
+
+
+def test_menu_option_changed_in_place():
+    menu = [option(main, text='Home')]
+    nitro = View(main, menu=menu)
+    assert _menu_of(nitro) == ['Home']
+
+    menu[0].text = 'Start'
+    nitro.invalidate()
+    assert _menu_of(nitro) == ['Start']
+
+
+def test_settings_reassigned():
+    nitro = View(main, menu=[option(main, text='Home')])
+    assert _menu_of(nitro) == ['Home']
+
+    nitro._menu = [option(main, text='Start')]
+    assert _menu_of(nitro) == ['Start']
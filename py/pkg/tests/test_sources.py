@@ -0,0 +1,212 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from h2o_nitro import View, box, header, Query, ListSource, ArraySource, SQLiteSource
+from h2o_nitro.testing import Client
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _table(label: str):
+    return box(mode='table', headers=[header('Name')], source=lambda q: (1, [[label]]))
+
+
+# Module-level boxes, reused across outputs and sessions.
+table_a = _table('A')
+table_b = _table('B')
+source_a = table_a.source
+
+
+def _cells(page: dict) -> list:
+    assert not page.get('error'), page.get('error')
+    return page['columns']
+
+
+def test_box_reused_across_outputs():
+    def main(view: View):
+        while True:
+            view(table_a)
+
+    async def run():
+        c = Client(View(main))
+        await c.join()
+        for _ in range(4):
+            source = c.body['items'][0]['source']
+            assert isinstance(source, str)
+            assert _cells(await c.query(source)) == [['A']]
+            await c.submit(None)
+        await c.close()
+
+    asyncio.run(run())
+    assert table_a.source is source_a
+
+
+def test_box_shared_by_sessions():
+    def main(view: View):
+        if view.context == 'b-first':
+            view(table_b)
+        while True:
+            view(table_a)
+
+    async def run():
+        nitro = View(main)
+        c1, c2 = Client(nitro), Client(nitro, context='b-first')
+        await c1.join()
+        await c2.join()
+        assert _cells(await c2.query(c2.body['items'][0]['source'])) == [['B']]
+        await c2.submit(None)
+        for c in (c1, c2, c1, c2):
+            assert _cells(await c.query(c.body['items'][0]['source'])) == [['A']]
+            await c.submit(None)
+        await c1.close()
+        await c2.close()
+
+    asyncio.run(run())
+    assert table_a.source is source_a
+
+
+# Flavors, with keys in insertion order; prices are distinct, calories are not.
+_flavors = [
+    ('Vanilla', 2.5, 200),
+    ('Chocolate', 3.0, 250),
+    ('Strawberry', 2.75, 200),
+    ('Mint Chocolate', 3.25, 250),
+    ('Lemon', 2.0, 150),
+    ('Coffee', 3.5, 200),
+]
+_keys = [10, 20, 30, 40, 50, 60]
+
+
+def _list_source():
+    return ListSource(_flavors, _keys)
+
+
+def _array_source():
+    return ArraySource(dict(name=[r[0] for r in _flavors], price=[r[1] for r in _flavors],
+                            calories=[r[2] for r in _flavors]), _keys)
+
+
+def _sqlite_source():
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE flavors (id INTEGER, name TEXT, price REAL, calories INTEGER)')
+    # Insert out of key order, so that the order of the table differs from the order of the keys.
+    db.executemany('INSERT INTO flavors VALUES (?, ?, ?, ?)',
+                   sorted(((k, *r) for k, r in zip(_keys, _flavors)), key=lambda r: -r[0]))
+    return SQLiteSource(db, 'flavors', ['name', 'price', 'calories'], key='id')
+
+
+_sources = [
+    _list_source,
+    pytest.param(_array_source, marks=pytest.mark.skipif(np is None, reason='numpy is not installed')),
+    _sqlite_source,
+]
+
+
+def _page(source, **kwargs):  # => (total, keys, rows)
+    page = source(Query(**kwargs))
+    keys = [int(k) for k in page.keys]
+    if kwargs.get('keys_only'):
+        assert page.rows is None and page.columns is None
+        return page.total, keys, None
+    if page.rows is not None:
+        rows = [tuple(r) for r in page.rows]
+    else:
+        rows = list(zip(*(c.tolist() for c in page.columns)))
+    assert len(rows) == len(keys)
+    return page.total, keys, rows
+
+
+def _rows(keys):
+    return [_flavors[_keys.index(k)] for k in keys]
+
+
+@pytest.mark.parametrize('make', _sources)
+def test_source_unsorted(make):
+    total, keys, rows = _page(make(), limit=100)
+    assert total == 6
+    assert keys == _keys
+    assert rows == _flavors
+
+
+@pytest.mark.parametrize('make', _sources)
+def test_source_paging(make):
+    source = make()
+    keys = []
+    for offset in range(0, 6, 4):
+        total, page_keys, rows = _page(source, offset=offset, limit=4)
+        assert total == 6
+        assert rows == _rows(page_keys)
+        keys.extend(page_keys)
+    assert keys == _keys
+    assert _page(source, offset=6, limit=4) == (6, [], [])
+
+
+@pytest.mark.parametrize('make', _sources)
+def test_source_sort(make):
+    source = make()
+    by_price = sorted(_keys, key=lambda k: _rows([k])[0][1])
+    assert _page(source, limit=100, sort=1)[1] == by_price
+    assert _page(source, limit=100, sort=1, desc=True)[1] == by_price[::-1]
+    assert _page(source, offset=2, limit=2, sort=1)[1] == by_price[2:4]
+    assert _page(source, offset=2, limit=2, sort=1, desc=True)[1] == by_price[::-1][2:4]
+
+    total, keys, rows = _page(source, limit=100, sort=0)
+    assert [r[0] for r in rows] == sorted(r[0] for r in _flavors)
+    assert rows == _rows(keys)
+
+
+@pytest.mark.parametrize('make', _sources)
+def test_source_sort_ties(make):  # Rows with equal cells keep their key order.
+    total, keys, rows = _page(make(), limit=100, sort=2)
+    assert keys == [50, 10, 30, 60, 20, 40]
+
+
+@pytest.mark.parametrize('make', _sources)
+def test_source_filter(make):
+    source = make()
+    assert _page(source, limit=100, filter='chocolate') == (2, [20, 40], _rows([20, 40]))
+    assert _page(source, limit=100, filter='CHOC', sort=1, desc=True) == (2, [40, 20], _rows([40, 20]))
+    assert _page(source, limit=1, offset=1, filter='choc') == (2, [40], _rows([40]))
+    assert _page(source, limit=100, filter='250')[1] == [20, 40]
+    assert _page(source, limit=100, filter='banana') == (0, [], [])
+
+
+@pytest.mark.parametrize('make', _sources)
+def test_source_keys_only(make):
+    source = make()
+    assert _page(source, keys_only=True) == (6, _keys, None)
+    assert _page(source, keys_only=True, sort=1, desc=True)[1] == [60, 40, 20, 30, 10, 50]
+    assert _page(source, keys_only=True, filter='o', sort=0) == (4, [20, 60, 50, 40], None)
+
+
+@pytest.mark.skipif(np is None, reason='numpy is not installed')
+def test_array_source_default_keys():
+    source = ArraySource([np.array([3, 1, 2]), ['c', 'a', 'b']])
+    assert _page(source, limit=100, sort=0) == (3, [1, 2, 0], [(1, 'a'), (2, 'b'), (3, 'c')])
+
+
+@pytest.mark.skipif(np is None, reason='numpy is not installed')
+def test_array_source_ragged():
+    with pytest.raises(ValueError):
+        ArraySource([[1, 2, 3], [1, 2]])
+    with pytest.raises(ValueError):
+        ArraySource([[1, 2, 3]], keys=[1, 2])
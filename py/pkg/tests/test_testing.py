@@ -0,0 +1,195 @@
+# Copyright 2022 H2O.ai, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+
+from h2o_nitro import View, AsyncView, box, row, col, option
+from h2o_nitro.core import _MsgType, _PatchType, _address_of, _unmarshal
+from h2o_nitro.testing import Client, _patch
+
+
+def _method(delegate) -> str:
+    return _address_of(delegate)[2:]
+
+
+def other(view: View):
+    while True:
+        view('Other')
+
+
+async def async_other(view: AsyncView):
+    while True:
+        await view('Other')
+
+
+def main(view: View):
+    name = view(box('What is your name?', value='Boaty'))
+    while True:
+        view(f'Hello, {name}!', box('Other', link=other))
+
+
+async def async_main(view: AsyncView):
+    name = await view(box('What is your name?', value='Boaty'))
+    while True:
+        await view(f'Hello, {name}!', box('Other', link=async_other))
+
+
+_views = [
+    lambda: View(main, menu=[option(other, 'Other')]),
+    lambda: AsyncView(async_main, menu=[option(async_other, 'Other')]),
+]
+_others = [other, async_other]
+
+
+@pytest.mark.parametrize('make', _views)
+def test_join_and_read(make):
+    async def run():
+        c = Client(make())
+        await c.join()
+        assert 'What is your name?' in c.texts()
+        await c.submit('Nemo')
+        assert 'Hello, Nemo!' in c.texts()
+        await c.submit(None)
+        assert 'Hello, Nemo!' in c.texts()
+        assert c.settings.get('menu')
+        assert c.outputs == 3
+        await c.close()
+        assert c.error is None
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('make, delegate', list(zip(_views, _others)))
+def test_join_method(make, delegate):
+    async def run():
+        c = Client(make())
+        await c.join(_method(delegate))
+        assert c.texts() == ['Other']
+        await c.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('make, delegate', list(zip(_views, _others)))
+def test_switch(make, delegate):
+    async def run():
+        c = Client(make())
+        await c.join()
+        await c.submit('Nemo')
+        await c.switch(_method(delegate))
+        assert c.texts() == ['Other']
+        await c.submit(None)
+        assert c.texts() == ['Other']
+        assert c.outputs == 4
+        await c.close()
+
+    asyncio.run(run())
+
+
+def test_jump_followed():
+    def jumper(view: View):
+        view.jump(other)
+
+    async def run():
+        c = Client(View(jumper, menu=[option(other, 'Other')]))
+        await c.join()
+        assert c.jumps == [dict(method=_address_of(other), params={})]
+        assert c.texts() == ['Other']
+        await c.close()
+
+    asyncio.run(run())
+
+
+def test_error_raised():
+    def fails(view: View):
+        view('Before')
+        raise ValueError('oops')
+
+    async def run():
+        c = Client(View(fails))
+        await c.join()
+        with pytest.raises(Exception, match='oops'):
+            await c.submit(None)
+        assert 'ValueError' in c.error.get('trace')
+        await c.close()
+
+    asyncio.run(run())
+
+
+def test_patch_ops():
+    body = dict(xid=1, items=[dict(text='a'), dict(items=[dict(text='b')])])
+    body = _patch(body, [
+        [_PatchType.Set, [0], dict(text='A', name='first')],
+        [_PatchType.Insert, [1, 1], dict(text='c')],
+        [_PatchType.Replace, [1, 0], dict(text='B')],
+        [_PatchType.Set, [], dict(xid=2)],
+    ])
+    assert body == dict(xid=2, items=[dict(text='A', name='first'), dict(items=[dict(text='B'), dict(text='c')])])
+    body = _patch(body, [
+        [_PatchType.Remove, [1, 1]],
+        [_PatchType.Set, [0], dict(name=None)],
+    ])
+    assert body == dict(xid=2, items=[dict(text='A'), dict(items=[dict(text='B')])])
+    assert _patch(body, [[_PatchType.Replace, [], dict(text='new')]]) == dict(text='new')
+
+
+def _strip(b):  # Box ids differ across sessions.
+    if isinstance(b, dict):
+        return {k: _strip(v) for k, v in b.items() if k != 'xid'}
+    if isinstance(b, list):
+        return [_strip(x) for x in b]
+    return b
+
+
+def test_patches_applied_like_outputs():
+    def changes(view: View):
+        views = [
+            (row('a', 'b'), box(mode='menu', options={1: 'One', 2: 'Two'})),
+            (row('a', 'b', 'c'), box(mode='menu', options={1: 'One', 2: 'Two', 3: 'Three'})),
+            (row('a', 'c'), box(mode='menu', value=2, options={1: 'One', 2: 'Two'})),
+            (col('x'), box(mode='menu', value=2, options={1: 'One', 2: 'Two'})),
+            (col('x'), box('Added'), box(mode='menu', options={2: 'Two'})),
+            ('Replaced',),
+        ]
+        for items in views:
+            view(*items)
+        while True:
+            view('Done')
+
+    class PatchCounter(Client):
+        patches = 0
+
+        def _receive(self, m):
+            if _unmarshal(m, strict=False).get('t') == _MsgType.Patch:
+                self.patches += 1
+            super()._receive(m)
+
+    async def run():
+        patched, output = PatchCounter(View(changes)), PatchCounter(View(changes), patch=False)
+        await patched.join()
+        await output.join()
+        for _ in range(6):
+            assert _strip(patched.body) == _strip(output.body)
+            await patched.submit(None)
+            await output.submit(None)
+        assert patched.texts() == ['Done']
+        await patched.close()
+        await output.close()
+        assert patched.error is None and output.error is None
+        assert output.patches == 0
+        return patched.patches
+
+    assert asyncio.run(run()) >= 5
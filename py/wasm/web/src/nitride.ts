@@ -50,6 +50,7 @@ type Command = {
 type NitrideIO = {
   read(): S
   write(data: S): void
+  listen?(listener: (data: S) => void): void
 }
 
 const pollInterval = 100
@@ -146,14 +147,22 @@ async function init(command: Command) {
   self.pyodide = pyodide
   self.io = pyodide.globals.get('_nitro_io')
 
+  const post = (message: S) => {
+    const execute: Command = { t: CommandT.Execute, message }
+    self.postMessage(execute)
+  }
+
   clearInterval(_poller)
-  _poller = setInterval(() => {
-    const message = self.io.read()
-    if (message) {
-      const execute: Command = { t: CommandT.Execute, message }
-      self.postMessage(execute)
-    }
-  }, pollInterval)
+  if (self.io.listen) {
+    // Post messages as soon as they are sent.
+    self.io.listen(post)
+  } else {
+    // Older versions of h2o_nitro can only be polled.
+    _poller = setInterval(() => {
+      const message = self.io.read()
+      if (message) post(message)
+    }, pollInterval)
+  }
 }
 
 self.onmessage = async (event) => {
@@ -0,0 +1,166 @@
+# Opens many websocket clients against a Nitro server, and replays an interaction script with each:
+#
+#   python loadtest.py ws://localhost:5000/nitro --clients 500 --script hello.json --pid $(pgrep -f hello_starlette)
+#
+# A script is a JSON list of steps, sent in order:
+#
+#   {"t": "join", "method": "#!foo", "params": {"k": "v"}}   Join; method and params are optional.
+#   {"t": "input", "values": ["Boaty", 42]}                    Input, with values in the order of the input boxes.
+#   {"t": "switch", "method": "#!bar", "params": {"k": "v"}}   Switch to another workflow.
+#
+# The round-trip latency of a step is the time from sending it to receiving the next Output or Patch.
+# The server's resident memory (RSS) is sampled from /proc on Linux, if its --pid is given.
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import List, Optional
+
+import msgpack
+import websockets
+
+Output, Patch, Error, Join, Switch, Input = 5, 7, 1, 2, 3, 4
+
+
+def encode(codec: str, msg: dict):
+    return json.dumps(msg) if codec == 'json' else msgpack.packb(msg)
+
+
+def decode(m) -> dict:
+    return json.loads(m) if isinstance(m, str) else msgpack.unpackb(m)
+
+
+def to_message(step: dict) -> dict:
+    t = step['t']
+    if t == 'input':
+        return dict(t=Input, inputs=[['', v] for v in step.get('values', [])])
+    msg = dict(t=Join if t == 'join' else Switch)
+    method = step.get('method')
+    if method:
+        msg['method'] = method[2:] if method.startswith('#!') else method
+    if step.get('params'):
+        msg['params'] = step['params']
+    return msg
+
+
+def rss_of(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.messages = 0
+        self.bytes = 0
+        self.errors: List[str] = []
+        self.rss: List[int] = []
+
+
+async def run_client(url: str, script: List[dict], codec: str, iterations: int, stats: Stats):
+    async with websockets.connect(url, max_size=None) as ws:
+        async def respond():
+            while True:
+                m = await ws.recv()
+                stats.messages += 1
+                stats.bytes += len(m)
+                msg = decode(m)
+                t = msg.get('t')
+                if t in (Output, Patch):
+                    return
+                if t == Error:
+                    raise RuntimeError(msg.get('text'))
+
+        steps = [s for s in script if s['t'] != 'join']
+        join = next((s for s in script if s['t'] == 'join'), dict(t='join'))
+        msg = to_message(join)
+        msg['client'] = dict(locale='en-US', patch=True, codecs=[codec])
+        for i, step in enumerate([join] + steps * iterations):
+            start = time.perf_counter()
+            await ws.send(encode(codec, msg if i == 0 else to_message(step)))
+            await respond()
+            stats.latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    with open(args.script) as f:
+        script = json.load(f)
+    stats = Stats()
+
+    async def client(delay: float):
+        await asyncio.sleep(delay)
+        try:
+            await run_client(args.url, script, args.codec, args.iterations, stats)
+        except Exception as e:
+            stats.errors.append(f'{type(e).__name__}: {e}')
+
+    async def sample():
+        while True:
+            rss = rss_of(args.pid)
+            if rss is not None:
+                stats.rss.append(rss)
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.ensure_future(sample()) if args.pid else None
+    start = time.perf_counter()
+    await asyncio.gather(*[client(args.ramp * i / args.clients) for i in range(args.clients)])
+    elapsed = time.perf_counter() - start
+    if sampler:
+        sampler.cancel()
+    return stats, elapsed
+
+
+def percentile(xs: List[float], p: float) -> float:
+    return xs[min(int(len(xs) * p / 100), len(xs) - 1)] if xs else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Nitro websocket load generator')
+    parser.add_argument('url', nargs='?', default='ws://localhost:5000/nitro', help='websocket endpoint')
+    parser.add_argument('--clients', type=int, default=100, help='number of concurrent clients')
+    parser.add_argument('--script', default=os.path.join(os.path.dirname(__file__), 'hello.json'),
+                        help='interaction script (JSON)')
+    parser.add_argument('--iterations', type=int, default=1, help='times to replay the steps after join')
+    parser.add_argument('--ramp', type=float, default=0, help='seconds over which to start clients')
+    parser.add_argument('--codec', choices=['msgpack', 'json'], default='msgpack', help='message encoding; json needs an adapter that accepts text frames')
+    parser.add_argument('--pid', type=int, help='server process ID, to sample its RSS')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    stats, elapsed = asyncio.run(run(args))
+    xs = sorted(stats.latencies)
+    results = dict(
+        clients=args.clients,
+        failed=len(stats.errors),
+        interactions=len(xs),
+        seconds=round(elapsed, 3),
+        throughput=round(len(xs) / elapsed, 1) if elapsed else 0,
+        p50_ms=round(percentile(xs, 50) * 1e3, 3),
+        p95_ms=round(percentile(xs, 95) * 1e3, 3),
+        p99_ms=round(percentile(xs, 99) * 1e3, 3),
+        mean_ms=round(statistics.mean(xs) * 1e3, 3) if xs else 0,
+        messages=stats.messages,
+        bytes_per_message=round(stats.bytes / stats.messages, 1) if stats.messages else 0,
+        rss_peak_mb=round(max(stats.rss) / 2 ** 20, 1) if stats.rss else None,
+        rss_final_mb=round(stats.rss[-1] / 2 ** 20, 1) if stats.rss else None,
+    )
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for k, v in results.items():
+            print(f'{k:<20} {v}')
+        for e in sorted(set(stats.errors))[:10]:
+            print(f'error: {e}')
+
+
+if __name__ == '__main__':
+    main()
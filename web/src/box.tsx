@@ -43,7 +43,7 @@ import { Slider } from './slider';
 import { Spinbox } from './spinbox';
 import { Spinner } from './spinner';
 import { SVGBox } from './svg';
-import { Table } from './table';
+import { SourcedTable, Table } from './table';
 import { TagPicker } from './tag_picker';
 import { Textbox } from './textbox';
 import { TextBlock } from './text_block';
@@ -124,7 +124,9 @@ export const XBox = ({ context: root, box }: BoxProps) => { // recursive
     || modes.has('blocked')
     || modes.has('error')
   ) return <Banner context={context} box={box} />
-  if (modes.has('table')) return <Table context={context} box={box} />
+  if (modes.has('table')) return box.source && !box.options && !box.columns
+    ? <SourcedTable context={context} box={box} />
+    : <Table context={context} box={box} />
   if (modes.has('tag')) return <TagPicker context={context} box={box} />
   if (modes.has('text') || modes.has('password')) return <Textbox context={context} box={box} />
   if (modes.has('time')) return <TimePicker context={context} box={box} />
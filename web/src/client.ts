@@ -13,11 +13,12 @@
 // limitations under the License.
 
 import hotkeys from "hotkeys-js";
-import { B, Dict, isS, noop, on, S, Signal, signal, U, V } from './core';
-import { formatter } from "./format";
-import { freeze, mergeBoxes, sanitizeBox, sanitizeHelp, sanitizeOptions } from './heuristics';
+import { B, Dict, isO, isS, noop, on, S, Signal, signal, U, V, xid } from './core';
+import { fallbacksOf, formatter } from "./format";
+import { appendSeries } from './graphics';
+import { freeze, mergeBoxes, sanitizeBox, sanitizeHelp, sanitizeOptions, sanitizeSeries } from './heuristics';
 import { installPlugins } from './plugin';
-import { Box, BoxT, DisplayMode, Edit, EditType, Input, InputValue, Message, MessageType, Option, Server, ServerEvent, ServerEventT, Theme, Translation } from './protocol';
+import { Box, BoxT, DisplayMode, Edit, EditType, Input, InputValue, Message, MessageType, Option, Page, PatchOp, PatchType, Query, Server, ServerEvent, ServerEventT, Theme, Translation } from './protocol';
 import { applyTheme } from './theme';
 import { Context } from "./ui";
 
@@ -96,11 +97,12 @@ type ContextState = {
   commitE: Signal<Input[]>
   helpE: Signal<S>
   hotkey(chord: S, callback: () => void): () => void
+  fetch(query: Query): Promise<Page>
 }
 
 const newContext = (state: ContextState, index: any, xid: S): Context => {
   const
-    { inputs, switchE, commitE, helpE, hotkey } = state,
+    { inputs, switchE, commitE, helpE, hotkey, fetch } = state,
     capture = (index: any, xid: S, value: InputValue) => {
       if (index >= 0) inputs[index] = [xid, value]
     },
@@ -115,7 +117,7 @@ const newContext = (state: ContextState, index: any, xid: S): Context => {
       switchE({ method, params })
     },
     scoped = (index: any, xid: S): Context => newContext(state, index, xid)
-  return { scoped, record, commit, switch: change, help: helpE, hotkey }
+  return { scoped, record, commit, switch: change, help: helpE, hotkey, fetch }
 }
 
 const parseSwitch = (): Switch | null => {
@@ -139,6 +141,17 @@ const parseSwitch = (): Switch | null => {
   return null
 }
 
+// Append points to the data of the box named by the selector, in place.
+const appendTo = (root: Box[], s: S[], points: any, window?: U) => {
+  if (!s.length) return
+  const container = s.length > 1 ? queryContainer(root, s, 0, s.length - 2) : root
+  if (!container) return
+  const target = queryBox(container, s[s.length - 1])
+  if (!target) return
+  const [parent, i] = target, box = parent[i]
+  box.data = appendSeries(box.data, sanitizeSeries(points), window)
+}
+
 const sanitizeEdit = (e?: Edit): SanitizedEdit => {
   if (!e) return defaultEdit
   const
@@ -199,12 +212,94 @@ const toTranslationLookup = (bs: Translation[]) => {
   return d
 }
 
+// Deep-copy raw (unsanitized) data; sanitization modifies boxes in-place.
+const cloneData = (x: any): any => { // recursive
+  if (Array.isArray(x)) return x.map(cloneData)
+  if (ArrayBuffer.isView(x)) return x // binary data is never modified
+  if (isO(x)) {
+    const d: Dict<any> = {}
+    for (const k in x) d[k] = cloneData(x[k])
+    return d
+  }
+  return x
+}
+
+// Like cloneData(), but assigns fresh xids, so that unchanged boxes are re-mounted, exactly as with a full output.
+const cloneBox = (x: any): any => { // recursive
+  if (!isO(x) || Array.isArray(x)) return cloneData(x)
+  const b: Dict<any> = {}
+  for (const k in x) {
+    const v = x[k]
+    b[k] = k === 'items' && Array.isArray(v) ? v.map(cloneBox) : cloneData(v)
+  }
+  b.xid = xid()
+  return b
+}
+
+// Collect the locales of a raw (unsanitized) box and its descendants.
+const collectLocales = (x: any, locales: Set<S>) => { // recursive
+  if (!isO(x) || Array.isArray(x)) return
+  const { locale, items } = x as any
+  if (isS(locale)) locales.add(locale)
+  else if (Array.isArray(locale)) for (const l of locale) if (isS(l)) locales.add(l)
+  if (Array.isArray(items)) for (const item of items) collectLocales(item, locales)
+}
+
+const locate = (box: any, path: U[], n: U): any => {
+  for (let i = 0; i < n; i++) box = box.items[path[i]]
+  return box
+}
+
+const applyPatch = (root: Box, ops: PatchOp[]) => {
+  for (const op of ops) {
+    const
+      path = op[1],
+      n = path.length - 1
+    switch (op[0]) {
+      case PatchType.Set:
+        {
+          const
+            box = locate(root, path, path.length),
+            attrs = op[2]
+          for (const k in attrs) {
+            const v = attrs[k]
+            if (v === null) {
+              delete box[k]
+            } else {
+              box[k] = v
+            }
+          }
+        }
+        break
+      case PatchType.Insert:
+        locate(root, path, n).items.splice(path[n], 0, op[2])
+        break
+      case PatchType.Replace:
+        locate(root, path, n).items[path[n]] = op[2]
+        break
+      case PatchType.Remove:
+        locate(root, path, n).items.splice(path[n], 1)
+        break
+    }
+  }
+}
+
 export const defaultLayout: Box = { xid: '', index: 0, modes: new Set<BoxT>([]) }
 
 export const newClient = (server: Server) => {
+  let
+    lastBody: Box | null = null, // raw copy of last body received, for applying patches
+    lastQueryID = 0,
+    translations: Dict<Translation> = toTranslationLookup([emptyTranslation]),
+    available = new Set<S>(), // locales the server has translations for
+    rendering: Promise<void> | null = null // renders waiting for translations, in order
+
   const
     body: Box[] = [],
     popup: Box[] = [],
+    queries = new Map<U, (page: Page) => void>(), // pending queries, by id
+    loads = new Map<S, Promise<void>>(), // translations requested, by locale
+    loaded = new Map<S, () => void>(), // pending translation requests, by locale
     titleB = signal('H2O Nitro'),
     captionB = signal('v0.1.0'),
     menuB = signal<Option[]>([]),
@@ -212,7 +307,7 @@ export const newClient = (server: Server) => {
     themeB = signal<Theme>({}),
     layoutB = signal<Box>(defaultLayout),
     modeB = signal<DisplayMode>('normal'),
-    formatterB = signal(formatter(toTranslationLookup([emptyTranslation]), emptyTranslation.locale)),
+    formatterB = signal(formatter(translations, emptyTranslation.locale)),
     busyB = signal<B>(true, () => false),
     inputs: Input[] = [],
     switchE = signal<Switch>(),
@@ -230,7 +325,52 @@ export const newClient = (server: Server) => {
       })
       return () => hotkeys.unbind(chord)
     },
-    context = newContext({ inputs, commitE, switchE, helpE, hotkey }, -1, ''),
+    fetch = (query: Query) => new Promise<Page>(resolve => {
+      const id = ++lastQueryID
+      queries.set(id, resolve)
+      server.send({ t: MessageType.Query, id, ...query })
+    }),
+    cancelQueries = (error: S) => {
+      for (const resolve of queries.values()) resolve({ error })
+      queries.clear()
+    },
+    load = (locale: S): Promise<void> | undefined => {
+      if (!fallbacksOf(locale).some(l => available.has(l) && !translations[l])) return
+      let p = loads.get(locale)
+      if (!p) {
+        p = new Promise<void>(resolve => loaded.set(locale, resolve))
+        loads.set(locale, p)
+        server.send({ t: MessageType.Load, locale })
+      }
+      return p
+    },
+    cancelLoads = () => {
+      for (const resolve of loaded.values()) resolve()
+      loaded.clear()
+      loads.clear()
+    },
+    // Only the translations for the client's locale are sent up front; load any others a box needs before rendering.
+    renderLoaded = (rawBody: Box, rawEdit?: Edit) => {
+      const
+        locales = new Set<S>(),
+        pending: Promise<void>[] = []
+      collectLocales(rawBody, locales)
+      for (const locale of locales) {
+        const p = load(locale)
+        if (p) pending.push(p)
+      }
+      if (!pending.length && !rendering) {
+        render(rawBody, rawEdit)
+        return
+      }
+      const r: Promise<void> = (rendering ?? Promise.resolve())
+        .then(() => Promise.all(pending))
+        .then(() => render(rawBody, rawEdit))
+        .catch(e => console.error(e))
+        .then(() => { if (rendering === r) rendering = null })
+      rendering = r
+    },
+    context = newContext({ inputs, commitE, switchE, helpE, hotkey, fetch }, -1, ''),
     stateB = signal<ClientState>({ t: ClientStateT.Connecting }),
     connect = () => {
       server.connect(handleEvent)
@@ -242,12 +382,115 @@ export const newClient = (server: Server) => {
         context.switch(method, params)
       }
     },
+    render = (rawBody: Box, rawEdit?: Edit) => {
+      if (rawEdit?.t === EditType.Append) {
+        appendTo(body[0]?.items ?? [], sanitizeEdit(rawEdit).s, rawBody.data, rawEdit.w)
+        busyB(false)
+        return
+      }
+      const
+        layout = layoutB(),
+        rawBox = layout === defaultLayout ? rawBody : mergeBoxes(layout, rawBody),
+        box = sanitizeBox(formatterB(), rawBox),
+        boxes = box.items ?? [],
+        root = body[0]?.items ?? []
+      if (box.popup) {
+        popup.length = 0
+        popup.push(box)
+        freeze(popup)
+      } else {
+        popup.length = 0 // clear any existing popup
+
+        const edit = sanitizeEdit(rawEdit)
+
+        if (edit.p === EditPosition.Inside) {
+          const parent = queryContainer(root, edit.s, 0, edit.s.length - 1)
+          if (parent) {
+            switch (edit.t) {
+              case EditType.Update:
+                if (parent === root) {
+                  // Default case: clobber body
+                  body.length = 0
+                  body.push(box)
+                } else {
+                  parent.length = 0
+                  parent.push(box)
+                }
+                break
+              case EditType.Insert:
+                parent.push(...boxes)
+                break
+              case EditType.Remove:
+                parent.length = 0
+                break
+            }
+          }
+        } else {
+          const container = edit.s.length > 1 ? queryContainer(root, edit.s, 0, edit.s.length - 2) : root
+          if (container) {
+            const target = queryBox(container, edit.s[edit.s.length - 1])
+            if (target) {
+              const [parent, i] = target
+              switch (edit.t) {
+                case EditType.Update:
+                  switch (edit.p) {
+                    case EditPosition.Before:
+                      if (i - boxes.length < 0) {
+                        parent.splice(0, i, ...boxes)
+                      } else {
+                        parent.splice(i - boxes.length, boxes.length, ...boxes)
+                      }
+                      break
+                    case EditPosition.At:
+                      parent.splice(i, boxes.length, ...boxes)
+                      break
+                    case EditPosition.After:
+                      parent.splice(i + 1, boxes.length, ...boxes)
+                      break
+                  }
+                  break
+                case EditType.Insert:
+                  switch (edit.p) {
+                    // "before" and "at" mean the same, otherwise gets unintuitive
+                    case EditPosition.Before:
+                    case EditPosition.At:
+                      parent.splice(i, 0, ...boxes)
+                      break
+                    case EditPosition.After:
+                      parent.splice(i + 1, 0, ...boxes)
+                      break
+                  }
+                  break
+                case EditType.Remove:
+                  switch (edit.p) {
+                    case EditPosition.Before:
+                      parent.splice(0, i)
+                      break
+                    case EditPosition.At:
+                      parent.splice(i, 1)
+                      break
+                    case EditPosition.After:
+                      parent.splice(i + 1, parent.length - i)
+                      break
+                  }
+                  break
+              }
+            }
+          }
+        }
+        freeze(body)
+      }
+      busyB(false)
+    },
     handleEvent = (e: ServerEvent) => {
       switch (e.t) {
         case ServerEventT.Connect:
+          lastBody = null
+          cancelQueries('reconnected')
+          cancelLoads()
           if (server) {
             const
-              join: Message = { t: MessageType.Join, client: { locale: clientLocale } },
+              join: Message = { t: MessageType.Join, client: { locale: clientLocale, patch: true } },
               rpc = parseSwitch()
             if (rpc) {
               const { method, params } = rpc
@@ -267,101 +510,43 @@ export const newClient = (server: Server) => {
                 server.disconnect()
                 break
               case MessageType.Output:
+                {
+                  const { box, edit } = msg
+                  if (!box.popup) lastBody = edit ? null : cloneData(box) // popups don't modify the body
+                  renderLoaded(box, edit)
+                }
+                break
+              case MessageType.Patch:
+                {
+                  if (!lastBody) {
+                    stateB({ t: ClientStateT.Invalid, error: 'cannot apply patch: no previous output' })
+                    server.disconnect()
+                    break
+                  }
+                  applyPatch(lastBody, msg.ops)
+                  renderLoaded(cloneBox(lastBody))
+                }
+                break
+              case MessageType.Page:
                 {
                   const
-                    { box: rawBody, edit: rawEdit } = msg,
-                    layout = layoutB(),
-                    rawBox = layout === defaultLayout ? rawBody : mergeBoxes(layout, rawBody),
-                    box = sanitizeBox(formatterB(), rawBox),
-                    boxes = box.items ?? [],
-                    root = body[0]?.items ?? []
-                  if (box.popup) {
-                    popup.length = 0
-                    popup.push(box)
-                    freeze(popup)
-                  } else {
-                    popup.length = 0 // clear any existing popup
-
-                    const edit = sanitizeEdit(rawEdit)
-
-                    if (edit.p === EditPosition.Inside) {
-                      const parent = queryContainer(root, edit.s, 0, edit.s.length - 1)
-                      if (parent) {
-                        switch (edit.t) {
-                          case EditType.Update:
-                            if (parent === root) {
-                              // Default case: clobber body
-                              body.length = 0
-                              body.push(box)
-                            } else {
-                              parent.length = 0
-                              parent.push(box)
-                            }
-                            break
-                          case EditType.Insert:
-                            parent.push(...boxes)
-                            break
-                          case EditType.Remove:
-                            parent.length = 0
-                            break
-                        }
-                      }
-                    } else {
-                      const container = edit.s.length > 1 ? queryContainer(root, edit.s, 0, edit.s.length - 2) : root
-                      if (container) {
-                        const target = queryBox(container, edit.s[edit.s.length - 1])
-                        if (target) {
-                          const [parent, i] = target
-                          switch (edit.t) {
-                            case EditType.Update:
-                              switch (edit.p) {
-                                case EditPosition.Before:
-                                  if (i - boxes.length < 0) {
-                                    parent.splice(0, i, ...boxes)
-                                  } else {
-                                    parent.splice(i - boxes.length, boxes.length, ...boxes)
-                                  }
-                                  break
-                                case EditPosition.At:
-                                  parent.splice(i, boxes.length, ...boxes)
-                                  break
-                                case EditPosition.After:
-                                  parent.splice(i + 1, boxes.length, ...boxes)
-                                  break
-                              }
-                              break
-                            case EditType.Insert:
-                              switch (edit.p) {
-                                // "before" and "at" mean the same, otherwise gets unintuitive
-                                case EditPosition.Before:
-                                case EditPosition.At:
-                                  parent.splice(i, 0, ...boxes)
-                                  break
-                                case EditPosition.After:
-                                  parent.splice(i + 1, 0, ...boxes)
-                                  break
-                              }
-                              break
-                            case EditType.Remove:
-                              switch (edit.p) {
-                                case EditPosition.Before:
-                                  parent.splice(0, i)
-                                  break
-                                case EditPosition.At:
-                                  parent.splice(i, 1)
-                                  break
-                                case EditPosition.After:
-                                  parent.splice(i + 1, parent.length - i)
-                                  break
-                              }
-                              break
-                          }
-                        }
-                      }
-                    }
-                    freeze(body)
+                    { id, ...page } = msg,
+                    resolve = queries.get(id)
+                  if (resolve) {
+                    queries.delete(id)
+                    resolve(page)
+                  }
+                }
+                break
+              case MessageType.Load:
+                {
+                  const { locale, translations: ts } = msg
+                  if (ts) for (const t of ts) translations[t.locale] = t
+                  const resolve = loaded.get(locale)
+                  if (resolve) {
+                    loaded.delete(locale)
+                    resolve()
                   }
-                  busyB(false)
                 }
                 break
               case MessageType.Switch:
@@ -386,7 +571,11 @@ export const newClient = (server: Server) => {
                   if (mode) modeB(mode)
                   if (plugins) installPlugins(plugins)
                   if (help) helpB(sanitizeHelp(formatterB(), help))
-                  if (resources) formatterB(formatter(toTranslationLookup(resources.translations || []), resources.locale))
+                  if (resources) {
+                    translations = toTranslationLookup(resources.translations || [])
+                    available = new Set(resources.locales || [])
+                    formatterB(formatter(translations, resources.locale))
+                  }
                   const state = stateB()
                   if (state.t === ClientStateT.Connected) busyB(false)
                 }
@@ -398,6 +587,8 @@ export const newClient = (server: Server) => {
           }
           break
         case ServerEventT.Disconnect:
+          cancelQueries('disconnected')
+          cancelLoads()
           stateB({ t: ClientStateT.Disconnected, retry: e.retry })
           break
         case ServerEventT.Error:
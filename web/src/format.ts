@@ -23,19 +23,29 @@ export type Formatter = {
   translate(s: S, data?: Data): S
 }
 
-const loadTranslation = (d: Dict<Translation>, locale: S | S[]): Translation | undefined => {
-  if (Array.isArray(locale)) {
-    for (const l of locale) {
-      const b = d[l]
-      if (b) return b
+// 'zh-Hant-TW' => ['zh-Hant-TW', 'zh-Hant', 'zh']
+export const fallbacksOf = (locale: S): S[] => {
+  const locales: S[] = []
+  while (locale) {
+    locales.push(locale)
+    locale = locale.substring(0, Math.max(0, locale.lastIndexOf('-')))
+  }
+  return locales
+}
+
+const loadTranslations = (d: Dict<Translation>, locale: S | S[]): Translation[] => {
+  const ts: Translation[] = []
+  for (const l of Array.isArray(locale) ? locale : [locale]) {
+    for (const f of fallbacksOf(l)) {
+      const t = d[f]
+      if (t && !ts.includes(t)) ts.push(t)
     }
-    return undefined
   }
-  return d[locale]
+  return ts
 }
 
 export const formatter = (translations: Dict<Translation>, locale: S | S[]): Formatter => {
-  let translation: Translation | null | undefined = null
+  let loaded: Translation[] | null = null
 
   const
     load = (locale: S) => formatter(translations, locale),
@@ -45,11 +55,18 @@ export const formatter = (translations: Dict<Translation>, locale: S | S[]): For
       // Lazy load: 
       // translate() could be invoked purely for formatting, 
       // in which case the lookup is wasteful 
-      if (!translation) translation = loadTranslation(translations, locale)
+      if (!loaded) loaded = loadTranslations(translations, locale)
 
-      if (translation && /^@\w+$/.test(s)) {
-        const x = translation.strings[s.substring(1)]
-        if (x) s = x
+      if (loaded.length && /^@\w+$/.test(s)) {
+        // Fall back to less specific locales, string by string.
+        const k = s.substring(1)
+        for (const t of loaded) {
+          const x = t.strings[k]
+          if (x) {
+            s = x
+            break
+          }
+        }
       }
 
       if (data && /^=/.test(s)) {
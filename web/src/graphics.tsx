@@ -13,7 +13,7 @@
 // limitations under the License.
 
 import { useLayoutEffect, useRef } from 'react';
-import { B, debounce, F, isN, S } from './core';
+import { B, debounce, F, isN, S, U } from './core';
 import { css } from './css';
 import { Box } from './protocol';
 import { BoxProps } from './ui';
@@ -24,10 +24,11 @@ type Pairs = Pair[]
 
 const
   lerp = (f: F, a: F, b: F) => a * (1.0 - f) + (b * f),
+  isSeries = (x: any): B => Array.isArray(x) || ArrayBuffer.isView(x),
   isPair = (x: any) => Array.isArray(x) && x.length === 2,
   arePairs = (xs: any[]): xs is Pairs => xs.every(isPair),
   clamp1 = (f: any) => isN(f) ? f < 0 ? 0 : f > 1 ? 1 : f : 0,
-  clamp1s = (fs: any[]) => fs.map(clamp1),
+  clamp1s = (fs: ArrayLike<any>) => Array.from(fs, clamp1),
   clampPairs = (fs: Pairs) => fs.map(clamp1s) as Pairs,
   newEl = (t: S) => document.createElementNS('http://www.w3.org/2000/svg', t),
   newPath = (d: PathD) => {
@@ -733,9 +734,11 @@ export const GraphicLabel = ({ context, box }: BoxProps) => {
 }
 
 const redraw = (box: Box, div: HTMLDivElement | null) => {
-  const { modes, data } = box
+  const
+    { modes } = box,
+    data: any = box.data // an array, or a typed array if sent packed
 
-  if (!(div && Array.isArray(data) && data.length)) return
+  if (!(div && isSeries(data) && data.length)) return
   const
     bounds = div.getBoundingClientRect(),
     width = Math.round(bounds.width),
@@ -1212,6 +1215,13 @@ const redraw = (box: Box, div: HTMLDivElement | null) => {
   div.appendChild(svg)
 }
 
+// Append points to a series, keeping only the last window points, if set.
+export const appendSeries = (data: any, points: any, window?: U): any[] => {
+  const xs: any[] = isSeries(data) ? Array.from(data) : []
+  if (isSeries(points)) for (const p of points) xs.push(p)
+  return window && window > 0 && xs.length > window ? xs.slice(xs.length - window) : xs
+}
+
 export const Graphic = ({ box }: BoxProps) => {
   const ref = useRef<HTMLDivElement>(null)
   useLayoutEffect(() => {
@@ -1224,7 +1234,7 @@ export const Graphic = ({ box }: BoxProps) => {
 
     // Dispose
     return () => window.removeEventListener('resize', invalidate)
-  }, [box]);
+  }, [box, box.data]); // data is replaced when points are appended
 
   return <div ref={ref} className={css(box.style)} />
 }
@@ -16,7 +16,7 @@ import { anyD, anyN, B, Dict, Incr, isB, isN, isO, isPair, isS, isV, newIncr, S,
 import { css } from './css';
 import { Formatter } from './format';
 import { markdown } from './markdown';
-import { allBoxModes, Box, BoxMode, BoxT, Header, inputBoxModes, Option } from './protocol';
+import { allBoxModes, ArrayType, Box, BoxMode, BoxT, Column, Header, inputBoxModes, Option, PackedArray, TypedArray } from './protocol';
 
 const isInput = (modes: Set<BoxT>) => {
   for (const m of inputBoxModes) if (modes.has(m)) return true
@@ -26,6 +26,8 @@ const isInput = (modes: Set<BoxT>) => {
 const determineMode = (box: Box): BoxMode => {
   const { modes, options } = box
 
+  if (box.columns || box.source) return 'table'
+
   if (options) {
     if (box.headers?.length && options.every(o => o.options?.length ? true : false)) {
       return 'table'
@@ -158,6 +160,38 @@ export const sanitizeOptions = (x: any): Option[] => { // recursive
   return []
 }
 
+type TypedArrayConstructor = {
+  new(buffer: ArrayBufferLike, byteOffset: U, length: U): TypedArray
+  BYTES_PER_ELEMENT: U
+}
+
+const arrayTypes: Record<ArrayType, TypedArrayConstructor> = {
+  i8: Int8Array,
+  u8: Uint8Array,
+  i16: Int16Array,
+  u16: Uint16Array,
+  i32: Int32Array,
+  u32: Uint32Array,
+  f32: Float32Array,
+  f64: Float64Array,
+}
+
+const isPackedArray = (x: any): x is PackedArray => isO(x) && isS(x.dtype) && x.buffer instanceof Uint8Array
+
+const unpackArray = ({ dtype, buffer: b }: PackedArray): TypedArray => {
+  const
+    T = arrayTypes[dtype],
+    n = b.byteLength / T.BYTES_PER_ELEMENT
+  // Typed arrays must be aligned; copy if not.
+  return b.byteOffset % T.BYTES_PER_ELEMENT === 0
+    ? new T(b.buffer, b.byteOffset, n)
+    : new T(b.slice().buffer, 0, n)
+}
+
+export const sanitizeColumn = (c: Column): Column => isPackedArray(c) ? unpackArray(c) : c
+
+export const sanitizeSeries = (x: any): any => isPackedArray(x) ? unpackArray(x) : x
+
 const localizeBox = (fmt: Formatter, box: Box) => {
   const { text, title, caption, placeholder, prefix, suffix, hint, help, options, headers, data } = box
   if (text) box.text = fmt.translate(text, data)
@@ -282,6 +316,10 @@ export const sanitizeBox = (formatter: Formatter, box: Box): Box => {
 
     sanitizeRange(box)
 
+    if (box.columns) box.columns = box.columns.map(sanitizeColumn)
+
+    if (box.data) box.data = sanitizeSeries(box.data) // graphics series
+
     if (hasNoMode(modes)) modes.add(determineMode(box))
 
     if (isB(value)) box.value = value ? 1 : 0 // TODO ugly: protocol should accept boolean
@@ -1,5 +1,5 @@
 import { B, isO, S } from "./core"
-import { Message, Server, ServerEvent, ServerEventHandler, ServerEventT } from "./protocol"
+import { Message, MessageType, Server, ServerEvent, ServerEventHandler, ServerEventT } from "./protocol"
 import yaml from "js-yaml"
 
 type Conf = {
@@ -77,7 +77,8 @@ const
     }
     return pythonConf
   },
-  connectEvent: ServerEvent = { t: ServerEventT.Connect }
+  connectEvent: ServerEvent = { t: ServerEventT.Connect },
+  codecs = ['json'] // messages are exchanged with the worker as JSON strings
 
 export const newLocalServer = (): Server => {
   let _worker: Worker | null = null
@@ -111,6 +112,7 @@ export const newLocalServer = (): Server => {
     },
     send = (message: Message) => {
       if (_worker) {
+        if (message.t === MessageType.Join) message.client.codecs = codecs
         const c: Command = { t: CommandT.Execute, message: JSON.stringify(message) }
         _worker.postMessage(c)
       }
@@ -46,6 +46,10 @@ export enum MessageType {
   Input, // client -> server, commit input
   Output, // server -> client, display output
   Set, // server -> client, set attributes
+  Patch, // server -> client, modify previous output
+  Query, // client -> server, fetch rows from a table's data source
+  Page, // server -> client, rows fetched from a table's data source
+  Load, // client -> server, request translations; server -> client, translations
 }
 
 export type InputValue = B | S | N | S[] | N[] | null
@@ -75,17 +79,59 @@ export type Message = {
 } | {
   t: MessageType.Set,
   settings: Settings
+} | {
+  t: MessageType.Patch
+  ops: PatchOp[] // changes to the previous root view
+} | ({
+  t: MessageType.Query
+  id: U // correlation id, echoed in the Page
+} & Query) | ({
+  t: MessageType.Page
+  id: U // correlation id of the Query
+} & Page) | {
+  t: MessageType.Load
+  locale: S
+  translations?: Translation[] // the locale's translations, and those of its fallbacks
+}
+
+export type Query = {
+  source: S // Box.source
+  offset: U // index of first row
+  limit: U // max rows
+  sort?: U // index of column to sort by
+  desc?: B // sort in descending order
+  filter?: S // search text
+  keys?: B // return row keys only; the client has the rows
 }
 
-export enum EditType { Insert = 1, Update, Remove }
+export type Page = {
+  total?: U // number of matching rows
+  keys?: Array<V> | PackedArray // row keys; defaults to row indices
+  columns?: Column[] // cells, column by column
+  error?: S
+}
+
+export enum EditType { Insert = 1, Update, Remove, Append }
+
+export enum PatchType { Insert = 1, Replace, Remove, Set }
+
+// Each path is a sequence of indices into items, starting at the root view.
+export type PatchOp = [PatchType.Insert, U[], Box]
+  | [PatchType.Replace, U[], Box]
+  | [PatchType.Remove, U[]]
+  | [PatchType.Set, U[], Dict<any>] // null attributes are removed
 
 export type Edit = {
   t: EditType
   s?: S // selector
+  w?: U // append: number of points to keep
 }
 
 export type Client = {
   locale: S
+  patch?: B // can apply Patch messages
+  compress?: S[] // compression formats supported, most preferred first
+  codecs?: S[] // message encodings supported, most preferred first
 }
 
 export type Theme = {
@@ -111,7 +157,7 @@ export type DisplayMode = 'normal' | 'chromeless'
 
 export type Translation = { locale: S, strings: Dict<S> }
 
-export type Resources = { locale: S, translations: Translation[] }
+export type Resources = { locale: S, translations: Translation[], locales?: S[] } // locales: all available
 
 export type Settings = {
   title?: S,
@@ -210,7 +256,7 @@ export const inputBoxModes = boxEntries.filter(([_, v]) => v.input).map(([k, _])
 export const labeledBoxModes = boxEntries.filter(([_, v]) => v.labeled).map(([k, _]) => k as BoxMode)
 
 export type BoxModifier = 'live'
-  | 'editable' | 'multi' | 'required' | 'selectable'
+  | 'editable' | 'multi' | 'required' | 'search' | 'selectable'
   | 'vertical'
   | 'top' | 'middle' | 'bottom' | 'left' | 'center' | 'right'
   | 'open' | 'closed'
@@ -219,6 +265,18 @@ export type BoxT = BoxMode | BoxModifier
 
 export type Data = Dict<P | Data> | Array<P | Data>
 
+export type TypedArray = Int8Array | Uint8Array | Int16Array | Uint16Array | Int32Array | Uint32Array | Float32Array | Float64Array
+
+export type ArrayType = 'i8' | 'u8' | 'i16' | 'u16' | 'i32' | 'u32' | 'f32' | 'f64'
+
+// Numeric array, packed as little-endian bytes.
+export type PackedArray = {
+  dtype: ArrayType
+  buffer: Uint8Array
+}
+
+export type Column = V[] | PackedArray | TypedArray // packed arrays are unpacked during sanitization
+
 export type Box = {
   xid: S
   pid?: S // (front-end only) xid of parent, if applicable
@@ -230,8 +288,10 @@ export type Box = {
   value?: V | Pair<V>
   options?: Option[]
   headers?: Header[]
+  columns?: Column[]
+  source?: S // data source for table rows
   items?: Box[]
-  data?: Data
+  data?: Data // numeric arrays may be packed, and are unpacked during sanitization
   halt?: B
   title?: S
   caption?: S
@@ -13,8 +13,8 @@
 // limitations under the License.
 
 import msgpack from '@ygoe/msgpack';
-import { defer, S } from "./core";
-import { Message, Server, ServerEvent, ServerEventHandler, ServerEventT } from "./protocol";
+import { B, defer, S } from "./core";
+import { Message, MessageType, Server, ServerEvent, ServerEventHandler, ServerEventT } from "./protocol";
 
 
 const
@@ -27,14 +27,40 @@ const
     return p + "://" + host + path
   },
   marshal = (data: any): Uint8Array => msgpack.serialize(data),
-  unmarshal = (d: Uint8Array): Message => msgpack.deserialize(d)
+  unmarshal = (d: Uint8Array): Message => msgpack.deserialize(d),
+  codecs = ['msgpack'], // the only encoding this client decodes
+  // Not available in older browsers.
+  Decompressor: any = (window as any).DecompressionStream,
+  canDecompress = (format: S): B => {
+    if (!Decompressor) return false
+    try {
+      new Decompressor(format)
+      return true
+    } catch (e) {
+      return false
+    }
+  },
+  // Compression formats to offer the server, most preferred first.
+  encodings = ['zstd', 'deflate'].filter(canDecompress),
+  // Compressed messages are recognized by their headers; uncompressed messages always start with a map.
+  isZlib = (b: Uint8Array): B => b.length > 1 && b[0] === 0x78,
+  isZstd = (b: Uint8Array): B => b.length > 3 && b[0] === 0x28 && b[1] === 0xb5 && b[2] === 0x2f && b[3] === 0xfd,
+  inflate = async (data: ArrayBuffer, format: S): Promise<Uint8Array> => {
+    const stream = new Blob([data]).stream().pipeThrough(new Decompressor(format))
+    return new Uint8Array(await new Response(stream).arrayBuffer())
+  },
+  decode = async (data: ArrayBuffer): Promise<Message> => {
+    const b = new Uint8Array(data)
+    return unmarshal(isZlib(b) ? await inflate(data, 'deflate') : isZstd(b) ? await inflate(data, 'zstd') : b)
+  }
 
 export const newSocketServer = (address: S): Server => {
   let
     _socket: WebSocket | null = null,
     _backoff = 1,
     _handle = noopHandler,
-    _disconnected = false
+    _disconnected = false,
+    _received = Promise.resolve() // messages are decoded asynchronously, but handled in order
 
   const
     connect = (handle: ServerEventHandler) => {
@@ -52,11 +78,9 @@ export const newSocketServer = (address: S): Server => {
       socket.onopen = () => {
         _socket = socket
         _handle(connectEvent)
-        _backoff = 1
       }
-      socket.onclose = (e) => {
-        if (e.code === 1013) return // try again later
-
+      socket.onclose = () => {
+        // Also on 1013 (try again later), when the server is at capacity: back off and retry.
         _socket = null
 
         if (_disconnected) return // disconnected manually; don't reconnect
@@ -69,14 +93,17 @@ export const newSocketServer = (address: S): Server => {
       socket.onmessage = (e) => {
         const data = e.data
         if (!data) return
-        try {
-          const message = unmarshal(data)
-          // console.log('recv', message)
-          _handle({ t: ServerEventT.Message, message })
-        } catch (error) {
-          console.error(error)
-          _handle({ t: ServerEventT.Error, error })
-        }
+        _backoff = 1 // Served, not turned away.
+        _received = _received
+          .then(() => decode(data))
+          .then(message => {
+            // console.log('recv', message)
+            _handle({ t: ServerEventT.Message, message })
+          })
+          .catch(error => {
+            console.error(error)
+            _handle({ t: ServerEventT.Error, error })
+          })
       }
       socket.onerror = (error) => {
         if (_disconnected) return // disconnected manually
@@ -86,6 +113,10 @@ export const newSocketServer = (address: S): Server => {
     },
     send = (message: Message) => {
       // console.log('send', message)
+      if (message && message.t === MessageType.Join) {
+        message.client.codecs = codecs
+        if (encodings.length) message.client.compress = encodings
+      }
       defer(0, () => {
         if (_socket && message) _socket.send(marshal(message))
       })
@@ -12,22 +12,145 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
-import { CheckboxVisibility, DetailsList, DetailsListLayoutMode, DetailsRow, IColumn, IDetailsRowProps, IGroup, Link, Selection, SelectionMode } from '@fluentui/react';
+import { CheckboxVisibility, DetailsList, DetailsListLayoutMode, DetailsRow, IColumn, IconButton, IDetailsRowProps, IGroup, Link, MessageBar, MessageBarType, SearchBox, Selection, SelectionMode, Stack, Text } from '@fluentui/react';
 import React from 'react';
-import { areSetsEqual, B, Dict, isS, S, signal, U, words } from './core';
+import { areSetsEqual, B, Dict, isS, S, signal, U, V, words } from './core';
 import { css } from './css';
+import { sanitizeColumn } from './heuristics';
 import { markdown } from './markdown';
 import { selectedOf, selectedsOf } from './options';
-import { Header, Option } from './protocol';
+import { Header, Option, Page, TypedArray } from './protocol';
 import { BoxProps, make } from './ui';
 
-type TableRow = { key: S }
+type TableRow = { key: S, i?: U } // i: row index, for columnar tables
+type SanitizedColumn = V[] | TypedArray
 type TableGroup = { key: S, text: S, rows: TableRow[], groups: TableGroup[] }
 
+const
+  parseSize = (styles: S[], prefix: S): U | undefined => {
+    for (const style of styles) {
+      if (style.indexOf(prefix) === 0) {
+        let suffix = style.substring(prefix.length)
+        if (suffix === 'px') { // foo-px
+          return 4 // tw 1 -> 4
+        }
+        if (/^\[.+px\]$/.test(suffix)) { // foo-[42px]
+          suffix = suffix.substring(1, suffix.length - 3)
+          const size = parseFloat(suffix)
+          return isNaN(size) ? undefined : size
+        }
+        // foo-32
+        const size = parseFloat(suffix)
+        if (!isNaN(size)) return size * 4 // tw 1 -> 4
+      }
+    }
+    return undefined
+  },
+  // Emulate Tailwind styles.
+  parseWidths = (style?: S): [U | undefined, U | undefined] => {
+    let min: U | undefined = undefined, max: U | undefined = undefined
+    if (isS(style)) {
+      const styles = words(style)
+      min = parseSize(styles, 'min-w-')
+      max = parseSize(styles, 'max-w-')
+    }
+    return [min, max]
+  },
+  toColumns = (headers: Header[] | undefined, onColumnClick: IColumn['onColumnClick']) => (headers ?? []).map((h, i): IColumn => {
+    const
+      { modes, text, icon, style } = h,
+      iconName = icon ?? undefined,
+      isIconOnly = icon ? true : false,
+      [minWidth, maxWidth] = parseWidths(style)
+
+    return {
+      key: `f${i}`,
+      name: text,
+      ariaLabel: text,
+      minWidth: minWidth ?? 0,
+      maxWidth,
+      fieldName: `f${i}`,
+      isSorted: false,
+      isSortedDescending: true,
+      iconName,
+      isIconOnly,
+      onColumnClick,
+      data: h,
+      isResizable: !modes.has('fixed'),
+      isMultiline: modes.has('multiline'),
+      onRenderHeader: (props, render) => (
+        // Set tooltip
+        <span title={text}>{(render && render(props)) || <></>}</span>
+      ),
+    }
+  }),
+  // Toggle the sort order of the clicked column; returns the new columns and the clicked column.
+  sortColumns = (currentColumns: IColumn[], clickedColumn: IColumn): [IColumn[], IColumn] => {
+    const
+      columns = currentColumns.slice(0),
+      column = columns.filter(c => c.key === clickedColumn.key)[0]
+
+    columns.forEach(c => {
+      if (c === column) {
+        c.isSortedDescending = !c.isSortedDescending
+        c.isSorted = true
+      } else {
+        c.isSorted = false
+        c.isSortedDescending = true
+      }
+    })
+    return [columns, column]
+  },
+  fieldIndexOf = ({ key }: IColumn): U => parseInt(key.substring(1)), // key = f{index}
+  renderCell = (text: S, h?: Header) => {
+    if (h && h.modes.has('md')) {
+      const __html = markdown(text)[0]
+      return <span className='table-md' dangerouslySetInnerHTML={{ __html }} />
+    }
+    return <span>{text}</span>
+  },
+  onRenderRow = (props?: IDetailsRowProps) => props
+    ? <DetailsRow {...props} styles={{ cell: { fontSize: 14 } }} />
+    : null,
+  // Search box; calls search() with the trimmed search text whenever it changes, after the user pauses typing.
+  newSearch = (search: (text: S) => void) => {
+    let
+      text = '',
+      timeout = 0
+    const
+      submit = (t?: S) => {
+        window.clearTimeout(timeout)
+        const s = t ? t.trim() : ''
+        if (s === text) return
+        text = s
+        search(s)
+      },
+      change = (_?: React.ChangeEvent<HTMLInputElement>, t?: S) => {
+        window.clearTimeout(timeout)
+        timeout = window.setTimeout(() => submit(t), 300)
+      },
+      dispose = () => window.clearTimeout(timeout),
+      render = (placeholder?: S) => (
+        <SearchBox placeholder={placeholder ?? 'Search'} onChange={change} onSearch={submit} onClear={() => submit('')} />
+      )
+    return { render, dispose }
+  },
+  renderError = (error?: S) => error
+    ? <MessageBar messageBarType={MessageBarType.error}>{error}</MessageBar>
+    : null
+
 
 export const Table = make(({ context, box }: BoxProps) => {
+  let
+    sort: U | undefined = undefined,
+    desc = false,
+    filter = '',
+    lastQuery = 0
+
   const
-    { name, modes, headers, options, style } = box,
+    { name, modes, headers, options, placeholder, style } = box,
+    columnar = box.columns as SanitizedColumn[] | undefined,
+    hasSearch = modes.has('search'),
     live = modes.has('live'),
     isMultiple = modes.has('multi'),
     isList = isMultiple || modes.has('selectable'),
@@ -45,86 +168,73 @@ export const Table = make(({ context, box }: BoxProps) => {
     },
     linkColumnIndex = headers ? headers.findIndex(h => h.modes.has('link')) : -1,
     linkColumnKey = `f${linkColumnIndex}`,
-    sortRows = (rows: TableRow[], key: S, descending?: B): TableRow[] => {
-      return rows.slice(0).sort((a: any, b: any) => ((descending ? a[key] < b[key] : a[key] > b[key]) ? 1 : -1));
+    cellOf = columnar
+      ? (row: TableRow, j: U): any => columnar[j]?.[row.i!]
+      : (row: TableRow, j: U): any => (row as Dict<any>)[`f${j}`],
+    sortRows = (rows: TableRow[], j: U, descending?: B): TableRow[] => {
+      return rows.slice(0).sort((a, b) => {
+        const x = cellOf(a, j), y = cellOf(b, j)
+        return (descending ? x < y : x > y) ? 1 : -1
+      })
     },
-    onColumnClick = (ev: React.MouseEvent<HTMLElement>, clickedColumn: IColumn) => {
+    searchRows = (rows: TableRow[], text: S): TableRow[] => {
       const
-        [currentColumns, currentItems] = contentB(),
-        columns = currentColumns.slice(0),
-        column = columns.filter(c => c.key === clickedColumn.key)[0]
-
-      columns.forEach(c => {
-        if (c === column) {
-          c.isSortedDescending = !c.isSortedDescending
-          c.isSorted = true
-        } else {
-          c.isSorted = false
-          c.isSortedDescending = true
+        t = text.toLowerCase(),
+        n = headers ? headers.length : 0
+      return rows.filter(row => {
+        for (let j = 0; j < n; j++) {
+          const cell = cellOf(row, j)
+          if (cell !== undefined && cell !== null && String(cell).toLowerCase().includes(t)) return true
         }
+        return false
       })
-
-      const rows = sortRows(currentItems, column.fieldName!, column.isSortedDescending)
-
-      contentB([columns, rows])
     },
-    parseSize = (styles: S[], prefix: S): U | undefined => {
-      for (const style of styles) {
-        if (style.indexOf(prefix) === 0) {
-          let suffix = style.substring(prefix.length)
-          if (suffix === 'px') { // foo-px
-            return 4 // tw 1 -> 4
-          }
-          if (/^\[.+px\]$/.test(suffix)) { // foo-[42px]
-            suffix = suffix.substring(1, suffix.length - 3)
-            const size = parseFloat(suffix)
-            return isNaN(size) ? undefined : size
+    // Sort and search on the server if the table has a source, else locally.
+    // The source returns the keys of the matching rows, in order.
+    query = (columns: IColumn[]) => {
+      const id = ++lastQuery
+      if (box.source && !groups.length) {
+        contentB([columns, contentB()[1]])
+        context.fetch({
+          source: box.source,
+          offset: 0,
+          limit: rows.length,
+          sort,
+          desc,
+          filter: filter.length ? filter : undefined,
+          keys: true,
+        }).then(page => {
+          if (id !== lastQuery) return // superseded by a later query
+          const { keys, error } = page
+          errorB(error)
+          if (error) return
+          const
+            rowsByKey = new Map<S, TableRow>(rows.map(row => [row.key, row])),
+            matches: TableRow[] = []
+          if (keys) {
+            for (const key of sanitizeColumn(keys) as SanitizedColumn) {
+              const row = rowsByKey.get(String(key))
+              if (row) matches.push(row)
+            }
           }
-          // foo-32
-          const size = parseFloat(suffix)
-          if (!isNaN(size)) return size * 4 // tw 1 -> 4
-        }
+          contentB([contentB()[0], matches])
+        })
+        return
       }
-      return undefined
+      const matches = filter.length ? searchRows(rows, filter) : rows
+      contentB([columns, sort === undefined ? matches : sortRows(matches, sort, desc)])
     },
-    // Emulate Tailwind styles.
-    parseWidths = (style?: S): [U | undefined, U | undefined] => {
-      let min: U | undefined = undefined, max: U | undefined = undefined
-      if (isS(style)) {
-        const styles = words(style)
-        min = parseSize(styles, 'min-w-')
-        max = parseSize(styles, 'max-w-')
-      }
-      return [min, max]
+    onColumnClick = (ev: React.MouseEvent<HTMLElement>, clickedColumn: IColumn) => {
+      const [columns, column] = sortColumns(contentB()[0], clickedColumn)
+      sort = fieldIndexOf(column)
+      desc = column.isSortedDescending ? true : false
+      query(columns)
     },
-    columns = (headers ?? []).map((h, i): IColumn => {
-      const
-        { modes, text, icon, style } = h,
-        iconName = icon ?? undefined,
-        isIconOnly = icon ? true : false,
-        [minWidth, maxWidth] = parseWidths(style)
-
-      return {
-        key: `f${i}`,
-        name: text,
-        ariaLabel: text,
-        minWidth: minWidth ?? 0,
-        maxWidth,
-        fieldName: `f${i}`,
-        isSorted: false,
-        isSortedDescending: true,
-        iconName,
-        isIconOnly,
-        onColumnClick,
-        data: h,
-        isResizable: !modes.has('fixed'),
-        isMultiline: modes.has('multiline'),
-        onRenderHeader: (props, render) => (
-          // Set tooltip
-          <span title={text}>{(render && render(props)) || <></>}</span>
-        ),
-      }
+    search = newSearch(text => {
+      filter = text
+      query(contentB()[0])
     }),
+    columns = toColumns(headers, onColumnClick),
     isRow = ({ options }: Option) => {
       if (!options) return false
       for (const option of options) if (option.options?.length) return false
@@ -162,7 +272,17 @@ export const Table = make(({ context, box }: BoxProps) => {
       }
       return count
     },
+    initColumnarRows = (columnar: SanitizedColumn[]): [TableRow[], IGroup[]] => {
+      const
+        n = columnar.reduce((n, c) => Math.max(n, c.length), 0),
+        keys = options?.map(o => String(o.value)),
+        items = new Array<TableRow>(n)
+      for (let i = 0; i < n; i++) items[i] = { key: keys?.[i] ?? String(i), i }
+      return [items, []]
+    },
     initRows = (): [TableRow[], IGroup[]] => {
+      if (columnar) return initColumnarRows(columnar)
+
       const
         { rows, groups } = createGroup({ value: '', options }),
         items: TableRow[] = [],
@@ -207,17 +327,12 @@ export const Table = make(({ context, box }: BoxProps) => {
       return selection
     },
     selection = initSelection(),
-    renderCell = (text: S, h?: Header) => {
-      if (h && h.modes.has('md')) {
-        const __html = markdown(text)[0]
-        return <span className='table-md' dangerouslySetInnerHTML={{ __html }} />
-      }
-      return <span>{text}</span>
-    },
     onRenderItemColumn = (row: TableRow, _?: U, column?: IColumn) => {
       if (!column) return <span />
 
-      const text = (row as Dict<any>)[column.key]
+      const
+        cell = cellOf(row, fieldIndexOf(column)),
+        text = cell === undefined ? '' : String(cell)
       if (isList) return renderCell(text, column.data as Header)
 
       // mode = 'table'
@@ -229,14 +344,18 @@ export const Table = make(({ context, box }: BoxProps) => {
         ? <Link href="" onClick={onClick}>{text}</Link>
         : renderCell(text, column.data as Header)
     },
-    onRenderRow = (props?: IDetailsRowProps) => props
-      ? <DetailsRow {...props} styles={{ cell: { fontSize: 14 } }} />
-      : null,
     contentB = signal<[IColumn[], TableRow[]]>([columns, rows]),
+    errorB = signal<S | undefined>(undefined),
+    dispose = () => {
+      search.dispose()
+      lastQuery++ // ignore pending queries
+    },
     render = () => {
       const [columns, rows] = contentB()
       return (
         <div className={css(style)} data-name={name}>
+          {hasSearch && search.render(placeholder)}
+          {renderError(errorB())}
           <DetailsList
             items={rows}
             groups={groups.length ? groups : undefined}
@@ -259,5 +378,176 @@ export const Table = make(({ context, box }: BoxProps) => {
 
   record()
 
-  return { render, contentB }
-})
\ No newline at end of file
+  return { render, dispose, contentB, errorB }
+})
+type TablePage = { offset: U, total: U, rows: TableRow[], columns: SanitizedColumn[], error?: S }
+
+const defaultPageSize = 50
+
+// A table whose rows are fetched a page at a time from a data source on the server.
+export const SourcedTable = make(({ context, box }: BoxProps) => {
+  let
+    sort: U | undefined = undefined,
+    desc = false,
+    filter = '',
+    lastLoad = 0
+
+  const
+    { name, modes, headers, value, lines, placeholder, style } = box,
+    source = box.source as S,
+    live = modes.has('live'),
+    isMultiple = modes.has('multi'),
+    isList = isMultiple || modes.has('selectable'),
+    isSingle = isList && !isMultiple,
+    hasSearch = modes.has('search'),
+    limit = lines && lines > 0 ? lines : defaultPageSize,
+    selectedValues = new Set<S>(
+      value === undefined || value === null
+        ? []
+        : Array.isArray(value) ? value.map(v => String(v)) : [String(value)]
+    ),
+    record = () => {
+      if (isList) {
+        const vs = Array.from(selectedValues)
+        context.record(isMultiple ? vs : vs.length ? vs[0] : null)
+      } else {
+        context.record(null)
+      }
+    },
+    linkColumnIndex = headers ? headers.findIndex(h => h.modes.has('link')) : -1,
+    linkColumnKey = `f${linkColumnIndex}`,
+    pageB = signal<TablePage>({ offset: 0, total: 0, rows: [], columns: [] }),
+    cellOf = (row: TableRow, j: U): any => pageB().columns[j]?.[row.i!],
+    onColumnClick = (ev: React.MouseEvent<HTMLElement>, clickedColumn: IColumn) => {
+      const [columns, column] = sortColumns(columnsB(), clickedColumn)
+      sort = fieldIndexOf(column)
+      desc = column.isSortedDescending ? true : false
+      columnsB(columns)
+      load(0)
+    },
+    columnsB = signal<IColumn[]>(toColumns(headers, onColumnClick)),
+    selection = new Selection({
+      onSelectionChanged: () => {
+        const
+          selected = new Set<S>((selection.getSelection() as TableRow[]).map(row => row.key)),
+          newSelectedValues = new Set<S>(isSingle && selected.size ? [] : selectedValues)
+
+        // Rows on other pages retain their selection.
+        for (const { key } of pageB().rows) {
+          if (selected.has(key)) {
+            newSelectedValues.add(key)
+          } else {
+            newSelectedValues.delete(key)
+          }
+        }
+
+        // Prevent inf loop: don't commit unless selection has changed.
+        if (!areSetsEqual(selectedValues, newSelectedValues)) {
+          selectedValues.clear()
+          for (const v of newSelectedValues) selectedValues.add(v)
+          record()
+          if (live) context.commit()
+        }
+      }
+    }),
+    select = (rows: TableRow[]) => {
+      selection.setChangeEvents(false)
+      selection.setItems(rows, true)
+      for (const { key } of rows) if (selectedValues.has(key)) selection.setKeySelected(key, true, false)
+      selection.setChangeEvents(true, true)
+    },
+    toPage = (offset: U, page: Page): TablePage => {
+      const { total, keys, columns, error } = page
+      if (error) return { offset, total: 0, rows: [], columns: [], error }
+      const
+        cs = (columns ?? []).map(sanitizeColumn) as SanitizedColumn[],
+        ks = keys ? sanitizeColumn(keys) as SanitizedColumn : null,
+        n = cs.reduce((n, c) => Math.max(n, c.length), 0),
+        rows = new Array<TableRow>(n)
+      for (let i = 0; i < n; i++) rows[i] = { key: String(ks ? ks[i] : offset + i), i }
+      return { offset, total: total ?? n, rows, columns: cs }
+    },
+    load = (offset: U) => {
+      const id = ++lastLoad
+      context.fetch({ source, offset, limit, sort, desc, filter: filter.length ? filter : undefined }).then(p => {
+        if (id !== lastLoad) return // superseded by a later load
+        const page = toPage(offset, p)
+        select(page.rows)
+        pageB(page)
+      })
+    },
+    search = newSearch(text => {
+      filter = text
+      load(0)
+    }),
+    onRenderItemColumn = (row: TableRow, _?: U, column?: IColumn) => {
+      if (!column) return <span />
+
+      const
+        cell = cellOf(row, fieldIndexOf(column)),
+        text = cell === undefined || cell === null ? '' : String(cell)
+      if (isList) return renderCell(text, column.data as Header)
+
+      // mode = 'table'
+      const onClick = () => {
+        context.record(row.key)
+        context.commit()
+      }
+      return column.key === linkColumnKey
+        ? <Link href="" onClick={onClick}>{text}</Link>
+        : renderCell(text, column.data as Header)
+    },
+    init = () => {
+      load(0)
+    },
+    dispose = () => {
+      search.dispose()
+      lastLoad++ // ignore pending loads
+    },
+    render = () => {
+      const
+        columns = columnsB(),
+        { offset, total, rows, error } = pageB(),
+        end = offset + rows.length
+      return (
+        <div className={css(style)} data-name={name}>
+          {hasSearch && search.render(placeholder)}
+          {renderError(error)}
+          <DetailsList
+            items={rows}
+            columns={columns}
+            setKey="set"
+            layoutMode={DetailsListLayoutMode.justified}
+            selection={selection}
+            selectionPreservedOnEmptyClick={true}
+            ariaLabelForSelectionColumn="Toggle selection"
+            ariaLabelForSelectAllCheckbox="Select All"
+            checkButtonAriaLabel="Select"
+            onRenderItemColumn={onRenderItemColumn}
+            onRenderRow={onRenderRow}
+            selectionMode={isMultiple ? SelectionMode.multiple : isSingle ? SelectionMode.single : SelectionMode.none}
+            checkboxVisibility={isList ? CheckboxVisibility.always : CheckboxVisibility.hidden}
+          />
+          <Stack horizontal horizontalAlign='end' verticalAlign='center'>
+            <Text variant='small'>{total ? `${offset + 1}–${end} of ${total}` : ''}</Text>
+            <IconButton
+              iconProps={{ iconName: 'ChevronLeft' }}
+              ariaLabel='Previous page'
+              disabled={offset <= 0}
+              onClick={() => load(Math.max(0, offset - limit))}
+            />
+            <IconButton
+              iconProps={{ iconName: 'ChevronRight' }}
+              ariaLabel='Next page'
+              disabled={end >= total}
+              onClick={() => load(end)}
+            />
+          </Stack>
+        </div>
+      )
+    }
+
+  record()
+
+  return { init, render, dispose, columnsB, pageB }
+})
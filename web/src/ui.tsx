@@ -14,7 +14,7 @@
 
 import React from 'react';
 import { B, Dict, Disposable, isSignal, on, S } from './core';
-import { Box, InputValue } from './protocol';
+import { Box, InputValue, Page, Query } from './protocol';
 
 export type Context = {
   scoped(index: any, xid: S): Context
@@ -23,6 +23,7 @@ export type Context = {
   switch(method: S, params?: Dict<S>): void
   help(id: S): void
   hotkey(chord: S, handle: () => void): () => void
+  fetch(query: Query): Promise<Page>
 }
 
 export type BoxProps = { context: Context, box: Box }